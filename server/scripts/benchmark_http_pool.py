@@ -0,0 +1,78 @@
+"""Benchmarks Spotify requests with and without the pooled HTTP session.
+
+Makes the same number of sequential GET requests that building one quiz
+makes, first the way the spotify module used to (a bare requests.get(),
+which opens a new TCP and TLS connection every time), then through the
+spotify module's pooled, keep-alive session. Prints the per-request and
+per-quiz latency of both.
+
+The requests don't need to be authorized: an unauthorized request to
+the Spotify API still goes through the whole connection setup, which
+is the cost being measured.
+
+Run from the server/ folder, with the virtual environment activated:
+    python scripts/benchmark_http_pool.py [--requests 25] [--rounds 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+import django
+django.setup()
+
+from spoton import spotify
+
+
+def time_requests(get, url, num_requests):
+    """Returns how long it takes to make the requests, in seconds."""
+
+    start = time.perf_counter()
+    for i in range(num_requests):
+        get(url)
+    return time.perf_counter() - start
+
+
+def unpooled_get(url):
+    return requests.get(url, timeout=spotify._http_timeout())
+
+
+def pooled_get(url):
+    return spotify._http_request('GET', url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default=spotify.SPOTIFY_API_URL + '/v1/me',
+            help='the URL to request (default: %(default)s)')
+    parser.add_argument('--requests', type=int, default=25,
+            help='requests per quiz (default: %(default)s)')
+    parser.add_argument('--rounds', type=int, default=5,
+            help='quizzes to time for each client (default: %(default)s)')
+    args = parser.parse_args()
+
+    print('%d requests per quiz to %s, %d rounds\n'
+            % (args.requests, args.url, args.rounds))
+
+    for name, get in (('unpooled', unpooled_get), ('pooled', pooled_get)):
+        # Warm up DNS (and, for the pooled client, the first connection)
+        get(args.url)
+
+        times = [time_requests(get, args.url, args.requests)
+                for i in range(args.rounds)]
+        per_quiz = statistics.median(times)
+        print('%-9s per quiz: %8.1f ms   per request: %7.2f ms'
+                % (name, per_quiz*1000, per_quiz*1000/args.requests))
+
+    spotify.close_http_session()
+
+
+if __name__ == '__main__':
+    main()
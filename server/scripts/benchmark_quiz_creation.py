@@ -0,0 +1,117 @@
+"""Benchmarks saving a quiz with each model validation policy.
+
+Saves the same quiz (checkbox questions with 4 choices each, and slider
+questions) two ways: object by object, the way the question generators
+save a quiz that isn't a draft, and all at once from a draft with
+materialize_quiz(), the way create_quiz() does. Each way is run with
+full and with structural validation (see validation_policy() in
+spoton/models/utils.py). Prints how many queries each one makes, and
+how long it takes.
+
+Nothing is kept: every quiz is saved in a transaction that's rolled
+back. It does use the database in the settings, so run it against a
+development database.
+
+Run from the server/ folder, with the virtual environment activated:
+    python scripts/benchmark_quiz_creation.py [--questions 10] [--rounds 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+import django
+django.setup()
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from spoton.models.creators import (create_genre_choice, create_genre_choices,
+        create_object)
+from spoton.models.drafts import QuizDraft, materialize_quiz
+from spoton.models.quiz import CheckboxQuestion, Quiz, SliderQuestion
+from spoton.models.utils import (FULL_VALIDATION, STRUCTURAL_VALIDATION,
+        validation_policy)
+
+
+USER_ID = 'benchmark-quiz-creation'
+
+
+def add_questions(quiz, num_questions):
+    """Creates the quiz's questions, half checkbox and half slider."""
+
+    questions = []
+    for i in range(num_questions):
+        if i % 2 == 0:
+            q = create_object(CheckboxQuestion, quiz=quiz,
+                    text='Checkbox ' + str(i))
+            create_genre_choice(q, 'genre ' + str(i), answer=True)
+            create_genre_choices(q, ['a', 'b', 'c'])
+        else:
+            q = create_object(SliderQuestion, quiz=quiz,
+                    text='Slider ' + str(i), slider_min=0, slider_max=10,
+                    answer=5)
+        questions.append(q)
+    return questions
+
+
+def save_by_object(num_questions):
+    quiz = Quiz.objects.create(user_id=USER_ID)
+    add_questions(quiz, num_questions)
+
+
+def save_draft(num_questions):
+    draft = QuizDraft(user_id=USER_ID)
+    draft.questions = add_questions(draft, num_questions)
+    materialize_quiz(draft)
+
+
+def time_save(save, policy, num_questions):
+    """Saves a quiz, and throws it away.
+
+    Returns how many queries saving it made, and how long it took, in
+    seconds.
+    """
+
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            with validation_policy(policy):
+                save(num_questions)
+            elapsed = time.perf_counter() - start
+        transaction.set_rollback(True)
+
+    return len(queries), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=10,
+            help='questions per quiz (default: %(default)s)')
+    parser.add_argument('--rounds', type=int, default=5,
+            help='quizzes to time for each way (default: %(default)s)')
+    args = parser.parse_args()
+
+    print('%d questions per quiz, %d rounds, on %s\n'
+            % (args.questions, args.rounds, connection.vendor))
+
+    for name, save in (('by object', save_by_object), ('draft', save_draft)):
+        for policy in (FULL_VALIDATION, STRUCTURAL_VALIDATION):
+            # Warm up the connection
+            time_save(save, policy, args.questions)
+
+            results = [time_save(save, policy, args.questions)
+                    for i in range(args.rounds)]
+            num_queries = results[0][0]
+            per_quiz = statistics.median(t for n, t in results)
+            print('%-9s %-10s queries: %4d   per quiz: %8.1f ms'
+                    % (name, policy, num_queries, per_quiz*1000))
+
+
+if __name__ == '__main__':
+    main()
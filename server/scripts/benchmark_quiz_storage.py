@@ -0,0 +1,149 @@
+"""Benchmarks writing, reading and deleting a quiz and its responses.
+
+Times the three things the server does with a stored quiz:
+
+write
+    Saves a quiz from a draft with materialize_quiz(), the way
+    create_quiz() does, and saves responses to it with save_response().
+read
+    Loads the quiz, builds its JSON from its questions and choices
+    (without the stored payload), and loads every answer in its
+    responses, with the choices of the checkbox answers.
+delete
+    Deletes the quiz, with its questions, choices and responses.
+
+Prints how many queries each one makes, and how long it takes, for a
+quiz of --questions questions (half checkbox, with 4 choices each, and
+half slider) with --responses responses. Run it before and after a
+change to the quiz models' schema to compare them.
+
+Nothing is kept: every quiz is saved in a transaction that's rolled
+back. It does use the database in the settings, so run it against a
+development database.
+
+Run from the server/ folder, with the virtual environment activated:
+    python scripts/benchmark_quiz_storage.py [--questions 10]
+            [--responses 20] [--rounds 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+import django
+django.setup()
+
+from django.db import connection, transaction
+from django.db.models import prefetch_related_objects
+from django.test.utils import CaptureQueriesContext
+
+from spoton.models.creators import (create_genre_choice, create_genre_choices,
+        create_object)
+from spoton.models.drafts import QuizDraft, materialize_quiz
+from spoton.models.quiz import CheckboxQuestion, Quiz, SliderQuestion
+from spoton.models.response import CheckboxResponse, QuestionResponse
+from spoton.quiz import save_response
+
+
+USER_ID = 'benchmark-quiz-storage'
+
+
+def write(num_questions, num_responses):
+    draft = QuizDraft(user_id=USER_ID)
+    for i in range(num_questions):
+        if i % 2 == 0:
+            q = create_object(CheckboxQuestion, quiz=draft,
+                    text='Checkbox ' + str(i))
+            create_genre_choice(q, 'genre ' + str(i), answer=True)
+            create_genre_choices(q, ['a', 'b', 'c'])
+        else:
+            q = create_object(SliderQuestion, quiz=draft,
+                    text='Slider ' + str(i), slider_min=0, slider_max=10,
+                    answer=5)
+        draft.questions.append(q)
+    quiz = materialize_quiz(draft)
+
+    questions = []
+    for q in quiz.json()['questions']:
+        if q['type'] == 'slider':
+            answer = 3
+        else:
+            answer = [q['choices'][0]['id']]
+        questions.append({'question_id': q['id'], 'answer': answer})
+
+    for i in range(num_responses):
+        assert save_response({'quiz_id': USER_ID, 'name': 'Response ' + str(i),
+                'emoji': '😀', 'background_color': '333333',
+                'questions': questions})
+
+
+def read():
+    quiz = Quiz.objects.get(user_id=USER_ID)
+    quiz.json()
+
+    answers = list(QuestionResponse.objects.filter(response__quiz=quiz))
+    prefetch_related_objects(
+            [a for a in answers if isinstance(a, CheckboxResponse)],
+            'choices')
+
+
+def delete():
+    Quiz.objects.filter(user_id=USER_ID).delete()
+
+
+def time_round(num_questions, num_responses):
+    """Writes, reads and deletes a quiz, in a transaction that's rolled
+    back.
+
+    Returns how many queries each one made, and how long it took, in
+    seconds.
+    """
+
+    results = {}
+    with transaction.atomic():
+        for name, run in (('write', lambda: write(num_questions,
+                num_responses)), ('read', read), ('delete', delete)):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+            results[name] = (len(queries), elapsed)
+        transaction.set_rollback(True)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=10,
+            help='questions per quiz (default: %(default)s)')
+    parser.add_argument('--responses', type=int, default=20,
+            help='responses per quiz (default: %(default)s)')
+    parser.add_argument('--rounds', type=int, default=5,
+            help='quizzes to time (default: %(default)s)')
+    args = parser.parse_args()
+
+    print('%d questions and %d responses per quiz, %d rounds, on %s\n'
+            % (args.questions, args.responses, args.rounds,
+            connection.vendor))
+
+    # Warm up the connection
+    time_round(args.questions, args.responses)
+
+    rounds = [time_round(args.questions, args.responses)
+            for i in range(args.rounds)]
+
+    for name in ('write', 'read', 'delete'):
+        num_queries = rounds[0][name][0]
+        elapsed = statistics.median(r[name][1] for r in rounds)
+        print('%-7s queries: %5d   per quiz: %8.1f ms'
+                % (name, num_queries, elapsed*1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -43,7 +43,6 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'spoton.apps.SpotOnConfig',
-    'polymorphic',
 ]
 
 MIDDLEWARE = [
@@ -196,3 +195,99 @@ LOGGING = {
         },
     },
 }
+
+
+# Spotify API HTTP client
+# Every request to the Spotify API goes through one pooled, keep-alive
+# HTTP session per process (see spoton/spotify.py). Connection pools
+# are kept per host; a host's pool holds at most POOL_MAXSIZE
+# connections (or its entry in HOST_POOL_MAXSIZE), and with POOL_BLOCK
+# on, requests wait for a free connection instead of going over it.
+SPOTIFY_HTTP_POOL_CONNECTIONS = 4
+SPOTIFY_HTTP_POOL_MAXSIZE = 10
+SPOTIFY_HTTP_HOST_POOL_MAXSIZE = {
+    'accounts.spotify.com': 2,
+}
+SPOTIFY_HTTP_POOL_BLOCK = True
+
+# Timeouts (in seconds) for connecting to Spotify and for waiting on
+# its response
+SPOTIFY_HTTP_CONNECT_TIMEOUT = 3.05
+SPOTIFY_HTTP_READ_TIMEOUT = 15
+
+# Spotify API rate limit
+# Every request to Spotify waits in line for a token bucket that holds
+# BURST requests and refills at RATE requests per second. A request
+# Spotify answers with a 429 is retried up to MAX_RETRIES times, after
+# waiting as long as its Retry-After header says, and a request that
+# waits longer than MAX_WAIT seconds in total fails. Set CACHE to the
+# name of a cache in CACHES to share the budget between processes.
+SPOTIFY_RATE_LIMIT_RATE = 25
+SPOTIFY_RATE_LIMIT_BURST = 50
+SPOTIFY_RATE_LIMIT_MAX_RETRIES = 3
+SPOTIFY_RATE_LIMIT_MAX_WAIT = 30
+SPOTIFY_RATE_LIMIT_CACHE = None
+
+# How many seconds before a Spotify access token expires to request a
+# new one (at most half of the token's lifetime)
+SPOTIFY_TOKEN_REFRESH_SKEW = 60
+
+# The cache (in CACHES) that the app's Non-Authorized Access Token is
+# shared through. Every server process shares one token if this is a
+# cache they all use. Only one caller requests a new token at a time;
+# the others wait at most LEASE_TIMEOUT seconds for it.
+SPOTIFY_TOKEN_CACHE = 'default'
+SPOTIFY_TOKEN_LEASE_TIMEOUT = 10
+
+# Authorized GET responses with an ETag are cached, by user and URL, so
+# they can be requested again with If-None-Match and reused on a 304.
+# At most MAX_BYTES of response bodies are kept (0 turns the cache off),
+# each for at most TTL seconds.
+SPOTIFY_RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+SPOTIFY_RESPONSE_CACHE_TTL = 3600
+
+# Public catalog objects (tracks, albums, artists and audio features)
+# are cached by Spotify ID for every user, in this process (at most
+# MAX_ENTRIES objects) and in the cache (in CACHES) named by
+# SPOTIFY_CATALOG_CACHE, or None to only cache them in this process.
+SPOTIFY_CATALOG_CACHE = 'default'
+SPOTIFY_CATALOG_CACHE_MAX_ENTRIES = 50000
+SPOTIFY_CATALOG_CACHE_TTL = 86400
+
+# The most pages of one paged Spotify endpoint (like a user's saved
+# tracks) that are requested at once
+SPOTIFY_PAGED_REQUEST_WORKERS = 4
+
+# The most Spotify requests UserData.prefetch() makes at once when
+# building a quiz. Should stay under SPOTIFY_HTTP_POOL_MAXSIZE.
+USER_DATA_PREFETCH_WORKERS = 8
+
+# Quizzes are generated in the background by a pool of QUIZ_JOB_WORKERS
+# threads per process. At most QUIZ_JOB_MAX_PENDING more jobs wait for
+# a worker; past that, new jobs are turned away, and the client is told
+# to retry after QUIZ_JOB_RETRY_AFTER seconds. Jobs still unfinished
+# after QUIZ_JOB_TIMEOUT seconds are assumed to be lost. A job is
+# started at login, and the dashboard uses it if it's at most
+# QUIZ_JOB_WARM_MAX_AGE seconds old.
+QUIZ_JOB_WORKERS = 4
+QUIZ_JOB_MAX_PENDING = 16
+QUIZ_JOB_RETRY_AFTER = 5
+QUIZ_JOB_TIMEOUT = 300
+QUIZ_JOB_WARM_MAX_AGE = 600
+
+# Quiz pages are sent with an ETag made from the quiz's content and
+# QUIZ_PAGE_VERSION (increase it whenever index.html changes), and can
+# be kept by shared caches for QUIZ_PAGE_MAX_AGE seconds. Rendered pages
+# are kept in the cache (in CACHES) named by QUIZ_PAGE_CACHE for
+# QUIZ_PAGE_CACHE_TTL seconds, or until the quiz is deleted.
+QUIZ_PAGE_VERSION = 1
+QUIZ_PAGE_MAX_AGE = 300
+QUIZ_PAGE_CACHE = 'default'
+QUIZ_PAGE_CACHE_TTL = 86400
+
+# How models are validated when they're saved, unless the code saving
+# them picks a policy: 'full' (every check, including the ones that
+# query the database) or 'structural' (only the checks that don't). The
+# quiz generator always saves quizzes with 'structural', and responses
+# from the client are always saved with 'full'.
+MODEL_VALIDATION_POLICY = 'full'
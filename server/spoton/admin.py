@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import *
 from django.utils.html import format_html
 
+from spoton.models.jobs import *
 from spoton.models.quiz import *
 from spoton.models.response import *
 
@@ -15,6 +16,13 @@ class QuizAdmin(admin.ModelAdmin):
 
 
 
+@admin.register(QuizJob)
+class QuizJobAdmin(admin.ModelAdmin):
+    list_display = ('user_id', 'state', 'created_at', 'finished_at')
+    list_filter = ('state',)
+
+
+
 # Register the database models so they show up on the admin dashboard
 admin.site.register(Question)
 admin.site.register(CheckboxQuestion)
@@ -0,0 +1,275 @@
+"""A cache of Spotify catalog objects, shared by every user.
+
+Tracks, albums, artists and the audio features of tracks are public
+data, the same no matter which user asks for them. This module keeps
+them in a cache keyed by Spotify ID, so that once any user needed one,
+no other user has to request it again.
+
+The cache has two tiers: an in-process LRUCache (see spoton.lrucache)
+in front of a Django cache, which every server process can share. A
+lookup checks the in-process tier first, then the Django cache, and
+only requests the objects neither has from Spotify.
+
+Important Functions
+-------------------
+get_catalog_objects(session, kind, ids)
+    Returns the catalog objects of one kind with the given IDs, only
+    requesting the ones that aren't cached.
+get_catalog_cache()
+    Returns the process-wide CatalogCache. Its stats() describe how
+    often lookups were answered from the cache.
+"""
+
+import copy
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+from spoton import spotify
+from spoton.lrucache import LRUCache
+from spoton.quiz.utils import split_into_subsections
+
+
+"""
+The kinds of objects in the catalog, each mapped to the Spotify
+endpoint that returns several of them by ID, and the most IDs that
+endpoint takes at once. Each endpoint returns its objects in a list
+under the kind's name.
+"""
+CATALOG_ENDPOINTS = {
+    'tracks': ('/v1/tracks', 50),
+    'albums': ('/v1/albums', 20),
+    'artists': ('/v1/artists', 50),
+    'audio_features': ('/v1/audio-features', 100),
+}
+
+
+
+"""A global variable
+
+The catalog cache shared by every request in this process. It is
+created the first time it's needed, see get_catalog_cache().
+"""
+catalog_cache = None
+_catalog_cache_lock = threading.Lock()
+
+
+
+
+class CatalogCache:
+    """A two-tier cache of Spotify catalog objects, keyed by ID.
+
+    Objects are kept in an in-process LRUCache, and, if there is one,
+    in a Django cache that other processes can share. Both tiers evict
+    objects after `ttl` seconds. Objects are copied on the way in and
+    out, so callers can change what they get without changing what's
+    cached.
+
+    Attributes
+    ----------
+    local : spoton.lrucache.LRUCache
+        The in-process tier.
+    shared
+        The Django cache tier, or None to only cache in this process.
+    ttl : float
+        How many seconds objects are cached for.
+    """
+
+    def __init__(self, max_entries, ttl, cache_alias=None,
+            key_prefix='spotify_catalog'):
+        """Creates an empty catalog cache.
+
+        Parameters
+        ----------
+        max_entries : int
+            The most objects the in-process tier keeps.
+        ttl : float
+            How many seconds objects are cached for.
+        cache_alias : str, optional
+            The name of the Django cache (in the CACHES setting) to use
+            as the shared tier. (default is None: no shared tier)
+        key_prefix : str, optional
+            The prefix of the keys used in the Django cache. (default is
+            'spotify_catalog')
+        """
+
+        self.local = LRUCache(max_size=max_entries, ttl=ttl)
+        self.shared = caches[cache_alias] if cache_alias else None
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+
+        self._lock = threading.Lock()
+        self._shared_hits = 0
+
+
+    def get_many(self, kind, ids):
+        """Returns the cached objects of one kind with the given IDs.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of the objects, one of the keys of
+            CATALOG_ENDPOINTS.
+        ids : list
+            The Spotify IDs of the objects.
+
+        Returns
+        -------
+        dict
+            A copy of every cached object, by ID. IDs that aren't
+            cached are left out.
+        """
+
+        found = {key[1]: value for key, value in
+                self.local.get_many((kind, i) for i in ids).items()}
+
+        missing = [i for i in ids if i not in found]
+        if missing and self.shared is not None:
+            keys = {self._shared_key(kind, i): i for i in missing}
+            for key, value in self.shared.get_many(list(keys)).items():
+                found[keys[key]] = value
+                self.local.set((kind, keys[key]), value)
+                with self._lock:
+                    self._shared_hits += 1
+
+        return {i: copy.deepcopy(o) for i, o in found.items()}
+
+
+    def set_many(self, kind, objects):
+        """Caches objects of one kind.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of the objects, one of the keys of
+            CATALOG_ENDPOINTS.
+        objects : dict
+            The objects to cache, by ID.
+        """
+
+        objects = {i: copy.deepcopy(o) for i, o in objects.items()}
+
+        for i, o in objects.items():
+            self.local.set((kind, i), o)
+
+        if self.shared is not None and objects:
+            self.shared.set_many({self._shared_key(kind, i): o
+                    for i, o in objects.items()}, timeout=self.ttl)
+
+
+    def stats(self):
+        """Returns statistics about how the cache has been used.
+
+        Returns
+        -------
+        dict
+            The statistics of the in-process tier (see
+            LRUCache.stats() ), and:
+            shared_hits : how many objects missing in this process were
+                found in the shared tier
+        """
+
+        stats = self.local.stats()
+        with self._lock:
+            stats['shared_hits'] = self._shared_hits
+        return stats
+
+
+    def _shared_key(self, kind, id):
+        """Returns the Django cache key of an object."""
+        return self.key_prefix + ':' + kind + ':' + id
+
+
+
+
+def get_catalog_cache():
+    """Returns the process-wide cache of Spotify catalog objects.
+
+    Creates it the first time this is called. It's configured with
+    these Django settings:
+
+    SPOTIFY_CATALOG_CACHE_MAX_ENTRIES
+        The most objects kept in the in-process tier.
+    SPOTIFY_CATALOG_CACHE_TTL
+        How many seconds objects are cached for.
+    SPOTIFY_CATALOG_CACHE
+        The name of the Django cache used as the shared tier, or None
+        to only cache in this process.
+
+    Returns
+    -------
+    CatalogCache
+        The catalog cache.
+    """
+
+    global catalog_cache
+    if catalog_cache is None:
+        with _catalog_cache_lock:
+            if catalog_cache is None:
+                catalog_cache = CatalogCache(
+                    max_entries=getattr(settings,
+                        'SPOTIFY_CATALOG_CACHE_MAX_ENTRIES', 50000),
+                    ttl=getattr(settings, 'SPOTIFY_CATALOG_CACHE_TTL', 86400),
+                    cache_alias=getattr(settings, 'SPOTIFY_CATALOG_CACHE',
+                        'default'))
+    return catalog_cache
+
+
+
+def reset_catalog_cache():
+    """Throws away the in-process catalog cache, and its statistics.
+
+    The next lookup will create a new one, with whatever the settings
+    are at that point. The shared tier is left as it is.
+    """
+
+    global catalog_cache
+    with _catalog_cache_lock:
+        catalog_cache = None
+
+
+
+def get_catalog_objects(session, kind, ids):
+    """Returns catalog objects by ID, only requesting the uncached ones.
+
+    Looks the objects up in the catalog cache, and requests the rest
+    from Spotify, as many at a time as the endpoint allows, then caches
+    them for everyone.
+
+    Parameters
+    ----------
+    session : django.contrib.sessions.backend.db.SessionStore
+        The session of the user the objects are requested for
+        (retrieved from a Django request)
+    kind : str
+        The kind of the objects, one of the keys of CATALOG_ENDPOINTS.
+    ids : list
+        The Spotify IDs of the objects.
+
+    Returns
+    -------
+    list
+        The objects, in the same order as the IDs. Objects Spotify
+        doesn't have are left out.
+    """
+
+    url, limit = CATALOG_ENDPOINTS[kind]
+    cache = get_catalog_cache()
+
+    found = cache.get_many(kind, ids)
+
+    # Keep the order, and only request each missing ID once
+    missing = list(dict.fromkeys(i for i in ids if i not in found))
+
+    for section in split_into_subsections(missing, limit):
+        query_dict = {'ids': spotify.create_id_querystr(section)}
+        results = spotify.make_authorized_request(session, url,
+                query_dict=query_dict)
+
+        # Spotify answers with null for IDs it doesn't know
+        objects = {o['id']: o for o in results.json()[kind] if o}
+        cache.set_many(kind, objects)
+        found.update(objects)
+
+    return [found[i] for i in ids if i in found]
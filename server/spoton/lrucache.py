@@ -0,0 +1,198 @@
+"""A thread-safe, in-process least-recently-used cache.
+
+Holds LRUCache, a small cache for values that are expensive to get from
+Spotify, that bounds both how big it can get and how long it keeps each
+value, and keeps statistics on how often it's useful.
+"""
+
+from collections import OrderedDict
+import threading
+import time
+
+
+class LRUCache:
+    """A thread-safe cache that evicts the least recently used values.
+
+    Values expire `ttl` seconds after they're set. When the values add
+    up to more than `max_size`, the least recently used ones are evicted
+    until they fit. By default every value has a size of 1, so
+    `max_size` is the number of values, but a `size` function can be
+    given to measure them differently, like by their size in bytes.
+
+    Attributes
+    ----------
+    max_size : int
+        The most the sizes of the values can add up to.
+    ttl : float
+        How many seconds a value is kept for, or None to keep values
+        until they're evicted.
+    """
+
+    def __init__(self, max_size, ttl=None, size=None):
+        """Creates an empty cache.
+
+        Parameters
+        ----------
+        max_size : int
+            The most the sizes of the values can add up to.
+        ttl : float, optional
+            How many seconds a value is kept for. (default is None:
+            forever)
+        size : function, optional
+            Returns the size of a value. (default is None: every value
+            has a size of 1)
+        """
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self._size = size or (lambda value: 1)
+
+        self._lock = threading.Lock()
+        # key -> (value, size, expiry time)
+        self._entries = OrderedDict()
+        self._total_size = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+
+    def get(self, key, default=None):
+        """Returns the value for the key, or default if there isn't one.
+
+        Parameters
+        ----------
+        key
+            The key the value was set with.
+        default : optional
+            What to return if the key isn't in the cache, or its value
+            expired. (default is None)
+
+        Returns
+        -------
+        The value, or default.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None \
+                    and entry[2] <= time.monotonic():
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self._misses += 1
+                return default
+
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+
+    def get_many(self, keys):
+        """Returns the values for the keys that are in the cache.
+
+        Parameters
+        ----------
+        keys : iterable
+            The keys to look up.
+
+        Returns
+        -------
+        dict
+            The cached values, by key. Keys that aren't cached are left
+            out.
+        """
+
+        missing = object()
+        values = {}
+        for key in keys:
+            value = self.get(key, missing)
+            if value is not missing:
+                values[key] = value
+        return values
+
+
+    def set(self, key, value):
+        """Saves the value under the key, evicting values if needed.
+
+        A value that's bigger than max_size on its own isn't saved.
+
+        Parameters
+        ----------
+        key
+            The key to save the value under.
+        value
+            The value to save.
+        """
+
+        size = self._size(value)
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            if size > self.max_size:
+                return
+
+            self._entries[key] = (value, size, expires)
+            self._total_size += size
+
+            while self._total_size > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+
+    def delete(self, key):
+        """Removes the value under the key, if there is one."""
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+
+    def clear(self):
+        """Removes every value, but keeps the statistics."""
+
+        with self._lock:
+            self._entries.clear()
+            self._total_size = 0
+
+
+    def stats(self):
+        """Returns statistics about how the cache has been used.
+
+        Returns
+        -------
+        dict
+            hits : how many lookups found a value
+            misses : how many lookups didn't
+            hit_ratio : hits out of all lookups, or 0 if there were none
+            evictions : how many values were evicted to make room
+            entries : how many values are in the cache now
+            size : what their sizes add up to
+        """
+
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / lookups if lookups else 0,
+                'evictions': self._evictions,
+                'entries': len(self._entries),
+                'size': self._total_size,
+            }
+
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+    def _remove(self, key):
+        """Removes a key. Must be called with the lock held."""
+
+        value, size, expires = self._entries.pop(key)
+        self._total_size -= size
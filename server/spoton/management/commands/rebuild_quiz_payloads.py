@@ -0,0 +1,38 @@
+"""The rebuild_quiz_payloads management command.
+
+Run with: python manage.py rebuild_quiz_payloads [--all]
+"""
+
+from django.core.management.base import BaseCommand
+
+from spoton.models.quiz import PAYLOAD_VERSION, Quiz
+
+
+class Command(BaseCommand):
+    """Rebuilds the stored JSON payloads of quizzes.
+
+    Quizzes store their JSON when they're created (see
+    Quiz.save_payload() ). After the format of Quiz.json() changes, and
+    PAYLOAD_VERSION is increased, this rebuilds the payloads that are
+    out of date, so the quiz page doesn't have to as they're read.
+    """
+
+    help = "Rebuilds the stored JSON payloads of quizzes that are out of date."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                help="Rebuild every quiz's payload, even if it's up to date.")
+
+
+    def handle(self, *args, **options):
+        quizzes = Quiz.objects.all()
+        if not options['all']:
+            quizzes = quizzes.exclude(payload_version=PAYLOAD_VERSION)
+
+        count = 0
+        for quiz in quizzes.iterator():
+            quiz.save_payload()
+            count += 1
+
+        self.stdout.write("Rebuilt " + str(count) + " quiz payload" +
+                ("" if count == 1 else "s"))
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.5 on 2026-10-17 02:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spoton', '0009_quizjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizjob',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
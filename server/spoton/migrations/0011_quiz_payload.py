@@ -0,0 +1,34 @@
+# Generated by Django 3.1.5 on 2026-10-17 02:08
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spoton', '0010_quizjob_claimed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='payload',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='payload_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='payload_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='quiz',
+            name='uuid',
+            field=models.UUIDField(db_index=True, default=uuid.uuid4, editable=False),
+        ),
+    ]
@@ -0,0 +1,291 @@
+# Generated by Django 3.1.5 on 2026-10-17 02:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+KIND_CHOICES = [('checkbox', 'Checkbox'), ('slider', 'Slider')]
+
+
+def to_single_table(apps, schema_editor):
+    """Copies each question and response's subclass row into its own
+    row, and each checkbox response's choices to the new table.
+
+    The rows keep their IDs, so quizzes' JSON doesn't change.
+    """
+
+    db = schema_editor.connection.alias
+    Question = apps.get_model('spoton', 'Question')
+    CheckboxQuestion = apps.get_model('spoton', 'CheckboxQuestion')
+    SliderQuestion = apps.get_model('spoton', 'SliderQuestion')
+    QuestionResponse = apps.get_model('spoton', 'QuestionResponse')
+    CheckboxResponse = apps.get_model('spoton', 'CheckboxResponse')
+    SliderResponse = apps.get_model('spoton', 'SliderResponse')
+
+    for multiselect in (False, True):
+        Question.objects.using(db).filter(
+                id__in=CheckboxQuestion.objects.using(db)
+                .filter(old_multiselect=multiselect).values('question_ptr_id')
+        ).update(kind='checkbox', multiselect=multiselect)
+
+    sliders = [
+        Question(id=id, kind='slider', slider_min=slider_min,
+                slider_max=slider_max, answer=answer)
+        for id, slider_min, slider_max, answer in
+        SliderQuestion.objects.using(db).values_list('question_ptr_id',
+                'old_slider_min', 'old_slider_max', 'old_answer')
+    ]
+    Question.objects.using(db).bulk_update(sliders,
+            ['kind', 'slider_min', 'slider_max', 'answer'], batch_size=500)
+
+    QuestionResponse.objects.using(db).filter(
+            id__in=CheckboxResponse.objects.using(db)
+            .values('questionresponse_ptr_id')
+    ).update(kind='checkbox')
+
+    sliders = [
+        QuestionResponse(id=id, kind='slider', answer=answer)
+        for id, answer in SliderResponse.objects.using(db).values_list(
+                'questionresponse_ptr_id', 'old_answer')
+    ]
+    QuestionResponse.objects.using(db).bulk_update(sliders,
+            ['kind', 'answer'], batch_size=500)
+
+    old_through = CheckboxResponse.old_choices.through
+    through = QuestionResponse.choices.through
+    through.objects.using(db).bulk_create([
+        through(questionresponse_id=response_id, choice_id=choice_id)
+        for response_id, choice_id in old_through.objects.using(db)
+                .values_list('checkboxresponse_id', 'choice_id')
+    ], batch_size=500)
+
+
+def to_subclass_tables(apps, schema_editor):
+    """Undoes to_single_table(), recreating the subclass rows and the
+    polymorphic content types of the questions and responses."""
+
+    db = schema_editor.connection.alias
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Question = apps.get_model('spoton', 'Question')
+    CheckboxQuestion = apps.get_model('spoton', 'CheckboxQuestion')
+    SliderQuestion = apps.get_model('spoton', 'SliderQuestion')
+    QuestionResponse = apps.get_model('spoton', 'QuestionResponse')
+    CheckboxResponse = apps.get_model('spoton', 'CheckboxResponse')
+    SliderResponse = apps.get_model('spoton', 'SliderResponse')
+
+    def ctype(model):
+        return ContentType.objects.db_manager(db).get_or_create(
+                app_label='spoton', model=model)[0]
+
+    # Saved raw, so only the subclass's own table is written to
+    for q in Question.objects.using(db).filter(kind='checkbox'):
+        CheckboxQuestion(question_ptr_id=q.id,
+                old_multiselect=q.multiselect).save_base(using=db, raw=True)
+    for q in Question.objects.using(db).filter(kind='slider'):
+        SliderQuestion(question_ptr_id=q.id, old_slider_min=q.slider_min,
+                old_slider_max=q.slider_max, old_answer=q.answer).save_base(
+                using=db, raw=True)
+    for kind, model in (('', 'question'), ('checkbox', 'checkboxquestion'),
+            ('slider', 'sliderquestion')):
+        Question.objects.using(db).filter(kind=kind).update(
+                polymorphic_ctype=ctype(model))
+
+    for qr in QuestionResponse.objects.using(db).filter(kind='checkbox'):
+        CheckboxResponse(questionresponse_ptr_id=qr.id).save_base(using=db,
+                raw=True)
+    for qr in QuestionResponse.objects.using(db).filter(kind='slider'):
+        SliderResponse(questionresponse_ptr_id=qr.id,
+                old_answer=qr.answer).save_base(using=db, raw=True)
+    for kind, model in (('', 'questionresponse'),
+            ('checkbox', 'checkboxresponse'), ('slider', 'sliderresponse')):
+        QuestionResponse.objects.using(db).filter(kind=kind).update(
+                polymorphic_ctype=ctype(model))
+
+    old_through = CheckboxResponse.old_choices.through
+    through = QuestionResponse.choices.through
+    old_through.objects.using(db).bulk_create([
+        old_through(checkboxresponse_id=response_id, choice_id=choice_id)
+        for response_id, choice_id in through.objects.using(db)
+                .values_list('questionresponse_id', 'choice_id')
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('spoton', '0011_quiz_payload'),
+    ]
+
+    operations = [
+        # The subclasses' fields are renamed out of the way of the
+        # fields that replace them
+        migrations.RenameField(
+            model_name='checkboxquestion',
+            old_name='multiselect',
+            new_name='old_multiselect',
+        ),
+        migrations.RenameField(
+            model_name='sliderquestion',
+            old_name='slider_min',
+            new_name='old_slider_min',
+        ),
+        migrations.RenameField(
+            model_name='sliderquestion',
+            old_name='slider_max',
+            new_name='old_slider_max',
+        ),
+        migrations.RenameField(
+            model_name='sliderquestion',
+            old_name='answer',
+            new_name='old_answer',
+        ),
+        migrations.RenameField(
+            model_name='checkboxresponse',
+            old_name='choices',
+            new_name='old_choices',
+        ),
+        migrations.RenameField(
+            model_name='sliderresponse',
+            old_name='answer',
+            new_name='old_answer',
+        ),
+
+        # The fields of every kind of question and response, in the
+        # Question and QuestionResponse tables
+        migrations.AddField(
+            model_name='question',
+            name='kind',
+            field=models.CharField(blank=True, choices=KIND_CHOICES, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='multiselect',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='slider_min',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='slider_max',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='answer',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='questionresponse',
+            name='kind',
+            field=models.CharField(blank=True, choices=KIND_CHOICES, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='questionresponse',
+            name='answer',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        # Without a reverse relation until the old field is gone, since
+        # they'd have the same name
+        migrations.AddField(
+            model_name='questionresponse',
+            name='choices',
+            field=models.ManyToManyField(related_name='+', to='spoton.Choice'),
+        ),
+        # Choices point at the Question table until CheckboxQuestion is
+        # a proxy of it. The IDs are the same.
+        migrations.AlterField(
+            model_name='choice',
+            name='question',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='choices', to='spoton.question'),
+        ),
+
+        migrations.RunPython(to_single_table, to_subclass_tables),
+
+        migrations.DeleteModel(
+            name='CheckboxQuestion',
+        ),
+        migrations.DeleteModel(
+            name='SliderQuestion',
+        ),
+        migrations.DeleteModel(
+            name='CheckboxResponse',
+        ),
+        migrations.DeleteModel(
+            name='SliderResponse',
+        ),
+        migrations.RemoveField(
+            model_name='question',
+            name='polymorphic_ctype',
+        ),
+        migrations.RemoveField(
+            model_name='questionresponse',
+            name='polymorphic_ctype',
+        ),
+        migrations.AlterModelOptions(
+            name='question',
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name='questionresponse',
+            options={},
+        ),
+        migrations.AlterField(
+            model_name='questionresponse',
+            name='choices',
+            field=models.ManyToManyField(related_name='choice_responses', to='spoton.Choice'),
+        ),
+
+        migrations.CreateModel(
+            name='CheckboxQuestion',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('spoton.question',),
+        ),
+        migrations.CreateModel(
+            name='SliderQuestion',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('spoton.question',),
+        ),
+        migrations.CreateModel(
+            name='CheckboxResponse',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('spoton.questionresponse',),
+        ),
+        migrations.CreateModel(
+            name='SliderResponse',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('spoton.questionresponse',),
+        ),
+        migrations.AlterField(
+            model_name='choice',
+            name='question',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='choices', to='spoton.checkboxquestion'),
+        ),
+    ]
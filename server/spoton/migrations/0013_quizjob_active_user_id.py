@@ -0,0 +1,38 @@
+# Generated by Django 3.1.5 on 2026-10-17 02:34
+
+from django.db import migrations, models
+
+
+def set_active_user_ids(apps, schema_editor):
+    """Sets active_user_id on each user's newest queued or running job.
+
+    Any older active jobs are left without one, and time out like
+    before.
+    """
+
+    QuizJob = apps.get_model('spoton', 'QuizJob')
+    db = schema_editor.connection.alias
+
+    seen = set()
+    for job in QuizJob.objects.using(db).filter(
+            state__in=['queued', 'running']).order_by('-created_at'):
+        if job.user_id not in seen:
+            seen.add(job.user_id)
+            QuizJob.objects.using(db).filter(id=job.id).update(
+                    active_user_id=job.user_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spoton', '0012_single_table_questions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizjob',
+            name='active_user_id',
+            field=models.CharField(editable=False, max_length=50, null=True, unique=True),
+        ),
+        migrations.RunPython(set_active_user_ids, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,48 @@
-"""Creators functions used to create Spotify quiz models."""
+"""Creators functions used to create Spotify quiz models.
 
+Normally, the functions here save each object they create to the
+database right away. But when they're given a draft quiz or question
+(see drafts.py), they only create drafts, which aren't saved until the
+whole quiz is finished.
+"""
 
+
+from .drafts import ChoiceDraft, QuestionDraft, QuizDraft
 from .quiz import Choice
 
 
 
+def create_object(model, **kwargs):
+    """Creates a model object, or a draft of one.
+
+    Works like model.objects.create(**kwargs). But if the object would
+    belong to a draft (its 'quiz' is a QuizDraft, or its 'question' is
+    a QuestionDraft), it creates a draft of the object instead, without
+    touching the database.
+
+    Parameters
+    ----------
+    model : class
+        The model class of the object to create.
+    **kwargs
+        The object's fields.
+
+    Returns
+    -------
+    django.db.models.Model or drafts.QuestionDraft or drafts.ChoiceDraft
+        The created object, or draft.
+    """
+
+    if isinstance(kwargs.get('quiz'), QuizDraft):
+        return QuestionDraft(model, **kwargs)
+
+    if isinstance(kwargs.get('question'), QuestionDraft):
+        return ChoiceDraft(**kwargs)
+
+    return model.objects.create(**kwargs)
+
+
+
 def create_album_choices(question, albums, answer=False):
     """Creates choice objects from a list of JSON-formatted albums.
 
@@ -53,7 +91,7 @@ def create_album_choice(question, album, answer=False):
         The newly created quiz.Choice object.
     """
 
-    return Choice.objects.create(
+    return create_object(Choice,
         question = question,
         primary_text = album['name'],
         secondary_text = album['artists'][0]['name'],
@@ -110,7 +148,7 @@ def create_artist_choice(question, artist, answer=False):
         The newly created quiz.Choice object.
     """
 
-    return Choice.objects.create(
+    return create_object(Choice,
         question = question,
         primary_text = artist['name'],
         image_url = get_largest_image(artist),
@@ -166,7 +204,7 @@ def create_track_choice(question, track, answer=False):
         The newly created quiz.Choice object.
     """
 
-    return Choice.objects.create(
+    return create_object(Choice,
         question = question,
         primary_text = track['name'],
         secondary_text = track['artists'][0]['name'],
@@ -221,7 +259,7 @@ def create_genre_choice(question, genre, answer=False):
         The newly created quiz.Choice object.
     """
 
-    return Choice.objects.create(
+    return create_object(Choice,
             question = question,
             primary_text = genre,
             answer = answer
@@ -276,7 +314,7 @@ def create_playlist_choice(question, playlist, answer=False):
         The newly created quiz.Choice object.
     """
 
-    return Choice.objects.create(
+    return create_object(Choice,
             question = question,
             primary_text = playlist['name'],
             image_url = get_largest_image(playlist),
@@ -0,0 +1,183 @@
+"""Lightweight, in-memory drafts of a quiz and its questions.
+
+While a quiz is being generated, its questions are only drafts: small
+objects that hold what each question and choice will be, without any
+of the overhead of Django models, and without touching the database.
+A question that turns out not to work is just thrown away, and a whole
+quiz can be generated without saving it at all. Once the quiz is
+finished, materialize_quiz() turns the draft into model objects, and
+saves them all at once.
+
+The question generators in spoton.quiz create drafts when they're given
+a QuizDraft instead of a Quiz (see creators.create_object() ).
+"""
+
+import uuid
+
+from django.db import transaction
+
+from .quiz import Choice, Question, Quiz
+
+
+class QuizDraft:
+    """A quiz that's being generated, and isn't saved yet.
+
+    Attributes
+    ----------
+    user_id : str
+        The Spotify username of the user the quiz is about.
+    uuid : uuid.UUID
+        The quiz's unique ID.
+    questions : list
+        The QuestionDrafts that made it into the quiz.
+    """
+
+    __slots__ = ('user_id', 'uuid', 'questions')
+
+    def __init__(self, user_id, uuid=None, questions=None):
+        self.user_id = user_id
+        self.uuid = uuid
+        self.questions = questions if questions is not None else []
+
+
+    def __repr__(self):
+        return "<QuizDraft: " + str(self.user_id) + ", " + \
+                str(len(self.questions)) + " questions>"
+
+
+
+class QuestionDraft:
+    """A question of a QuizDraft.
+
+    Attributes
+    ----------
+    model : class
+        The model the question will be, a subclass of
+        spoton.models.quiz.Question, like CheckboxQuestion.
+    quiz : QuizDraft
+        The quiz the question is for.
+    fields : dict
+        The values of the question model's fields, by name.
+    choices : list
+        The question's ChoiceDrafts, if it's a checkbox question.
+    """
+
+    __slots__ = ('model', 'quiz', 'fields', 'choices')
+
+    def __init__(self, model, quiz, **fields):
+        self.model = model
+        self.quiz = quiz
+        self.fields = fields
+        self.choices = []
+
+
+    def __repr__(self):
+        return "<QuestionDraft: " + self.model.__name__ + ", " + \
+                str(self.fields.get('text')) + ">"
+
+
+
+class ChoiceDraft:
+    """A choice of a checkbox QuestionDraft.
+
+    Creating a ChoiceDraft adds it to its question's choices.
+
+    Attributes
+    ----------
+    question : QuestionDraft
+        The question the choice is for.
+    fields : dict
+        The values of the Choice model's fields, by name.
+    """
+
+    __slots__ = ('question', 'fields')
+
+    def __init__(self, question, **fields):
+        self.question = question
+        self.fields = fields
+        question.choices.append(self)
+
+
+    def __repr__(self):
+        return "<ChoiceDraft: " + str(self.fields.get('primary_text')) + ">"
+
+
+
+
+def materialize_quiz(draft):
+    """Validates and saves a finished quiz draft as model objects.
+
+    Turns the draft into a Quiz, its questions, and their choices, and
+    validates all of them, without the database queries that validating
+    their relationships would take, since those are saved along with
+    them. Then saves them all in one transaction, with all of the
+    questions inserted at once, then all of the choices, and the quiz's
+    JSON payload (see Quiz.save_payload() ). If anything fails, nothing
+    is saved.
+
+    bulk_create() can't return the new questions' IDs on MySQL or
+    SQLite, so they're read back, in the order they were inserted.
+
+    The objects are validated as the current validation policy says
+    (see spoton.models.utils.validation_policy() ). With
+    STRUCTURAL_VALIDATION, that the user doesn't have a quiz already
+    isn't checked until the quiz is inserted.
+
+    Parameters
+    ----------
+    draft : QuizDraft
+        The finished quiz.
+
+    Returns
+    -------
+    spoton.models.quiz.Quiz
+        The saved quiz.
+
+    Raises
+    ------
+    django.core.exceptions.ValidationError
+        If any part of the quiz is invalid.
+    django.db.IntegrityError
+        If the user already has a quiz, and it wasn't checked for with
+        STRUCTURAL_VALIDATION.
+    """
+
+    quiz = Quiz(user_id=draft.user_id, uuid=draft.uuid or uuid.uuid4())
+
+    questions = []
+    choices = []
+    for q in draft.questions:
+        question = q.model(quiz=quiz, **q.fields)
+        questions.append(question)
+        choices.extend(Choice(question=question, **c.fields)
+                for c in q.choices)
+
+    # Validate everything before saving anything
+    quiz.clean_on_save()
+    for q in questions:
+        q.clean_on_save(exclude=['quiz'])
+    for c in choices:
+        c.clean_on_save(exclude=['question'])
+
+    with transaction.atomic():
+        Quiz.objects.bulk_create([quiz])
+
+        Question.objects.bulk_create(questions)
+
+        # Only some databases return the new IDs. The quiz is new, so
+        # its questions are the ones just inserted, in the same order.
+        if questions and questions[0].pk is None:
+            ids = Question.objects.filter(quiz=quiz).order_by('id') \
+                    .values_list('id', flat=True)
+            for q, id in zip(questions, ids):
+                q.id = id
+                q._state.adding = False
+
+        # The questions only have IDs now that they're saved
+        for c in choices:
+            c.question_id = c.question.pk
+        Choice.objects.bulk_create(choices)
+
+        quiz.save_payload(questions)
+
+    return quiz
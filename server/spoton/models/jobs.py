@@ -0,0 +1,166 @@
+"""Holds the model that tracks a quiz being generated in the background."""
+
+import uuid
+
+from django.db import models
+from django.utils import timezone
+
+
+class QuizJob(models.Model):
+    """Records the progress of generating a user's quiz.
+
+    A job is created when a user logs in or asks for a new quiz, and is
+    run by a worker in the background (see spoton.quiz.jobs). The job
+    records its state, when it was created, started and finished, and
+    the error if it failed, so the client can poll it to know when the
+    quiz is ready.
+
+    Attributes
+    ----------
+    id : UUIDField
+        A unique ID for this job, which the client polls with
+    user_id : CharField
+        The Spotify username of the user the quiz is about
+    state : CharField
+        Where the job is at, one of QUEUED, RUNNING, SUCCEEDED or
+        FAILED
+    quiz_uuid : UUIDField
+        The UUID of the generated quiz, once the job has succeeded
+    error : TextField
+        What went wrong, if the job failed
+    created_at : DateTimeField
+        When the job was created and queued
+    started_at : DateTimeField
+        When a worker started running the job
+    finished_at : DateTimeField
+        When the job succeeded or failed
+    claimed_at : DateTimeField
+        When the user's dashboard first asked for the job's quiz. Jobs
+        started at login aren't claimed until then.
+    active_user_id : CharField
+        The user_id while the job is queued or running, and None once
+        it has finished. It's unique, so the database never lets a user
+        have two active jobs, even if two requests start one at once.
+        Kept in step with the state by save().
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    STATE_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    """The states of a job that hasn't finished yet."""
+    ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4,
+            editable=False)
+    user_id = models.CharField(max_length=50, db_index=True)
+    state = models.CharField(max_length=10, choices=STATE_CHOICES,
+            default=QUEUED)
+    quiz_uuid = models.UUIDField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    active_user_id = models.CharField(max_length=50, null=True, unique=True,
+            editable=False)
+
+
+    def save(self, *args, **kwargs):
+        """Saves the job, with active_user_id set from its state."""
+
+        if self.state in QuizJob.ACTIVE_STATES:
+            self.active_user_id = self.user_id
+        else:
+            self.active_user_id = None
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'state' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'active_user_id'}
+
+        super().save(*args, **kwargs)
+
+
+    def mark_running(self):
+        """Records that a worker has started running the job."""
+
+        self.state = QuizJob.RUNNING
+        self.started_at = timezone.now()
+        self.save(update_fields=['state', 'started_at'])
+
+
+    def mark_succeeded(self, quiz_uuid):
+        """Records that the job generated a quiz.
+
+        Parameters
+        ----------
+        quiz_uuid : uuid.UUID
+            The UUID of the generated quiz.
+        """
+
+        self.state = QuizJob.SUCCEEDED
+        self.quiz_uuid = quiz_uuid
+        self.finished_at = timezone.now()
+        self.save(update_fields=['state', 'quiz_uuid', 'finished_at'])
+
+
+    def mark_failed(self, error):
+        """Records that the job failed.
+
+        Parameters
+        ----------
+        error : str
+            What went wrong.
+        """
+
+        self.state = QuizJob.FAILED
+        self.error = error
+        self.finished_at = timezone.now()
+        self.save(update_fields=['state', 'error', 'finished_at'])
+
+
+    def json(self):
+        """Returns the job's status in JSON format, for the client.
+
+        Returns
+        -------
+        dict
+            A JSON dict of the job's ID, state, and timing in seconds:
+            how long it waited in line and how long it ran for, so far
+            if it hasn't finished. Includes the quiz's UUID once it
+            succeeded, and the error if it failed.
+        """
+
+        now = timezone.now()
+        started = self.started_at or now
+        finished = self.finished_at or now
+
+        data = {
+            'id': str(self.id),
+            'state': self.state,
+            'queued_seconds': (started - self.created_at).total_seconds(),
+            'running_seconds': (finished - started).total_seconds()
+                    if self.started_at else 0,
+        }
+
+        if self.state == QuizJob.SUCCEEDED:
+            data['quiz_uuid'] = str(self.quiz_uuid)
+        elif self.state == QuizJob.FAILED:
+            data['error'] = self.error
+
+        return data
+
+
+    def __str__(self):
+        return "Quiz job for " + self.user_id + ": " + self.state
@@ -1,18 +1,33 @@
 """Holds models for a quiz about a Spotify user's music taste."""
 
+import hashlib
+import json
 import uuid
 
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import prefetch_related_objects
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.utils.html import format_html_join, format_html
-from polymorphic.managers import PolymorphicManager
-from polymorphic.models import PolymorphicModel
-from polymorphic.query import PolymorphicQuerySet
 
-from .utils import CleanOnSaveMixin, PolyOwnerQuerySet, PolyOwnerPolymorphicQuerySet
+from spoton import pagecache
+
+from .utils import CleanOnSaveMixin, KindManager, SingleTableMixin
 from .response import *
 
 
+"""
+The version of the format of Quiz.json(). Quizzes store their JSON when
+they're created (see Quiz.save_payload() ), so whenever the format
+changes, this should be increased. Stored payloads of older versions
+are then rebuilt when they're read, or all at once with the
+rebuild_quiz_payloads management command.
+"""
+PAYLOAD_VERSION = 1
+
+
+
 class Quiz(CleanOnSaveMixin, models.Model):
     """Stores questions and responses for quiz on a user's music taste
 
@@ -25,12 +40,18 @@ class Quiz(CleanOnSaveMixin, models.Model):
 
     Attributes
     ----------
-    objects
-        The QuerySet this model uses, a custom class from utils.py
     uuid : UUIDField
         A unique ID for this quiz
     user_id : CharField
         The associated user's Spotify username
+    payload : TextField
+        The quiz's JSON (see json() ), serialized when it was created,
+        so the quiz page doesn't have to build it from the questions
+    payload_hash : CharField
+        The SHA-256 hash of the payload, in hex
+    payload_version : PositiveIntegerField
+        The PAYLOAD_VERSION the payload was built with, or 0 if it
+        hasn't been built
     questions
         A set of the questions in this quiz, (Question model objects)
     responses
@@ -38,32 +59,53 @@ class Quiz(CleanOnSaveMixin, models.Model):
         model objects)
     """
 
-    # Overrides the QuerySet so that delete() below is called when
-    # a set of Quizzes is deleted.
-    objects = PolyOwnerQuerySet.as_manager()
-
     # TODO Why do need a second identifier? Is user_id not enough?
-    uuid = models.UUIDField(default=uuid.uuid4, editable=False, blank=False)
+    uuid = models.UUIDField(default=uuid.uuid4, editable=False, blank=False,
+            db_index=True)
     user_id = models.CharField(primary_key=True, max_length=50, editable=False)
 
+    # The quiz never changes after it's created, so its JSON is stored
+    payload = models.TextField(blank=True, default='', editable=False)
+    payload_hash = models.CharField(max_length=64, blank=True, default='',
+            editable=False)
+    payload_version = models.PositiveIntegerField(default=0, editable=False)
+
     ### Attributes defined implicitly (reverse-FK relationships)
     # questions (Question objects)
     # responses (Response objects)
 
-    def json(self):
+    def json(self, questions=None):
         """Returns this quiz's question data in JSON format.
 
         Returns a JSON dict of all the question data needed to display
         this quiz.
 
+        Takes the same number of queries no matter how many questions
+        the quiz has: one for the questions, of every kind, and one for
+        all of the checkbox questions' choices.
+
+        Parameters
+        ----------
+        questions : list, optional
+            The quiz's questions, if they're already loaded, so only
+            their choices are queried. (default is None: load them)
+
         Returns
         -------
         dict
             A JSON dict of this quiz's question data.
         """
 
+        if questions is None:
+            questions = list(self.questions.all())
+
+        # Load every choice at once, instead of once per question
+        prefetch_related_objects(
+                [q for q in questions if isinstance(q, CheckboxQuestion)],
+                'choices')
+
         # Compile a list of each question's JSON
-        questions = [q.json() for q in self.questions.all()]
+        questions = [q.json() for q in questions]
 
         return {
             "user_id": self.user_id,
@@ -71,6 +113,96 @@ class Quiz(CleanOnSaveMixin, models.Model):
         }
 
 
+    def save_payload(self, questions=None):
+        """Builds and saves this quiz's stored JSON payload.
+
+        Serializes json(), and saves it along with its hash and the
+        current PAYLOAD_VERSION. Should be called once the quiz's
+        questions and choices are saved.
+
+        Parameters
+        ----------
+        questions : list, optional
+            The quiz's questions, if they're already loaded. (default is
+            None: load them)
+        """
+
+        self.payload = json.dumps(self.json(questions))
+        self.payload_hash = hashlib.sha256(
+                self.payload.encode('utf-8')).hexdigest()
+        self.payload_version = PAYLOAD_VERSION
+        Quiz.objects.filter(pk=self.pk).update(payload=self.payload,
+                payload_hash=self.payload_hash,
+                payload_version=self.payload_version)
+
+
+    @staticmethod
+    def get_payload(uuid):
+        """Returns the stored JSON payload of the quiz with a UUID.
+
+        Only fetches the payload's columns of the quiz's row, without
+        loading the quiz or its questions. If the payload hasn't been
+        built, or was built with an older PAYLOAD_VERSION, it's rebuilt
+        and saved first.
+
+        Parameters
+        ----------
+        uuid : uuid.UUID
+            The UUID of the quiz.
+
+        Returns
+        -------
+        tuple
+            The payload (a JSON str) and its hash, or None if there's
+            no quiz with that UUID.
+        """
+
+        row = Quiz.objects.filter(uuid=uuid).values_list(
+                'payload', 'payload_hash', 'payload_version').first()
+        if row is None:
+            return None
+
+        payload, payload_hash, version = row
+        if version != PAYLOAD_VERSION:
+            quiz = Quiz.objects.get(uuid=uuid)
+            quiz.save_payload()
+            payload, payload_hash = quiz.payload, quiz.payload_hash
+
+        return payload, payload_hash
+
+
+    @staticmethod
+    def get_payload_hash(uuid):
+        """Returns the hash of the stored payload of the quiz with a UUID.
+
+        Like get_payload(), but only fetches the hash, which is enough
+        to tell whether a client's copy of the quiz is up to date.
+
+        Parameters
+        ----------
+        uuid : uuid.UUID
+            The UUID of the quiz.
+
+        Returns
+        -------
+        str
+            The payload's hash, or None if there's no quiz with that
+            UUID.
+        """
+
+        row = Quiz.objects.filter(uuid=uuid).values_list(
+                'payload_hash', 'payload_version').first()
+        if row is None:
+            return None
+
+        payload_hash, version = row
+        if version != PAYLOAD_VERSION:
+            result = Quiz.get_payload(uuid)
+            return result[1] if result else None
+
+        return payload_hash
+
+
     def _admin_get_quiz_questions(self):
         """Returns question data as HTML for Django's admin site.
 
@@ -88,26 +220,6 @@ class Quiz(CleanOnSaveMixin, models.Model):
                 ((q._admin_get_question(),) for q in self.questions.all()))
 
 
-    def delete(self, *args, **kwargs):
-        """ Overrides delete() to work with Django-Polymorphic models
-
-        Overrides the delete() method so that it deletes each model in
-        a reverse Foreign Key relationship to a PolymorphicModel
-        individually, instead of all at once.
-
-        This is due to an issue with Django-Polymorphic, where deleting
-        an entire QuerySet of PolymorphicModels messes up because
-        there are technically objects of different classes in that
-        set. Deleting them one at a time fixes this.
-
-        This class should also use a custom QuerySet. See
-        PolyOwnerQuerySet for more details.
-        """
-        for q in self.questions.all():
-            q.delete()
-        for r in self.responses.all():
-            r.delete()
-        super(Quiz, self).delete(*args, **kwargs)
 
 
     def __str__(self):
@@ -119,13 +231,28 @@ class Quiz(CleanOnSaveMixin, models.Model):
 
 
 
-class Question(CleanOnSaveMixin, PolymorphicModel):
-    """Stores one question in a Quiz, can have multiple subclasses.
+@receiver(post_delete, sender=Quiz)
+def delete_quiz_page(sender, instance, **kwargs):
+    """Removes a deleted quiz's page from the page cache.
+
+    A signal handler for the post_delete signal, which is sent when a
+    Quiz is deleted. See spoton.pagecache.
+    """
+
+    pagecache.delete_quiz_page(instance.uuid)
+
+
+
+
+class Question(SingleTableMixin, CleanOnSaveMixin, models.Model):
+    """Stores one question in a Quiz, can have multiple kinds.
 
     Holds data about one question in a quiz (associated with the Quiz
-    model). This is a PolymorphicModel, which means it's a general
-    question model. Subclasses should implement different types of
-    questions.
+    model). This is a general question model. Each kind of question is
+    a proxy subclass of it, but they're all stored in this model's
+    table, which has the fields of every kind, and a kind field that
+    says which one each question is. Questions loaded from it are
+    created as their kind's subclass (see utils.SingleTableMixin).
 
     Uses the CleanOnSaveMixin so that objects will be validated before
     they are saved.
@@ -133,11 +260,20 @@ class Question(CleanOnSaveMixin, PolymorphicModel):
     Attributes
     ----------
     objects
-        The QuerySet this model uses, a custom class from utils.py
+        The manager this model uses, a custom class from utils.py. A
+        subclass's only has questions of its kind.
     quiz : ForeignKey
         The Quiz that this question belongs to
     text : str
         The text that is the actual "question"
+    kind : CharField
+        Which kind of question this is, CHECKBOX or SLIDER, or blank
+        for a general question
+    multiselect : BooleanField
+        For a CheckboxQuestion, see CheckboxQuestion
+    slider_min, slider_max, answer : IntegerField
+        For a SliderQuestion, see SliderQuestion. Null for other kinds
+        of questions.
     responses
         A set of all users' responses to this question,
         (response.ResponseAnswer model objects)
@@ -147,15 +283,33 @@ class Question(CleanOnSaveMixin, PolymorphicModel):
     CheckboxQuestion, SliderQuestion
     """
 
-    # Overrides the QuerySet so that delete() below is called when
-    # a set of Questions is deleted.
-    objects = PolyOwnerPolymorphicQuerySet.as_manager()
+    CHECKBOX = 'checkbox'
+    SLIDER = 'slider'
+
+    KIND_CHOICES = [
+        (CHECKBOX, 'Checkbox'),
+        (SLIDER, 'Slider'),
+    ]
+
+
+    objects = KindManager()
 
     quiz = models.ForeignKey('Quiz', related_name='questions', null=False,
             on_delete=models.CASCADE)
 
     text = models.CharField(max_length=400, default="default question")
 
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, blank=True,
+            default='')
+
+    # The fields of checkbox questions
+    multiselect = models.BooleanField(default=False)
+
+    # The fields of slider questions
+    slider_min = models.IntegerField(null=True, blank=True)
+    slider_max = models.IntegerField(null=True, blank=True)
+    answer = models.IntegerField(null=True, blank=True)
+
     ### Attributes defined implicitly (reverse-FK relationships)
     # responses (ResponseAnswer objects)
 
@@ -173,6 +327,8 @@ class CheckboxQuestion(Question):
     question, but several of the choices can be correct. The Choice
     model is used to represent each possible answer in the question.
 
+    A proxy model, stored in the Question table.
+
     Attributes
     ----------
     multiselect : django.db.models.BooleanField
@@ -183,7 +339,10 @@ class CheckboxQuestion(Question):
         model objects)
     """
 
-    multiselect = models.BooleanField(default=False)
+    KIND = Question.CHECKBOX
+
+    class Meta:
+        proxy = True
 
     ### Attributes defined implicitly (reverse-FK relationships)
     # choices (Choice objects)
@@ -345,6 +504,8 @@ class SliderQuestion(Question):
     Quiz model). In a slider question, the user picks a number value
     in a given range, and only one number is correct.
 
+    A proxy model, stored in the Question table.
+
     Attributes
     ----------
     slider_min : IntegerField
@@ -355,21 +516,28 @@ class SliderQuestion(Question):
         The correct value in the number range
     """
 
-    slider_min = models.IntegerField(default=0)
-    slider_max = models.IntegerField(default=10)
-    answer = models.IntegerField(default=5)
+    KIND = Question.SLIDER
+    FIELD_DEFAULTS = {'slider_min': 0, 'slider_max': 10, 'answer': 5}
+
+    class Meta:
+        proxy = True
 
 
     def clean(self):
         """Ensures attributes are valid and raises errors if not.
 
         Raises ValidationErrors if slider values are invalid. Slider
-        values are invalid if the min value is not less than the max,
-        or if the answer is not between the two.
+        values are invalid if any of them are missing, if the min value
+        is not less than the max, or if the answer is not between the
+        two.
         """
 
         super().clean()
 
+        if None in (self.slider_min, self.slider_max, self.answer):
+            raise ValidationError(
+                    'Slider questions need a minimum, maximum and answer')
+
         if self.slider_min >= self.slider_max:
             raise ValidationError(
                     'Minimum slider value must be less than maximum value')
@@ -2,12 +2,9 @@
 
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import models, router, transaction
 from django.dispatch import receiver
 from django.utils.html import format_html_join, format_html
-from polymorphic.managers import PolymorphicManager
-from polymorphic.models import PolymorphicModel
-from polymorphic.query import PolymorphicQuerySet
 
 import uuid
 
@@ -27,8 +24,6 @@ class Response(CleanOnSaveMixin, models.Model):
 
     Attributes
     ----------
-    objects
-        The QuerySet this model uses, a custom class from utils.py
     name : CharField
         The name of the user who generated this response by taking the
         quiz
@@ -40,11 +35,6 @@ class Response(CleanOnSaveMixin, models.Model):
     """
 
 
-    # Overrides the QuerySet so that delete() below is called when
-    # a set of Responses is deleted.
-    objects = PolyOwnerQuerySet.as_manager()
-
-
     quiz = models.ForeignKey('Quiz', related_name='responses', null=False,
             on_delete=models.CASCADE)    
 
@@ -61,41 +51,22 @@ class Response(CleanOnSaveMixin, models.Model):
     # answers (QuestionResponse objects)
 
 
-
-    def delete(self, *args, **kwargs):
-        """ Overrides delete() to work with Django-Polymorphic models
-
-        Overrides the delete() method so that it deletes each model in
-        a reverse Foreign Key relationship to a PolymorphicModel
-        individually, instead of all at once.
-
-        This is due to an issue with Django-Polymorphic, where deleting
-        an entire QuerySet of PolymorphicModels messes up because
-        there are technically objects of different classes in that
-        set. Deleting them one at a time fixes this.
-
-        This class should also use a custom QuerySet. See
-        PolyOwnerQuerySet for more details.
-        """
-
-        for a in self.answers.all():
-            a.delete()
-        super(Response, self).delete(*args, **kwargs)
-
-
     def __str__(self):
         return "<Response: Quiz=" + str(self.quiz.user_id) + ", name=" + self.name + ">"
 
 
 
 
-class QuestionResponse(CleanOnSaveMixin, PolymorphicModel):
-    """Stores the response to one quiz question, should be subclassed.
+class QuestionResponse(SingleTableMixin, CleanOnSaveMixin, models.Model):
+    """Stores the response to one quiz question, can have multiple kinds.
 
     Holds data about a user's response to a quiz question (Question
-    model). This is a PolymorphicModel, which means it's a general
-    question response model. Subclasses should implement responses for
-    different types of questions.
+    model). This is a general question response model. The responses
+    to each kind of question are a proxy subclass of it, but they're
+    all stored in this model's table, which has the fields of every
+    kind, and a kind field that says which one each response is.
+    Responses loaded from it are created as their kind's subclass (see
+    utils.SingleTableMixin).
 
     Uses the CleanOnSaveMixin so that objects will be validated before
     they are saved.
@@ -103,20 +74,36 @@ class QuestionResponse(CleanOnSaveMixin, PolymorphicModel):
     Attributes
     ----------
     objects
-        The QuerySet this model uses, a custom class from utils.py
+        The manager this model uses, a custom class from utils.py. A
+        subclass's only has responses of its kind.
     question : ForeignKey
         The question that this response is to
     response : ForeignKey
         The quiz Response that this question response belongs to
+    kind : CharField
+        Which kind of response this is, CHECKBOX or SLIDER, or blank
+        for a general response
+    choices
+        For a CheckboxResponse, see CheckboxResponse
+    answer : IntegerField
+        For a SliderResponse, see SliderResponse. Null for other kinds
+        of responses.
 
     See Also
     --------
     CheckboxResponse, SliderResponse
     """
 
-    # Overrides the QuerySet so that delete() below is called when
-    # a set of Responses is deleted.
-    objects = PolyOwnerPolymorphicQuerySet.as_manager()
+    CHECKBOX = 'checkbox'
+    SLIDER = 'slider'
+
+    KIND_CHOICES = [
+        (CHECKBOX, 'Checkbox'),
+        (SLIDER, 'Slider'),
+    ]
+
+
+    objects = KindManager()
 
     question = models.ForeignKey('Question', related_name="question_responses",
             null=False, on_delete=models.CASCADE)
@@ -124,6 +111,15 @@ class QuestionResponse(CleanOnSaveMixin, PolymorphicModel):
     response = models.ForeignKey('Response', related_name="answers",
             null=False, on_delete = models.CASCADE)
 
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, blank=True,
+            default='')
+
+    # The fields of checkbox responses
+    choices = models.ManyToManyField('Choice', related_name='choice_responses')
+
+    # The fields of slider responses
+    answer = models.IntegerField(null=True, blank=True)
+
 
     def clean(self):
         """Ensures attributes are valid and raises errors if not.
@@ -157,13 +153,19 @@ class CheckboxResponse(QuestionResponse):
     Stores a user's response to a checkbox question (CheckboxQuestion
     model).
 
+    A proxy model, stored in the QuestionResponse table.
+
     Attributes
     ----------
     choices
         A set of the chosen answers for this question, (Choice model)
     """
 
-    choices = models.ManyToManyField('Choice', related_name='choice_responses')
+    KIND = QuestionResponse.CHECKBOX
+
+    class Meta:
+        proxy = True
+
 
     def clean(self):
         """Ensures attributes are valid and raises errors if not.
@@ -181,6 +183,68 @@ class CheckboxResponse(QuestionResponse):
             )
 
 
+    def validate_choices(self, choice_ids):
+        """Raises a ValidationError if the choices can't be selected.
+
+        Checks that every choice belongs to the CheckboxQuestion this
+        response is to, and that there's only one if the question is
+        single-select. Looks up the question's choice IDs with one
+        query, no matter how many choices there are.
+
+        Parameters
+        ----------
+        choice_ids : iterable
+            The IDs of all the Choices that would be selected.
+        """
+
+        choice_ids = set(choice_ids)
+        if not choice_ids:
+            return
+
+        if len(choice_ids) > 1 and self.question.multiselect is False:
+            raise ValidationError(
+                    "Tried to add multiple Choices to a CheckboxResponse " +
+                    " associated with a single-select CheckboxQuestion.")
+
+        allowed = set(quiz.Choice.objects.filter(question_id=self.question_id)
+                .values_list('id', flat=True))
+        if not choice_ids <= allowed:
+            raise ValidationError(
+                    "Tried to add a Choice to a CheckboxResponse that " +
+                    "doesn't belong to the CheckboxQuestion the " +
+                    "CheckboxResponse is to.")
+
+
+    def set_choices(self, choice_ids):
+        """Replaces the selected choices with the given ones, at once.
+
+        Validates all of the choices together (see validate_choices() ),
+        then replaces the response's selected choices in one
+        transaction, without validating them again for each one. The
+        response must already be saved.
+
+        Parameters
+        ----------
+        choice_ids : iterable
+            The IDs of the Choices to select.
+        """
+
+        choice_ids = list(dict.fromkeys(choice_ids))
+        self.validate_choices(choice_ids)
+
+        through = CheckboxResponse.choices.through
+        using = router.db_for_write(through, instance=self)
+        with transaction.atomic(using=using):
+            through.objects.using(using).filter(
+                    questionresponse_id=self.pk).delete()
+            through.objects.using(using).bulk_create(
+                    through(questionresponse_id=self.pk, choice_id=c)
+                    for c in choice_ids)
+
+        # Like the related manager does, forget any prefetched choices
+        getattr(self, '_prefetched_objects_cache', {}).pop('choices', None)
+
+
     def __str__(self):
         return "<CheckboxResponse: Response=" + self.response.name + \
                 ", Choices=[" + ", ".join(choice.primary_text for choice in self.choices.all()) + "]>"
@@ -191,23 +255,44 @@ def clean_choices(sender, **kwargs):
     """Validate when a choice is added to CheckboxResponse
     
     A signal handler for the m2m_changed signal, which is sent when the
-    choices field in CheckboxResponse is changed. This will make sure
-    that the added Choice belongs to the CheckboxQuestion that this
-    CheckboxResponse is responding to, and raise a ValidationError if
-    it's not.
+    choices field in CheckboxResponse is changed. Before Choices are
+    added, this will make sure that they belong to the CheckboxQuestion
+    that this CheckboxResponse is responding to, and raise a
+    ValidationError if they don't, so they're never added (see
+    CheckboxResponse.validate_choices() ).
+
+    Only the added Choices are checked, since the ones already there
+    were checked when they were added. For a single-select question,
+    the ones already there are counted too. Only CheckboxResponses can
+    have Choices, even though every kind of QuestionResponse has the
+    field.
     """
 
-    instance = kwargs['instance']
-    for c in instance.choices.all():
-        if c not in instance.question.choices.all():
-            raise ValidationError(
-                    "Tried to add a Choice to a CheckboxResponse that " +
-                    "doesn't belong to the CheckboxQuestion the " +
-                    "CheckboxResponse is to.")
-    if instance.choices.count() > 1 and instance.question.multiselect is False:
-            raise ValidationError(
-                    "Tried to add multiple Choices to a CheckboxResponse " +
-                    " associated with a single-select CheckboxQuestion.")
+    if kwargs['action'] != 'pre_add' or not kwargs['pk_set']:
+        return
+
+    # Choices added from the Choice's side, with choice.choice_responses
+    if kwargs['reverse']:
+        for response in QuestionResponse.objects.filter(
+                pk__in=kwargs['pk_set']):
+            _validate_added_choices(response, {kwargs['instance'].pk})
+    else:
+        _validate_added_choices(kwargs['instance'], kwargs['pk_set'])
+
+
+
+def _validate_added_choices(response, choice_ids):
+    """Validates adding choices to the ones a CheckboxResponse has."""
+
+    if not isinstance(response, CheckboxResponse):
+        raise ValidationError(
+                "Tried to add a Choice to a QuestionResponse that isn't " +
+                "a CheckboxResponse.")
+
+    choice_ids = set(choice_ids)
+    if response.question.multiselect is False:
+        choice_ids.update(response.choices.values_list('id', flat=True))
+    response.validate_choices(choice_ids)
 
 
 
@@ -218,23 +303,32 @@ class SliderResponse(QuestionResponse):
     Stores a user's response to a slider question (SliderQuestion
     model).
 
+    A proxy model, stored in the QuestionResponse table.
+
     Attributes
     ----------
     answer
         The number value the user chose as their answer.
     """
-    answer = models.IntegerField()
+
+    KIND = QuestionResponse.SLIDER
+
+    class Meta:
+        proxy = True
 
 
     def clean(self):
         """Ensures attributes are valid and raises errors if not.
 
-        Raises ValidationErrors if the question field is not a
-        SliderQuestion.
+        Raises ValidationErrors if there's no answer, or the question
+        field is not a SliderQuestion.
         """
 
         super().clean()
 
+        if self.answer is None:
+            raise ValidationError("SliderResponse has no answer.")
+
         if not isinstance(self.question, quiz.SliderQuestion):
             raise ValidationError(
                     "Question given to SliderResponse is not a "
@@ -1,8 +1,91 @@
 """Miscellaneous models used by the Spotify quiz models."""
 
+from contextlib import contextmanager
+import threading
+
+from django.conf import settings
 from django.db import models
-from polymorphic.models import PolymorphicModel
-from polymorphic.query import PolymorphicQuerySet
+
+
+
+"""The ways a model using CleanOnSaveMixin can be validated when saved.
+
+FULL_VALIDATION runs full_clean(): it validates every field and runs the
+model's clean(), and checks the database that related objects exist and
+that unique fields are unique. STRUCTURAL_VALIDATION skips the checks
+that need the database, for internal writes of data that was just
+generated or already checked. It still validates the other fields and
+runs the model's clean(). See validation_policy().
+"""
+FULL_VALIDATION = 'full'
+STRUCTURAL_VALIDATION = 'structural'
+VALIDATION_POLICIES = (FULL_VALIDATION, STRUCTURAL_VALIDATION)
+
+
+
+"""A thread-local variable
+
+The validation policy set with validation_policy() in each thread, if
+any. See get_validation_policy().
+"""
+_validation = threading.local()
+
+
+
+
+def get_validation_policy():
+    """Returns how models are validated when they're saved right now.
+
+    Returns
+    -------
+    str
+        The policy set with validation_policy() in this thread, or the
+        MODEL_VALIDATION_POLICY setting if there isn't one, which is
+        FULL_VALIDATION by default.
+    """
+
+    policy = getattr(_validation, 'policy', None)
+    if policy is None:
+        policy = getattr(settings, 'MODEL_VALIDATION_POLICY', FULL_VALIDATION)
+    return policy
+
+
+
+@contextmanager
+def validation_policy(policy):
+    """Validates models saved in this thread with a validation policy.
+
+    A context manager. Models using CleanOnSaveMixin that are saved in
+    this thread, inside the with statement, are validated with the
+    given policy (see FULL_VALIDATION and STRUCTURAL_VALIDATION). The
+    previous policy is restored afterwards, so these can be nested.
+
+    For example, the quiz generator saves its quizzes with
+        with validation_policy(STRUCTURAL_VALIDATION):
+            ...
+
+    Parameters
+    ----------
+    policy : str
+        FULL_VALIDATION or STRUCTURAL_VALIDATION.
+
+    Raises
+    ------
+    ValueError
+        If the policy isn't one of those.
+    """
+
+    if policy not in VALIDATION_POLICIES:
+        raise ValueError("Unknown validation policy: " + str(policy))
+
+    previous = getattr(_validation, 'policy', None)
+    _validation.policy = policy
+    try:
+        yield
+    finally:
+        _validation.policy = previous
+
+
 
 
 class CleanOnSaveMixin:
@@ -10,92 +93,115 @@ class CleanOnSaveMixin:
 
     A mixin for any Django Model class or subclass that cleans the
     models before saving them, so that when models are saved, their
-    fields are validated.
+    fields are validated. How thoroughly depends on the validation
+    policy (see validation_policy() ).
     """
     def save(self, *args, **kwargs):
-        self.full_clean()
+        self.clean_on_save()
         return super().save(*args, **kwargs)
 
 
+    def clean_on_save(self, exclude=None):
+        """Validates the object as the current validation policy says.
 
-class PolyOwnerQuerySet(models.QuerySet):
-    """Overrides Django QuerySet for a custom deletion method
-
-    Overrides Django's QuerySet class so that deleting a QuerySet
-    (a set of database objects) will delete each one individually.
-    This is done so that an overridden delete() method in any model
-    using this QuerySet will be called. Normally, deleting a QuerySet
-    uses SQL commands and ignores the delete() methods.
-
-    Django-Polymorphic has issues deleting sets of PolymorphicModel
-    objects, and the fix to this is to override the delete() method of
-    any model that contains a set (in a reverse Foreign Key
-    relationship) of PolymorphicModel objects. When deleting sets
-    of this model, you need to ensure that the overridden method
-    is called, which is what this class does.
-
-    For example, let's say ModelA is a PolymorphicModel, with a
-    Foreign Key to ModelB, a normal Django model. So ModelB "has" many
-    ModelA objects. Django-Polymorphic's issue is with deleting all of
-    ModelB's ModelA objects. You need to override the ModelB delete()
-    methods so that each ModelA object is deleted individually.
-    What about deleting several ModelB objects at once? That won't call
-    the overridden delete() method, so make the ModelB class use this
-    class as its QuerySet, which will ensure that the overridden
-    delete() method in ModelB is called any time a set of ModelB 
-    objects is deleted.
-
-    Any Model containing a reverse Foreign Key relationship to a
-    PolymorphicModel should override its own delete() method and
-    use this class (or the similar PolyOwnerPolymorphicQuerySet)
-    as its QuerySet by putting
-        objects = PolyOwnerQuerySet.as_manager()
-    in its attributes.
-    """
+        With FULL_VALIDATION, runs full_clean(). With
+        STRUCTURAL_VALIDATION, runs full_clean() without the checks that
+        query the database: it doesn't check that the objects in
+        relation fields exist, or that unique fields are unique.
 
-    def delete(self, *args, **kwargs):
-        """
-        Deletes each object in the QuerySet individually, so that the
-        set's model's delete() method is called. See above for reasons.
-        """
-        for obj in self:
-            obj.delete()
+        Parameters
+        ----------
+        exclude : list, optional
+            The names of fields not to validate.
 
-        super(PolyOwnerQuerySet, self).delete(*args, **kwargs)
+        Raises
+        ------
+        django.core.exceptions.ValidationError
+            If the object is invalid.
+        """
 
+        exclude = list(exclude or [])
 
-class PolyOwnerPolymorphicQuerySet(PolymorphicQuerySet):
-    """Overrides PolymorphicQuerySet for a custom deletion method
+        if get_validation_policy() == STRUCTURAL_VALIDATION:
+            exclude += [f.name for f in self._meta.fields if f.is_relation]
+            self.full_clean(exclude=exclude, validate_unique=False)
+        else:
+            self.full_clean(exclude=exclude)
 
-    Overrides Django-Polymorphic's PolymorphicQuerySet class so that
-    deleting a QuerySet (a set of database objects) will delete each
-    one individually. This is done so that an overridden delete()
-    method in any model using this QuerySet will be called. Normally,
-    deleting a QuerySet uses SQL commands and ignores the delete()
-    methods.
 
-    Any PolymorphicModel containing a reverse Foreign Key relationship
-    to another PolymorphicModel should override its own delete() method
-    and use this class as its QuerySet by putting
-        objects = PolyOwnerQuerySet.as_manager()
-    in its attributes.
+class KindManager(models.Manager):
+    """The manager of a model that shares a table with other kinds.
 
-    See the PolyOwnerQuerySet documentation for more details on why
-    this is needed.
+    Only returns objects of the model's KIND, if it has one, so that
+    CheckboxQuestion.objects only has checkbox questions, while
+    Question.objects has questions of every kind. See SingleTableMixin.
     """
 
-    def delete(self, *args, **kwargs):
-        """Deletes each object in the QuerySet individually.
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.model.KIND is not None:
+            queryset = queryset.filter(kind=self.model.KIND)
+        return queryset
 
-        Deletes each object in the QuerySet individually, so that the
-        set's model's delete() method is called. See above for reasons.
-        """
-        for obj in self:
-            obj.delete()
 
-        super(PolyOwnerPolymorphicQuerySet, self).delete(*args, **kwargs)
 
 
+class SingleTableMixin:
+    """A mixin for a model whose subclasses are all stored in its table.
 
+    Instead of a table for each subclass, which takes a join or an
+    extra query per subclass to load them, the model's table has
+    columns for every subclass's fields, and a 'kind' column that says
+    which subclass each row is. The subclasses are proxy models that
+    set KIND, and FIELD_DEFAULTS for the columns only they use.
 
+    Objects loaded from the table are created as the subclass of their
+    kind, so loading objects of every kind takes one query. The model
+    needs a 'kind' field, and should use KindManager.
+    """
 
+    """The kind of the subclass, stored in the 'kind' column. None for
+    the model itself."""
+    KIND = None
+
+    """The defaults of the fields only this kind uses, since the shared
+    table's columns are nullable."""
+    FIELD_DEFAULTS = {}
+
+
+    def __init__(self, *args, **kwargs):
+        # Objects loaded from the database are created with a value for
+        # every field, positionally, which already has these
+        if not args:
+            if self.KIND is not None:
+                kwargs.setdefault('kind', self.KIND)
+            for name, value in self.FIELD_DEFAULTS.items():
+                kwargs.setdefault(name, value)
+        super().__init__(*args, **kwargs)
+
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Creates an object loaded from the database as the subclass of
+        its kind."""
+
+        if 'kind' in field_names:
+            model = cls.kind_model(values[field_names.index('kind')])
+            if issubclass(model, cls):
+                cls = model
+        return super(SingleTableMixin, cls).from_db(db, field_names, values)
+
+
+    @classmethod
+    def kind_model(cls, kind):
+        """Returns the subclass of a kind, or the model itself if there
+        isn't one."""
+
+        base = cls._meta.concrete_model
+        pending = [base]
+        while pending:
+            model = pending.pop()
+            if model.KIND == kind:
+                return model
+            pending.extend(model.__subclasses__())
+        return base
@@ -0,0 +1,78 @@
+"""A cache of rendered quiz pages, shared by every server process.
+
+A quiz's page is the same for everyone who takes it, and never changes
+after the quiz is created. So once a quiz's page is rendered, it's kept
+in a Django cache, and reused until the quiz is deleted. Each page is
+stored with the ETag it was rendered for, so a page is never served
+for content it wasn't rendered from.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def get_page_cache():
+    """Returns the Django cache quiz pages are kept in.
+
+    It's the cache (in the CACHES setting) named by the
+    QUIZ_PAGE_CACHE setting.
+    """
+
+    return caches[getattr(settings, 'QUIZ_PAGE_CACHE', 'default')]
+
+
+
+def get_quiz_page(uuid, etag):
+    """Returns the cached page of a quiz, if it was rendered for etag.
+
+    Parameters
+    ----------
+    uuid : uuid.UUID
+        The UUID of the quiz.
+    etag : str
+        The quiz page's current ETag.
+
+    Returns
+    -------
+    str
+        The rendered page, or None if it isn't cached, or was rendered
+        for a different ETag.
+    """
+
+    cached = get_page_cache().get(_key(uuid))
+    if cached is None or cached[0] != etag:
+        return None
+    return cached[1]
+
+
+
+def set_quiz_page(uuid, etag, content):
+    """Caches the rendered page of a quiz.
+
+    Pages are cached for QUIZ_PAGE_CACHE_TTL seconds, or until the quiz
+    is deleted.
+
+    Parameters
+    ----------
+    uuid : uuid.UUID
+        The UUID of the quiz.
+    etag : str
+        The ETag the page was rendered for.
+    content : str
+        The rendered page.
+    """
+
+    get_page_cache().set(_key(uuid), (etag, content),
+            timeout=getattr(settings, 'QUIZ_PAGE_CACHE_TTL', 86400))
+
+
+
+def delete_quiz_page(uuid):
+    """Removes the cached page of a quiz, if there is one."""
+    get_page_cache().delete(_key(uuid))
+
+
+
+def _key(uuid):
+    """Returns the cache key of a quiz's page."""
+    return 'quiz_page:' + str(uuid)
@@ -1,6 +1,7 @@
 # The things that outside code will use, this way they can just import
 # them from spoton/quiz (quiz being the folder name)
 from .quiz import create_quiz
+from .jobs import claim_quiz_job, start_quiz_job
 from .response import save_response
 from .user_data import UserData
 from .quiz import SCOPES
@@ -0,0 +1,469 @@
+"""Generates quizzes in the background, with a bounded pool of workers.
+
+Generating a quiz takes many Spotify requests and database writes, so
+it's too slow to do while the user's HTTP request waits. Instead, a
+QuizJob (see spoton.models.jobs) is created and handed to a pool of
+worker threads in this process, and the client polls the job's status
+until its quiz is ready.
+
+The pool has a fixed number of workers, and a fixed number of jobs can
+wait in line for them. When the line is full, new jobs are turned away
+instead of queued, so a burst of logins can't tie up every worker, or
+pile up jobs that would take minutes to get to.
+
+A job is started as soon as a user logs in, so that their quiz is
+usually ready, or at least well along, by the time their dashboard
+loads. The dashboard then claims that job instead of starting another.
+
+Important Functions
+-------------------
+start_quiz_job(session)
+    Queues a job that generates a new quiz for the logged in user, or
+    returns the user's job that's already queued or running.
+claim_quiz_job(session)
+    Returns the job started when the user logged in, for their
+    dashboard, or starts one if there isn't one.
+warm_quiz_metrics()
+    Returns how often the dashboard found the quiz ready, and how long
+    it waited for it otherwise.
+get_job_queue()
+    Returns the process-wide QuizJobQueue. Its stats() describe how
+    busy the workers are.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from importlib import import_module
+import logging
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from spoton import spotify
+from spoton.models.jobs import QuizJob
+from spoton.models.quiz import Quiz
+
+from .quiz import create_quiz
+
+
+logger = logging.getLogger(__name__)
+
+
+
+"""A global variable
+
+The pool of workers that runs quiz jobs in this process. It is created
+the first time it's needed, see get_job_queue().
+"""
+job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+
+"""Global variables
+
+Counts what the dashboard found when it claimed a job: a quiz that was
+ready, a job that was still queued or running (pending), or no job
+started at login (cold). Also records how long each claimed job took to
+finish after it was claimed. See warm_quiz_metrics().
+"""
+_warm_metrics_lock = threading.Lock()
+_warm_metrics = {'ready': 0, 'pending': 0, 'cold': 0, 'waits': 0,
+        'wait_seconds': 0.0, 'max_wait_seconds': 0.0}
+
+
+
+
+class QuizJobQueue:
+    """A bounded pool of worker threads, with a bounded line of jobs.
+
+    At most `max_workers` jobs run at once, and at most `max_pending`
+    more wait in line for a worker. submit() turns jobs away, instead
+    of queueing them, once that many are in the pool.
+
+    Attributes
+    ----------
+    max_workers : int
+        How many jobs run at once.
+    max_pending : int
+        How many jobs can wait for a worker.
+    """
+
+    def __init__(self, max_workers, max_pending):
+        """Creates a pool with no jobs.
+
+        Parameters
+        ----------
+        max_workers : int
+            How many jobs run at once.
+        max_pending : int
+            How many jobs can wait for a worker.
+        """
+
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                thread_name_prefix='quiz-job')
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+
+        self._lock = threading.Lock()
+        self._in_pool = 0
+        self._accepted = 0
+        self._rejected = 0
+
+
+    def submit(self, fn, *args):
+        """Queues fn(*args) to run on a worker, if there's room.
+
+        Parameters
+        ----------
+        fn : function
+            The job to run.
+        *args
+            The arguments to call it with.
+
+        Returns
+        -------
+        bool
+            True if the job was queued, False if the pool was full.
+        """
+
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            return False
+
+        with self._lock:
+            self._in_pool += 1
+            self._accepted += 1
+
+        try:
+            self._executor.submit(self._run, fn, args)
+        except:
+            self._release()
+            raise
+        return True
+
+
+    def stats(self):
+        """Returns statistics about how busy the pool is.
+
+        Returns
+        -------
+        dict
+            in_pool : how many jobs are running or waiting now
+            accepted : how many jobs have been queued
+            rejected : how many jobs were turned away
+        """
+
+        with self._lock:
+            return {
+                'in_pool': self._in_pool,
+                'accepted': self._accepted,
+                'rejected': self._rejected,
+            }
+
+
+    def shutdown(self, wait=True):
+        """Stops the workers once the jobs in the pool are done."""
+        self._executor.shutdown(wait=wait)
+
+
+    def _run(self, fn, args):
+        """Runs a job on a worker, then frees its place in the pool.
+
+        Closes the worker's database connection afterwards, since
+        Django only closes connections at the end of HTTP requests.
+        """
+
+        try:
+            fn(*args)
+        except Exception:
+            logger.exception("Quiz job crashed")
+        finally:
+            connection.close()
+            self._release()
+
+
+    def _release(self):
+        """Frees a job's place in the pool."""
+
+        with self._lock:
+            self._in_pool -= 1
+        self._slots.release()
+
+
+
+
+def get_job_queue():
+    """Returns the process-wide pool of quiz job workers.
+
+    Creates it the first time this is called. It's configured with
+    these Django settings:
+
+    QUIZ_JOB_WORKERS
+        How many quizzes are generated at once.
+    QUIZ_JOB_MAX_PENDING
+        How many more jobs can wait for a worker before new jobs are
+        turned away.
+
+    Returns
+    -------
+    QuizJobQueue
+        The pool of workers.
+    """
+
+    global job_queue
+    if job_queue is None:
+        with _job_queue_lock:
+            if job_queue is None:
+                job_queue = QuizJobQueue(
+                    max_workers=getattr(settings, 'QUIZ_JOB_WORKERS', 4),
+                    max_pending=getattr(settings, 'QUIZ_JOB_MAX_PENDING', 16))
+    return job_queue
+
+
+
+def reset_job_queue():
+    """Throws away the process-wide pool, after its jobs finish.
+
+    The next job will create a new pool, with whatever the settings are
+    at that point.
+    """
+
+    global job_queue
+    with _job_queue_lock:
+        if job_queue is not None:
+            job_queue.shutdown()
+        job_queue = None
+
+
+
+def start_quiz_job(session):
+    """Queues a job that generates a new quiz for the logged in user.
+
+    If the user already has a job that's queued or running, returns
+    that one instead of starting another. The database only lets a user
+    have one active job (see QuizJob.active_user_id), so if another
+    request queues one for the same user at the same time, only one of
+    them is queued, and both return it. Jobs that have been queued or
+    running for longer than the QUIZ_JOB_TIMEOUT setting (in seconds)
+    are assumed to be lost, like when the server restarted, and are
+    marked as failed instead.
+
+    The session is saved first, so the worker can load it, and the
+    Spotify tokens in it, by its key.
+
+    Parameters
+    ----------
+    session : django.contrib.sessions.backend.db.SessionStore
+        The user's session (retrieved from a Django request)
+
+    Returns
+    -------
+    spoton.models.jobs.QuizJob
+        The queued job, or None if no user is logged into the session,
+        or there are too many jobs already and this one was turned
+        away.
+    """
+
+    # The worker checks the user's login with Spotify, in create_quiz()
+    user_id = spotify.get_user_id(session)
+    if not user_id:
+        return None
+
+    active = QuizJob.objects.filter(user_id=user_id,
+            state__in=QuizJob.ACTIVE_STATES)
+
+    now = timezone.now()
+    timeout = timedelta(seconds=getattr(settings, 'QUIZ_JOB_TIMEOUT', 300))
+    active.filter(created_at__lt=now - timeout).update(state=QuizJob.FAILED,
+            error="Timed out", finished_at=now, active_user_id=None)
+
+    job = active.first()
+    if job is not None:
+        return job
+
+    if session.session_key is None or session.modified:
+        session.save()
+
+    try:
+        with transaction.atomic():
+            job = QuizJob.objects.create(user_id=user_id)
+    except IntegrityError:
+        # Another request queued a job for the user first. It may even
+        # have finished already.
+        return QuizJob.objects.filter(user_id=user_id) \
+                .order_by('-created_at').first()
+
+    if not get_job_queue().submit(run_quiz_job, job.id, session.session_key):
+        job.delete()
+        logger.warning("Too many quiz jobs, turned away " + user_id)
+        return None
+
+    return job
+
+
+
+def claim_quiz_job(session):
+    """Returns the logged in user's quiz job, for their dashboard.
+
+    Claims the job started when the user logged in, if it hasn't failed
+    and hasn't been claimed yet. If there's no such job, or it's older
+    than the QUIZ_JOB_WARM_MAX_AGE setting (in seconds), starts a new
+    one and claims it (see start_quiz_job() ). Either way, records
+    whether the quiz was ready (see warm_quiz_metrics() ).
+
+    A job is only ever claimed once, so loading the dashboard again
+    starts a new quiz.
+
+    Parameters
+    ----------
+    session : django.contrib.sessions.backend.db.SessionStore
+        The user's session (retrieved from a Django request)
+
+    Returns
+    -------
+    spoton.models.jobs.QuizJob
+        The claimed job, or None if no user is logged into the session,
+        or a new job was needed but turned away.
+    """
+
+    user_id = spotify.get_user_id(session)
+    if not user_id:
+        return None
+
+    now = timezone.now()
+    max_age = timedelta(seconds=getattr(settings, 'QUIZ_JOB_WARM_MAX_AGE',
+            600))
+
+    warm = QuizJob.objects.filter(user_id=user_id, claimed_at__isnull=True,
+            created_at__gte=now - max_age).exclude(state=QuizJob.FAILED) \
+            .order_by('-created_at').first()
+
+    # Only one request can claim the job, even if several race for it
+    if warm is not None and _claim(warm.id, now):
+        warm.refresh_from_db()
+        if warm.state != QuizJob.FAILED:
+            _count_warm_metric('ready' if warm.state == QuizJob.SUCCEEDED
+                    else 'pending')
+            return warm
+
+    _count_warm_metric('cold')
+    job = start_quiz_job(session)
+    if job is not None:
+        _claim(job.id, now)
+    return job
+
+
+
+def warm_quiz_metrics():
+    """Returns how often the dashboard found the user's quiz ready.
+
+    The counts are for this process only.
+
+    Returns
+    -------
+    dict
+        ready : how many times the job started at login had already
+            generated the quiz
+        pending : how many times it was still queued or running
+        cold : how many times there was no job started at login
+        ready_ratio : ready out of all dashboard loads, or 0 if there
+            were none
+        waits : how many claimed jobs finished after they were claimed
+        wait_seconds : how long those jobs took to finish after they
+            were claimed, in total
+        avg_wait_seconds : wait_seconds out of waits, or 0 if there
+            were none
+        max_wait_seconds : the longest any of them took
+    """
+
+    with _warm_metrics_lock:
+        metrics = dict(_warm_metrics)
+
+    loads = metrics['ready'] + metrics['pending'] + metrics['cold']
+    metrics['ready_ratio'] = metrics['ready'] / loads if loads else 0
+    metrics['avg_wait_seconds'] = metrics['wait_seconds'] / metrics['waits'] \
+            if metrics['waits'] else 0
+    return metrics
+
+
+
+def _claim(job_id, when):
+    """Claims a job, if no one has yet. Returns whether this claimed it."""
+
+    return QuizJob.objects.filter(id=job_id, claimed_at__isnull=True) \
+            .update(claimed_at=when) == 1
+
+
+
+def _count_warm_metric(name):
+    """Adds one to one of the counters warm_quiz_metrics() returns."""
+
+    with _warm_metrics_lock:
+        _warm_metrics[name] += 1
+
+
+
+def _record_wait(job):
+    """Records how long a finished job took after it was claimed, if it
+    was claimed before it finished."""
+
+    # The dashboard claims the job in another thread, so check the
+    # database rather than this copy of the job
+    claimed_at = QuizJob.objects.filter(id=job.id) \
+            .values_list('claimed_at', flat=True).first()
+    if claimed_at is None or claimed_at >= job.finished_at:
+        return
+
+    wait = (job.finished_at - claimed_at).total_seconds()
+    with _warm_metrics_lock:
+        _warm_metrics['waits'] += 1
+        _warm_metrics['wait_seconds'] += wait
+        _warm_metrics['max_wait_seconds'] = \
+                max(_warm_metrics['max_wait_seconds'], wait)
+
+
+
+def run_quiz_job(job_id, session_key):
+    """Runs a quiz job: replaces the user's quiz with a new one.
+
+    Deletes the user's existing quiz and generates a new one, recording
+    the job's progress as it goes. Saves the session afterwards, in
+    case generating the quiz refreshed the user's Spotify tokens. If
+    the job was claimed before it finished, records how long the
+    dashboard waited for it (see warm_quiz_metrics() ).
+
+    Parameters
+    ----------
+    job_id : uuid.UUID
+        The ID of the QuizJob to run.
+    session_key : str
+        The key of the session of the user the quiz is about.
+    """
+
+    job = QuizJob.objects.get(id=job_id)
+    job.mark_running()
+
+    try:
+        engine = import_module(settings.SESSION_ENGINE)
+        session = engine.SessionStore(session_key=session_key)
+        Quiz.objects.filter(user_id=job.user_id).delete()
+
+        quiz = create_quiz(session)
+        if session.modified:
+            session.save()
+    except Exception as e:
+        logger.exception("Quiz job for " + job.user_id + " failed")
+        job.mark_failed(type(e).__name__ + ": " + str(e))
+    else:
+        if quiz is None:
+            job.mark_failed("Couldn't create enough questions")
+        else:
+            job.mark_succeeded(quiz.uuid)
+
+    _record_wait(job)
@@ -5,9 +5,11 @@ The quiz's questions are divided into sections, each of which has its
 own file in this folder, labeled by "section_sectionname.py".
 
 Each section file should have a function "pick_questions_sectionname()"
-that will randomly pick some number of its questions and create them.
-The functions in this file will call each of those functions to create
-the entire quiz.
+that will randomly pick some number of its questions and create them,
+and a function "plan_questions_sectionname()" that picks them without
+creating them yet. The functions in this file plan every section's
+questions, request all the data the picked questions need at once, and
+then create the entire quiz.
 """
 
 
@@ -16,13 +18,14 @@ import random
 import uuid
 
 from spoton import spotify
+from spoton.models.drafts import QuizDraft, materialize_quiz
 from spoton.models.quiz import *
+from spoton.models.utils import STRUCTURAL_VALIDATION, validation_policy
 
-from .section_top_played import pick_questions_top_played
-from .section_saved_followed import pick_questions_saved_followed
-from .section_music_taste_features import pick_questions_music_taste
-from .section_popularity_playlists import pick_questions_popularity_playlists
-from .utils import call_rand_functions
+from .section_top_played import plan_questions_top_played
+from .section_saved_followed import plan_questions_saved_followed
+from .section_music_taste_features import plan_questions_music_taste
+from .section_popularity_playlists import plan_questions_popularity_playlists
 from .user_data import UserData
 
 
@@ -48,6 +51,13 @@ def create_quiz(session):
     its various relationships). If, for some reason, the quiz creation
     fails, will return None.
 
+    The quiz is generated as a draft (see draft_quiz() ), and then
+    validated and saved all at once, in one transaction (see
+    spoton.models.drafts.materialize_quiz() ). If the quiz creation
+    fails, nothing is saved. Since the generator just built the quiz
+    from Spotify's data, it's validated without the checks that query
+    the database (see spoton.models.utils.validation_policy() ).
+
     Parameters
     ----------
     session : django.contrib.sessions.backend.db.SessionStore
@@ -70,20 +80,46 @@ def create_quiz(session):
     # Holds data about listening history of the user
     data = UserData(session)
 
-    # Create a Quiz object
-    user_id = spotify.get_user_id(session)
-    quiz = Quiz.objects.create(user_id=user_id, uuid=uuid.uuid4())
+    draft = draft_quiz(spotify.get_user_id(session), data)
+    if not draft:
+        #TODO ERROR HANDLING
+        return None
 
-    # Populate the quiz with questions
-    questions = pick_questions(quiz, data)
+    with validation_policy(STRUCTURAL_VALIDATION):
+        return materialize_quiz(draft)
+
+
+
+def draft_quiz(user_id, user_data):
+    """Generates a quiz about a Spotify user, without saving it.
+
+    Picks and creates the quiz's questions as drafts, which only exist
+    in memory (see spoton.models.drafts). Nothing is saved to the
+    database, so this can be used for dry runs, or retried cheaply.
+
+    Parameters
+    ----------
+    user_id : str
+        The Spotify username of the user the quiz is about.
+    user_data : .user_data.UserData
+        Data about that user, that the questions will be created about.
+
+    Returns
+    -------
+    spoton.models.drafts.QuizDraft
+        The generated quiz, ready to be saved with materialize_quiz(),
+        or None if something went wrong creating it.
+    """
+
+    draft = QuizDraft(user_id=user_id, uuid=uuid.uuid4())
 
+    # Populate the quiz with questions
+    questions = pick_questions(draft, user_data)
     if not questions:
-        #TODO ERROR HANDLING
-        quiz.delete()
         return None
 
-
-    return quiz
+    draft.questions = questions
+    return draft
 
 
 
@@ -96,10 +132,18 @@ def pick_questions(quiz, user_data):
     its questions, the quiz creation fails, and this function returns
     None.
 
+    Every section's questions are picked first, and then all of the
+    data the picked questions need is requested at once (see
+    UserData.prefetch()), before any of them are created. Data that
+    none of the picked questions use is never requested. If a picked
+    question fails and another one takes its place, that question
+    requests whatever else it needs itself.
+
     Parameters
     ----------
-    quiz : spoton.models.quiz.Quiz
-        The Spotify quiz for which to add the questions to. 
+    quiz : spoton.models.quiz.Quiz or spoton.models.drafts.QuizDraft
+        The Spotify quiz for which to add the questions to. If it's a
+        draft, the questions are only created as drafts.
     user_data : .user_data.UserData
         Data about a Spotify user that the questions will be created
         about.
@@ -111,35 +155,35 @@ def pick_questions(quiz, user_data):
         list of all the questions. Otherwise, returns None.
     """
     
-    # Each section's question creation functions.
+    # Each section's question planning functions.
     # Each function must take the arguments (quiz, user_data) (matching
-    # the arguments for this function). Each function must either
-    # return a list of the questions it creates, or None if it fails.
+    # the arguments for this function), and return a QuestionPlan
+    # whose call() returns a list of the questions it creates, or None
+    # if it fails.
     sections = [
-        pick_questions_top_played,
-        pick_questions_saved_followed,
-        pick_questions_music_taste,
-        pick_questions_popularity_playlists
+        plan_questions_top_played,
+        plan_questions_saved_followed,
+        plan_questions_music_taste,
+        plan_questions_popularity_playlists
     ]
-    
-    # The arguments each section function must take
-    args = [quiz, user_data]
 
-    # Call each section's function and get a list of the returns from
-    # each function, or None if any one fails
-    results = call_rand_functions(sections, args, 4)
+    # Pick the questions, with the sections in a random order
+    plans = [section(quiz, user_data) for section in sections]
+    random.shuffle(plans)
 
-    # results is a list of each function's returns, but since each
-    # function returns a list of questions, need to compile the
-    # contents of each list into one big list.
-    if not results:
-        return None
+    # Request the data for all the picked questions at once
+    requirements = set()
+    for plan in plans:
+        requirements.update(plan.requirements())
+    user_data.prefetch(requirements)
 
+    # Each section's plan returns a list of questions, so compile the
+    # contents of each list into one big list.
     ret = []
-    for r in results:
-        if not r:
+    for plan in plans:
+        results = plan.call()
+        if not results:
             return None
-        ret.extend(r)
+        ret.extend(results)
 
     return ret
-
@@ -8,8 +8,11 @@ models and save them to the database.
 import logging
 import types
 
+from django.db import router, transaction
+
 from spoton.models.quiz import *
 from spoton.models.response import *
+from spoton.models.utils import FULL_VALIDATION, validation_policy
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +23,14 @@ def save_response(data):
     Processes a user's response to the quiz, loads their answers into
     Response object, and saves it to the database.
 
+    The quiz's questions and choices are loaded all at once, and the
+    answers are checked against them before anything is saved. Then
+    the Response and its answers are saved in bulk, in one transaction,
+    so saving a response takes the same number of queries no matter
+    how many questions the quiz has. Since the response comes from the
+    client, it's always fully validated (see
+    spoton.models.utils.validation_policy() ).
+
     Parameters
     ----------
     data : dict
@@ -36,14 +47,12 @@ def save_response(data):
     #import pprint; pprint.pprint(data)
 
     # Find the specified quiz
-    quizzes = Quiz.objects.filter(user_id=data.get('quiz_id'))
-    if not quizzes:
+    quiz = Quiz.objects.filter(user_id=data.get('quiz_id')).first()
+    if quiz is None:
         logger.error('Processing Response: No quiz was found with id '
                 + str(data.get('quiz_id')) + '. This is an internal error.')
         return False
 
-    quiz = quizzes[0]
-
 
 
     # Load in general response data and create response object
@@ -53,86 +62,180 @@ def save_response(data):
 
     background_color = int(data.get('background_color'), 16)
 
+    response = Response(quiz=quiz, name=name, emoji=emoji,
+            background_color=background_color)
+
+
+
+    # Process each question response, without saving anything yet
+    answers = _load_answers(quiz, data.get('questions'))
+    if answers is None:
+        return False
+
+
+
     try:
-        response = Response.objects.create(quiz=quiz, name=name,
-                emoji=emoji, background_color=background_color)
+        with validation_policy(FULL_VALIDATION), transaction.atomic():
+            response.save()
+            _save_answers(response, answers)
     except ValidationError as e:
         logger.error(e)
         logger.error('Processing Response: ValidationError when creating '
                 + ' Response object. This is an internal error.')
         return False
 
+    return True 
+
+
+
+def _load_answers(quiz, questions):
+    """Checks a response's answers and loads them into unsaved objects.
+
+    Loads the quiz's questions and choices in two queries, and checks
+    each answer against them: that its question is in the quiz and is
+    the right type, that its choices belong to its question, and that a
+    single-select question has only one choice.
+
+    Parameters
+    ----------
+    quiz : Quiz
+        The quiz the response is to.
+    questions : list
+        The 'questions' list of the user's response data.
+
+    Returns
+    -------
+    list
+        A tuple for each answer, of an unsaved CheckboxResponse or
+        SliderResponse (without its Response), and a list of the IDs of
+        the chosen Choices (empty for a SliderResponse). None if any
+        answer is invalid, in which case the reason is logged.
+    """
 
+    # Maps each question's ID to its kind and whether it's multiselect
+    quiz_questions = {
+        id: (kind, multiselect) for id, kind, multiselect in
+        Question.objects.filter(quiz=quiz).values_list(
+                'id', 'kind', 'multiselect')
+    }
 
-    # Process each question response
-    for q in data.get('questions'):
+    # Maps each choice's ID to the ID of the question it belongs to
+    quiz_choices = dict(Choice.objects.filter(question__quiz=quiz)
+            .values_list('id', 'question_id'))
+
+
+    loaded = []
+    answered = set()
+
+    for q in questions:
 
         # Get answer(s) for the specific question
         answers = q.get('answer')
         if not answers:
-            response.delete()
             logger.error('Processing Response: No answer found for question '
                     + str(q) + '. This is an internal error.')
-            return False
+            return None
+
+        question_id = q.get('question_id')
+        kind, multiselect = quiz_questions.get(question_id, (None, None))
+
+        if question_id in answered:
+            logger.error('Processing Response: Question ' + str(q) +
+                    ' was answered more than once. This is an internal '
+                    + 'error.')
+            return None
+        answered.add(question_id)
 
 
         # If there's a list of answers (even only one), it's a checkbox
         # question
         if(type(answers) is list):
 
-            # Get the specified question object
-            questions = CheckboxQuestion.objects.filter(id=q.get('question_id'))
-            if not questions:
-                response.delete()
+            if kind != Question.CHECKBOX:
                 logger.error('Processing Response: No CheckboxQuestion found '
                         + 'for question ' + str(q) +
                         '. This is an internal error.')
-                return False
-            question = questions[0]
-
+                return None
 
+            # Each choice once, in the order they were given
+            choice_ids = list(dict.fromkeys(answers))
 
-            qr = CheckboxResponse.objects.create(response=response,
-                    question=question)
-
-
-            # Go through each of the answers and load the associated
-            # Choice object
-            for a in answers:
-                c = Choice.objects.filter(id=a)
-                if not c:
-                    response.delete()
+            for a in choice_ids:
+                if quiz_choices.get(a) != question_id:
                     logger.error('Processing Response: No Choice object '
                             + 'found with id ' + str(a) +
+                            ' for question ' + str(q) +
                             '. This is an internal error.')
-                    return False
-
-                try:
-                    qr.choices.add(c[0])
-                except ValidationError as e:
-                    response.delete()
-                    logger.error(e)
-                    logger.error('ValidationError raised when adding '
-                            + 'Choice to CheckboxResponse. This is an '
-                            + 'internal error.')
-                    return False
-            
+                    return None
+
+            if len(choice_ids) > 1 and not multiselect:
+                logger.error('Processing Response: Multiple Choices given '
+                        + 'for single-select question ' + str(q) +
+                        '. This is an internal error.')
+                return None
+
+            loaded.append((CheckboxResponse(question_id=question_id),
+                    choice_ids))
+
         # Slider question
         else:
-            # Get the specified question object
-            questions = SliderQuestion.objects.filter(id=q.get('question_id'))
-            if not questions:
-                response.delete()
+            if kind != Question.SLIDER:
                 logger.error('Processing Response: No SliderQuestion found '
                         + 'for question ' + str(q) +
                         '. Are you sure the answers should not be a list? '
                         + 'This is an internal error.')
-                return False
-            question = questions[0]
+                return None
 
+            qr = SliderResponse(question_id=question_id, answer=answers)
+            try:
+                qr.clean_fields(exclude=['question', 'response'])
+            except ValidationError as e:
+                logger.error(e)
+                logger.error('Processing Response: Invalid answer for '
+                        + 'question ' + str(q) + '. This is an internal '
+                        + 'error.')
+                return None
 
-            qr = SliderResponse.objects.create(response=response,
-                    question=question, answer=answers)
+            loaded.append((qr, []))
 
+    return loaded
 
-    return True 
+
+
+def _save_answers(response, answers):
+    """Saves a response's answers in bulk.
+
+    Inserts all of the answers at once, then reads back their IDs
+    (bulk_create() can't return them on MySQL or SQLite), and inserts
+    all of the chosen Choices at once. This should be called in a
+    transaction.
+
+    Parameters
+    ----------
+    response : Response
+        The saved Response the answers belong to.
+    answers : list
+        The answers, as returned by _load_answers().
+    """
+
+    using = router.db_for_write(QuestionResponse)
+    objs = [qr for qr, choice_ids in answers]
+    if not objs:
+        return
+
+    for qr in objs:
+        qr.response = response
+    QuestionResponse.objects.using(using).bulk_create(objs)
+
+    # A response only answers each question once
+    ids = dict(QuestionResponse.objects.using(using)
+            .filter(response=response).values_list('question_id', 'id'))
+    for qr in objs:
+        qr.id = ids[qr.question_id]
+        qr._state.adding = False
+
+    # The chosen Choices, which don't need checking again
+    through = QuestionResponse.choices.through
+    through.objects.using(using).bulk_create(
+            through(questionresponse_id=qr.id, choice_id=c)
+            for qr, choice_ids in answers for c in choice_ids)
@@ -31,6 +31,33 @@ def pick_questions_music_taste(quiz, user_data):
         created.
     """
 
+    # Returns None if can't create enough successful questions
+    return plan_questions_music_taste(quiz, user_data).call()
+
+
+
+def plan_questions_music_taste(quiz, user_data):
+    """Randomly orders the music taste questions, before creating any.
+
+    Returns a plan for creating 3 of the Music Taste questions. Since
+    the order is decided before any are created, the plan knows which
+    questions will be tried, and so whether the user's tracks need
+    their audio features, which most of these questions do.
+
+    Parameters
+    ----------
+    quiz : spoton.models.quiz.Quiz
+        The Spotify Quiz to add these questions to.
+    user_data : user_data.UserData
+        The UserData object that the function should use to create the
+        questions.
+
+    Returns
+    -------
+    .utils.QuestionPlan
+        The plan, whose call() creates the questions.
+    """
+
     questions = [
         question_explicitness,
         question_energy,
@@ -44,11 +71,11 @@ def pick_questions_music_taste(quiz, user_data):
 
     args = [quiz, user_data]
 
-    # Returns None if can't create enough successful questions
-    return call_rand_functions(questions, args, 3)
+    return QuestionPlan(questions, [args] * len(questions), 3)
 
 
 
+@requires('music_taste')
 def question_explicitness(quiz, user_data):
     """Creates a explicitness question about a user's music taste.
 
@@ -82,7 +109,7 @@ def question_explicitness(quiz, user_data):
     percentage_explicit = int(100*count_explicit/len(music_taste))
 
     # Create the actual question
-    question = SliderQuestion.objects.create(quiz=quiz, 
+    question = create_object(SliderQuestion, quiz=quiz,
             text="What percentage of the user's music is explicit?",
             slider_min = 0, slider_max = 100, answer = percentage_explicit)
 
@@ -90,6 +117,7 @@ def question_explicitness(quiz, user_data):
 
 
 
+@requires('music_taste_with_audio_features')
 def question_energy(quiz, user_data):
     """Creates a question about the energy of the user's music taste.
 
@@ -121,13 +149,14 @@ def question_energy(quiz, user_data):
     avg_energy = int(100*(energy_sum/len(music_taste)))
 
     # Create the actual question
-    question = SliderQuestion.objects.create(quiz=quiz,
+    question = create_object(SliderQuestion, quiz=quiz,
             text="From 0 to 100, 100 being crazy energetic, how energetic is the user's music taste",
             slider_min = 0, slider_max = 100, answer = avg_energy)
     return question
             
 
 
+@requires('music_taste_with_audio_features')
 def question_acousticness(quiz, user_data):
     """Creates an acousticness question about the user's music taste.
 
@@ -160,13 +189,14 @@ def question_acousticness(quiz, user_data):
     percentage_acoustic = int(100*count_acoustic/len(music_taste))
 
     # Create the actual question
-    question = SliderQuestion.objects.create(quiz=quiz,
+    question = create_object(SliderQuestion, quiz=quiz,
             text="What percentage of the user's music taste is acoustic?",
             slider_min = 0, slider_max = 100, answer = percentage_acoustic)
     return question
 
 
 
+@requires('music_taste_with_audio_features')
 def question_happiness(quiz, user_data):
     """Creates a happiness question about the user's music taste.
 
@@ -198,13 +228,14 @@ def question_happiness(quiz, user_data):
     avg_happiness = int(100*sum_happiness/len(music_taste))
 
     # Create the actual question
-    question = SliderQuestion.objects.create(quiz=quiz,
+    question = create_object(SliderQuestion, quiz=quiz,
             text="From 0 to 100, how happy is the user's music taste (0=sad, 100=happy)?",
             slider_min = 0, slider_max = 100, answer = avg_happiness)
     return question
 
 
 
+@requires('music_taste_with_audio_features')
 def question_danceability(quiz, user_data):
     """Creates a danceability question about the user's music taste.
 
@@ -236,13 +267,14 @@ def question_danceability(quiz, user_data):
     avg_danceability = int(100*sum_danceability/len(music_taste))
 
     # Create the actual question
-    question = SliderQuestion.objects.create(quiz=quiz,
+    question = create_object(SliderQuestion, quiz=quiz,
             text = "From 0 to 100, how danceable is the user's music taste (0=no dancing, 100=dance your ass off)?",
             slider_min = 0, slider_max = 100, answer = avg_danceability)
     return question
 
 
 
+@requires('music_taste')
 def question_duration(quiz, user_data):
     """Creates a question about the length of the user's music taste.
 
@@ -281,13 +313,14 @@ def question_duration(quiz, user_data):
     duration_max = avg_duration+(random.randint(40, 120))
 
     # Create the actual question
-    question = SliderQuestion.objects.create(quiz=quiz,
+    question = create_object(SliderQuestion, quiz=quiz,
             text = "On average, how long are the songs that the user listens to (in seconds)?",
             slider_min = duration_min, slider_max = duration_max, answer = avg_duration)
     return question
 
 
 
+@requires('music_taste')
 def question_average_release_date(quiz, user_data):
     """Creates a release date question about the user's music taste.
 
@@ -341,13 +374,14 @@ def question_average_release_date(quiz, user_data):
         year_max = current_year
 
     # Create the actual question
-    question = SliderQuestion.objects.create(quiz=quiz,
+    question = create_object(SliderQuestion, quiz=quiz,
             text = "On average, what year was the user's music taste released in?",
             slider_min = year_min, slider_max = year_max, answer = year_avg)
     return question
         
 
 
+@requires('music_taste')
 def question_music_popularity(quiz, user_data):
     """Creates a popularity question about the user's music taste.
 
@@ -379,7 +413,7 @@ def question_music_popularity(quiz, user_data):
     avg_popularity = int(popularity_sum/len(music_taste))
 
     # Create the actual question
-    question = SliderQuestion.objects.create(quiz=quiz,
+    question = create_object(SliderQuestion, quiz=quiz,
             text = "How mainstream is the user's music taste?",
             slider_min = 0, slider_max = 100, answer = avg_popularity)
     return question
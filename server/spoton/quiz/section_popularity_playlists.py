@@ -29,6 +29,33 @@ def pick_questions_popularity_playlists(quiz, user_data):
         created.
     """
 
+    # Returns None if can't create enough successful questions
+    return plan_questions_popularity_playlists(quiz, user_data).call()
+
+
+
+def plan_questions_popularity_playlists(quiz, user_data):
+    """Randomly orders the popularity and playlist questions.
+
+    Returns a plan for creating 2 of the Popularity & Playlists
+    questions. Since the order is decided before any are created, the
+    plan knows which data they'll need, like whether the user's
+    playlists have to be loaded in detail, up front.
+
+    Parameters
+    ----------
+    quiz : spoton.models.quiz.Quiz
+        The Spotify Quiz to add these questions to.
+    user_data : user_data.UserData
+        The UserData object that the function should use to create the
+        questions.
+
+    Returns
+    -------
+    .utils.QuestionPlan
+        The plan, whose call() creates the questions.
+    """
+
     questions = [
         question_user_followers,
         question_popular_playlist,
@@ -37,11 +64,11 @@ def pick_questions_popularity_playlists(quiz, user_data):
 
     args = [quiz, user_data]
 
-    # Returns None if can't create enough successful questions
-    return call_rand_functions(questions, args, 2)
+    return QuestionPlan(questions, [args] * len(questions), 2)
 
 
 
+@requires('personal_data')
 def question_user_followers(quiz, user_data):
     """Creates a question about the number of a user's followers.
 
@@ -86,7 +113,7 @@ def question_user_followers(quiz, user_data):
         followers_max += min_range-(followers_max-followers_min)
 
     # Create the actual question
-    question = SliderQuestion.objects.create(quiz=quiz, 
+    question = create_object(SliderQuestion, quiz=quiz,
             text="How many followers does the user have?",
             slider_min = followers_min, slider_max = followers_max, answer = followers)
 
@@ -94,6 +121,7 @@ def question_user_followers(quiz, user_data):
 
 
 
+@requires('playlists_detailed')
 def question_popular_playlist(quiz, user_data):
     """Creates a question about the user's most popular playlist.
 
@@ -159,7 +187,7 @@ def question_popular_playlist(quiz, user_data):
 
 
     # Actually create the question
-    question = CheckboxQuestion.objects.create(quiz=quiz, multiselect=True,
+    question = create_object(CheckboxQuestion, quiz=quiz, multiselect=True,
             text="Which of the user's playlists has the most number of followers?")
 
     create_playlist_choice(question, most_pop_playlist, answer=True)
@@ -169,6 +197,7 @@ def question_popular_playlist(quiz, user_data):
 
 
 
+@requires('playlists', 'music_taste')
 def question_playlist_tracks(quiz, user_data):
     """Creates a question about the tracks in a user's playlist.
 
@@ -225,7 +254,8 @@ def question_playlist_tracks(quiz, user_data):
 
     # Choose tracks from the user's music taste to be incorrect answers
     music_taste = user_data.music_taste()
-    incorrect_choices = random_from_list_blacklist(music_taste, tracks, num_incorrect)
+    incorrect_choices = random_from_list_blacklist(music_taste, tracks,
+            num_incorrect, key=lambda t: t['id'])
 
     # If there aren't enough tracks to make incorrect answers, creation fails
     # Use "is None", because if incorrect_choices is an empty list because num_incorrect=0,
@@ -234,7 +264,7 @@ def question_playlist_tracks(quiz, user_data):
         return None
 
     # Create the actual question
-    question = CheckboxQuestion.objects.create(quiz=quiz, multiselect=True,
+    question = create_object(CheckboxQuestion, quiz=quiz, multiselect=True,
             text="Which of these tracks are in the user's playlist " + playlist['name'] + "?",)
     create_track_choices(question, correct_choices, answer=True)
     create_track_choices(question, incorrect_choices)
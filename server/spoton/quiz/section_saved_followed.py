@@ -30,6 +30,33 @@ def pick_questions_saved_followed(quiz, user_data):
         created.
     """
 
+    # Returns None if can't create enough successful questions
+    return plan_questions_saved_followed(quiz, user_data).call()
+
+
+
+def plan_questions_saved_followed(quiz, user_data):
+    """Randomly orders the questions about what the user saved.
+
+    Returns a plan for creating 2 of the questions about the user's
+    saved albums, saved tracks and followed artists. Since the order is
+    decided before any are created, the plan knows which of those
+    libraries will be needed, so the others aren't requested.
+
+    Parameters
+    ----------
+    quiz : spoton.models.quiz.Quiz
+        The Spotify Quiz to add these questions to.
+    user_data : user_data.UserData
+        The UserData object that the function should use to create the
+        questions.
+
+    Returns
+    -------
+    .utils.QuestionPlan
+        The plan, whose call() creates the questions.
+    """
+
     questions = [
         question_saved_albums,
         question_saved_tracks,
@@ -38,12 +65,12 @@ def pick_questions_saved_followed(quiz, user_data):
 
     args = [quiz, user_data]
 
-    # Returns None if can't create enough successful questions
-    return call_rand_functions(questions, args, 2)
+    return QuestionPlan(questions, [args] * len(questions), 2)
 
 
 
 
+@requires('saved_albums', 'music_taste')
 def question_saved_albums(quiz, user_data):
     """Creates a question about the user's saved albums.
 
@@ -83,7 +110,9 @@ def question_saved_albums(quiz, user_data):
     incorrect_choices = []
     if num_of_incorrect > 0:
         top_track_albums = [t['album'] for t in user_data.music_taste()]
-        incorrect_choices = random_from_list_blacklist(top_track_albums, saved_albums, num_of_incorrect)
+        incorrect_choices = random_from_list_blacklist(top_track_albums,
+                user_data.ids('saved_albums'), num_of_incorrect,
+                key=lambda a: a['id'])
 
         if not incorrect_choices:
             return None
@@ -91,7 +120,7 @@ def question_saved_albums(quiz, user_data):
 
     # Create the database items at the end, once all the data has been
     # successfully assembled.
-    question = CheckboxQuestion.objects.create(quiz=quiz, multiselect=True,
+    question = create_object(CheckboxQuestion, quiz=quiz, multiselect=True,
             text="Which of these albums does the user have saved to their library")
 
     create_album_choices(question, correct_choices, answer=True)
@@ -101,6 +130,7 @@ def question_saved_albums(quiz, user_data):
 
 
 
+@requires('saved_tracks', 'music_taste')
 def question_saved_tracks(quiz, user_data):
     """Creates a question about the user's saved tracks.
 
@@ -140,14 +170,16 @@ def question_saved_tracks(quiz, user_data):
     incorrect_choices = []
     
     if num_of_incorrect > 0:
-        incorrect_choices = random_from_list_blacklist(user_data.music_taste(), saved_tracks, num_of_incorrect)
+        incorrect_choices = random_from_list_blacklist(user_data.music_taste(),
+                user_data.ids('saved_tracks'), num_of_incorrect,
+                key=lambda t: t['id'])
         if not incorrect_choices:
             return None
 
 
     # Create the database items at the end, once all the data has been
     # successfully assembled.
-    question = CheckboxQuestion.objects.create(quiz=quiz, multiselect=True,
+    question = create_object(CheckboxQuestion, quiz=quiz, multiselect=True,
             text="Which of these tracks does the user have saved to their library")
 
     create_track_choices(question, correct_choices, answer=True)
@@ -159,6 +191,7 @@ def question_saved_tracks(quiz, user_data):
 
 
 
+@requires('followed_artists', ('top_artists', 'long_term'))
 def question_followed_artists(quiz, user_data):
     """Creates a question about the user's followed artists.
 
@@ -196,14 +229,16 @@ def question_followed_artists(quiz, user_data):
     incorrect_choices = []
 
     if num_of_incorrect > 0:
-        incorrect_choices = random_from_list_blacklist(user_data.top_artists('long_term'), followed_artists, num_of_incorrect)
+        incorrect_choices = random_from_list_blacklist(user_data.top_artists('long_term'),
+                user_data.ids('followed_artists'), num_of_incorrect,
+                key=lambda a: a['id'])
 
         if not incorrect_choices:
             return None
 
     # Create the database items at the end, once all the data has been
     # successfully assembled.
-    question = CheckboxQuestion.objects.create(quiz=quiz, multiselect=True,
+    question = create_object(CheckboxQuestion, quiz=quiz, multiselect=True,
             text="Which of these artists does the user follow?")
 
     create_artist_choices(question, correct_choices, answer=True)
@@ -30,6 +30,33 @@ def pick_questions_top_played(quiz, user_data):
         created.
     """
 
+    # Returns None if can't create enough successful questions
+    return plan_questions_top_played(quiz, user_data).call()
+
+
+
+def plan_questions_top_played(quiz, user_data):
+    """Randomly orders the top played questions and their time ranges.
+
+    Returns a plan for creating 3 of the top track, artist and genre
+    questions, each for one of the three time ranges. Since the order
+    is decided before any are created, the plan knows which of the
+    user's top lists, and for which time ranges, will be needed.
+
+    Parameters
+    ----------
+    quiz : spoton.models.quiz.Quiz
+        The Spotify Quiz to add these questions to.
+    user_data : user_data.UserData
+        The UserData object that the function should use to create the
+        questions.
+
+    Returns
+    -------
+    .utils.QuestionPlan
+        The plan, whose call() creates the questions.
+    """
+
     questions = [
         question_top_track,
         question_top_track,
@@ -57,13 +84,13 @@ def pick_questions_top_played(quiz, user_data):
             [quiz, user_data, 'short_term'],
     ]
 
-    # Returns None if can't create enough successful questions
-    return call_rand_functions_arg_sets(questions, args, 3)
+    return QuestionPlan(questions, args, 3)
 
 
 
 
 
+@requires('top_tracks')
 def question_top_track(quiz, user_data, time_range):
     """Creates a question about the user's top track of the time range.
 
@@ -103,7 +130,7 @@ def question_top_track(quiz, user_data, time_range):
 
     # Create the database items at the end, once all the data has been
     # successfully assembled.
-    question = CheckboxQuestion.objects.create(quiz=quiz, text="What is their most listened to track in the last 6 months?")
+    question = create_object(CheckboxQuestion, quiz=quiz, text="What is their most listened to track in the last 6 months?")
 
     # Create correct choice and three other random choices 
     create_track_choice(question, top_track, answer=True)
@@ -113,6 +140,7 @@ def question_top_track(quiz, user_data, time_range):
 
 
      
+@requires('top_artists')
 def question_top_artist(quiz, user_data, time_range):
     """Creates a question about the user's top artist of the time range
 
@@ -150,7 +178,7 @@ def question_top_artist(quiz, user_data, time_range):
 
     # Create the database items at the end, once all the data has been
     # successfully assembled.
-    question = CheckboxQuestion.objects.create(quiz=quiz, text="What is their most listened to artist in the last 6 months?")
+    question = create_object(CheckboxQuestion, quiz=quiz, text="What is their most listened to artist in the last 6 months?")
 
     # Create correct choice and three random choices
     create_artist_choice(question, top_artist, answer=True)
@@ -160,6 +188,7 @@ def question_top_artist(quiz, user_data, time_range):
 
 
 
+@requires('top_genres')
 def question_top_genre(quiz, user_data, time_range):
     """Creates a question about the user's top genre of the time range.
 
@@ -209,7 +238,7 @@ def question_top_genre(quiz, user_data, time_range):
     random_choices = [l[random.randint(0, len(l)-1)] for l in random_choice_lists]
 
     # Create the models
-    question = CheckboxQuestion.objects.create(quiz=quiz, text="What is their most listened to genre in the last 6 months?")
+    question = create_object(CheckboxQuestion, quiz=quiz, text="What is their most listened to genre in the last 6 months?")
 
     create_genre_choice(question, top_genre, answer=True)
     create_genre_choices(question, random_choices)
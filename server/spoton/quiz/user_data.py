@@ -1,9 +1,97 @@
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import logging
 
-from spoton import spotify
+from django.conf import settings
+
+from spoton import catalog, spotify
 
 from .utils import *
 
+
+logger = logging.getLogger(__name__)
+
+
+"""The time ranges that Spotify keeps top data over"""
+TIME_RANGES = ['long_term', 'medium_term', 'short_term']
+
+"""The resources that are kept separately for each time range"""
+TIME_RANGE_RESOURCES = ['top_tracks', 'top_artists', 'top_genres']
+
+"""
+The fields of Spotify's audio features that are merged into the tracks
+of a user's music taste
+"""
+AUDIO_FEATURES = [
+    'acousticness',
+    'danceability',
+    'energy',
+    'instrumentalness',
+    'key',
+    'liveness',
+    'loudness',
+    'mode',
+    'speechiness',
+    'tempo',
+    'time_signature',
+    'valence',
+]
+
+"""
+The resources that UserData keeps an index of by Spotify ID, for
+UserData.find() and UserData.ids()
+"""
+INDEXED_RESOURCES = [
+    'playlists',
+    'saved_tracks',
+    'saved_albums',
+    'followed_artists',
+    'music_taste',
+]
+
+"""
+The resources UserData.prefetch() can fetch, each mapped to the
+resources that have to be fetched before it. A resource is named after
+the UserData method that returns it. Resources kept for each time range
+are named with a (name, time_range) tuple; a dependency named without
+a time range means the same time range as the resource that needs it.
+"""
+RESOURCE_DEPENDENCIES = {
+    'personal_data': [],
+    'playlists': [],
+    'playlists_detailed': ['playlists'],
+    'recently_played': [],
+    'saved_tracks': [],
+    'saved_albums': [],
+    'followed_artists': [],
+    'top_tracks': [],
+    'top_artists': [],
+    'top_genres': ['top_artists'],
+    'music_taste': [('top_tracks', r) for r in TIME_RANGES],
+    'music_taste_with_audio_features': ['music_taste'],
+}
+
+"""
+The resources prefetch() fetches by default: every resource that only
+takes a request or two. Detailed playlists and audio features take a
+request for every playlist or every hundred tracks, so they're only
+fetched when asked for.
+"""
+DEFAULT_PREFETCH_RESOURCES = [
+    'personal_data',
+    'playlists',
+    'recently_played',
+    'saved_tracks',
+    'saved_albums',
+    'followed_artists',
+    'top_tracks',
+    'top_artists',
+    'top_genres',
+    'music_taste',
+]
+
+
+
 class UserData:
     """Requests and saves for reuse data from the Spotify API.
 
@@ -51,6 +139,9 @@ class UserData:
         self._top_genres = {}
         self._personal_data = None
 
+        # Resource name -> (the list indexed, its id index, its id set)
+        self._indexes = {}
+
 
 
     def personal_data(self):
@@ -354,6 +445,193 @@ class UserData:
 
 
 
+    def prefetch(self, resources=None, max_workers=None):
+        """Requests several resources at once, so they're saved locally.
+
+        Requests the given resources from the Spotify API concurrently,
+        on a bounded pool of threads, and saves them locally just like
+        their getters would. Once this returns, calling any of their
+        getters won't make a request.
+
+        A resource is requested as soon as every resource it depends on
+        has been (see RESOURCE_DEPENDENCIES), so this takes about as
+        long as the slowest chain of dependent requests, instead of as
+        long as all of the requests put together.
+
+        If a resource fails to be requested, the error is logged and
+        the resource is left for its getter to request later.
+
+        Parameters
+        ----------
+        resources : list, optional
+            The names of the resources to request, each one a key of
+            RESOURCE_DEPENDENCIES. A resource kept for each time range
+            can be given as a (name, time_range) tuple, or just a name,
+            meaning all of the time ranges. (default is
+            DEFAULT_PREFETCH_RESOURCES)
+        max_workers : int, optional
+            The most requests to make at once. (default is the
+            USER_DATA_PREFETCH_WORKERS setting, or 8)
+        """
+
+        if resources is None:
+            resources = DEFAULT_PREFETCH_RESOURCES
+        if max_workers is None:
+            max_workers = getattr(settings, 'USER_DATA_PREFETCH_WORKERS', 8)
+
+        # Every resource to fetch, including the resources they depend
+        # on, mapped to the resources they're waiting for
+        pending = {}
+        to_expand = list(_expand_resource_names(resources))
+        while to_expand:
+            resource = to_expand.pop()
+            if resource not in pending:
+                pending[resource] = _resource_dependencies(resource)
+                to_expand.extend(pending[resource])
+
+        running = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or running:
+                # Start every resource that isn't waiting on any others
+                for resource in [r for r, d in pending.items() if not d]:
+                    del pending[resource]
+                    future = executor.submit(self._fetch_resource, resource)
+                    running[future] = resource
+
+                done, not_done = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    resource = running.pop(future)
+                    if future.exception() is not None:
+                        logger.warning("Prefetching " + str(resource)
+                                + " failed: " + str(future.exception()))
+
+                    # Whether it worked or not, nothing should wait on
+                    # it anymore. Anything that depends on a failed
+                    # resource will request it again itself.
+                    for dependencies in pending.values():
+                        if resource in dependencies:
+                            dependencies.remove(resource)
+
+
+
+    def _fetch_resource(self, resource):
+        """Requests and saves one resource, if it isn't saved already.
+
+        Parameters
+        ----------
+        resource : str or tuple
+            The name of the resource, or a (name, time_range) tuple for
+            resources kept for each time range.
+        """
+
+        if isinstance(resource, tuple):
+            name, time_range = resource
+            getattr(self, name)(time_range)
+        else:
+            getattr(self, resource)()
+
+
+
+    def find(self, resource, item_id):
+        """Returns the item of one of the user's lists with the given ID.
+
+        Looks the item up in an index of the list by ID, instead of
+        searching the list for it. If the list does not exist locally,
+        requests it from the Spotify API.
+
+        Parameters
+        ----------
+        resource : str
+            The name of the list, one of INDEXED_RESOURCES, like
+            'saved_tracks'.
+        item_id : str
+            The Spotify ID of the item.
+
+        Returns
+        -------
+        dict
+            The first item in the list with that ID, or None if there
+            is none.
+        """
+
+        items, index, ids = self._index(resource)
+        i = index.get(item_id)
+        return None if i is None else items[i]
+
+
+
+    def ids(self, resource):
+        """Returns the Spotify IDs of the items in one of the user's lists.
+
+        If the list does not exist locally, requests it from the
+        Spotify API.
+
+        Parameters
+        ----------
+        resource : str
+            The name of the list, one of INDEXED_RESOURCES, like
+            'followed_artists'.
+
+        Returns
+        -------
+        frozenset
+            The IDs of every item in the list, for checking whether an
+            item is in it.
+        """
+
+        return self._index(resource)[2]
+
+
+
+    def _index(self, resource):
+        """Returns a list of the user's data, with its indexes by ID.
+
+        The indexes are built the first time they're needed, and again
+        whenever the list is replaced. Code that changes a list in place
+        must call _invalidate_index() instead.
+
+        Parameters
+        ----------
+        resource : str
+            The name of the list, one of INDEXED_RESOURCES.
+
+        Returns
+        -------
+        tuple
+            The list, a dict of each ID to the position of the first
+            item in the list with it, and a frozenset of every ID.
+        """
+
+        if resource not in INDEXED_RESOURCES:
+            raise ValueError("No index of " + str(resource))
+
+        items = getattr(self, resource)()
+
+        cached = self._indexes.get(resource)
+        if cached is not None and cached[0] is items:
+            return cached
+
+        index = index_tracks(items)
+        cached = (items, index, frozenset(index))
+        self._indexes[resource] = cached
+        return cached
+
+
+
+    def _invalidate_index(self, resource):
+        """Throws away the indexes of a list that was changed in place.
+
+        Parameters
+        ----------
+        resource : str
+            The name of the list, one of INDEXED_RESOURCES.
+        """
+
+        self._indexes.pop(resource, None)
+
+
+
     def get_playlist_with_tracks(self, playlist_id):
         """Returns the complete playlist data for one playlist as JSON.
         
@@ -378,19 +656,13 @@ class UserData:
         # First get basic data about all the user's playlists, so we
         # can ensure that the given playlist id is one of the user's 
         # playlists and not another user's
-        playlists = self.playlists()
-
-        playlist = None
-        index = None
-        for i, p in enumerate(playlists):
-            if p['id'] == playlist_id:
-                playlist = p
-                index = i
-                break
+        playlists, playlist_index, playlist_ids = self._index('playlists')
 
         # If no playlist found, fail
-        if not playlist:
+        index = playlist_index.get(playlist_id)
+        if index is None:
             return None
+        playlist = playlists[index]
 
         # If playlist isn't one of the user's, fail
         if playlist['tracks'].get('items') is not None:
@@ -411,6 +683,7 @@ class UserData:
         playlists[index] = json # playlist is just a reference, so edit the list
 
         self._playlists = playlists
+        self._invalidate_index('playlists')
         return playlists[index]
 
 
@@ -444,22 +717,11 @@ class UserData:
         locally.
         """
 
-        playlists = []
-
-        limit = 50
-        query_dict = {'limit': limit}
+        query_dict = {'limit': 50}
         url = '/v1/me/playlists'
 
-        # Request first page of items
-        page = spotify.make_authorized_request(self.session, url, query_dict=query_dict)
-        json = page.json()
-        playlists.extend(json['items'])
-
-        # Keep requesting pages until they run out
-        while(json.get('next')):
-            page = spotify.make_authorized_request(self.session, json.get('next'), full_url=True)
-            json = page.json()
-            playlists.extend(json['items'])
+        # Get every page of items at once
+        playlists = spotify.make_paged_request(self.session, url, query_dict=query_dict)
 
         self._playlists = playlists
 
@@ -471,26 +733,13 @@ class UserData:
         Requests the Spotify user's saved tracks and stores it locally.
         """
 
-        saved_tracks = []
-
-        limit = 50
-        query_dict = { 'limit': limit }
+        query_dict = { 'limit': 50 }
         url = '/v1/me/tracks'
 
-        # Get first page of items 
-        results = spotify.make_authorized_request(self.session, url, query_dict=query_dict)
-        json = results.json()
-        for i in json['items']:
-            saved_tracks.append(i['track'])
-
-        # Get the rest of the pages
-        while(json.get('next')):
-            results = spotify.make_authorized_request(self.session, json.get('next'), full_url=True)
-            json = results.json()
-            for i in json['items']:
-                saved_tracks.append(i['track'])
+        # Get every page of items at once
+        items = spotify.make_paged_request(self.session, url, query_dict=query_dict)
 
-        self._saved_tracks = saved_tracks
+        self._saved_tracks = [i['track'] for i in items]
 
     
 
@@ -500,26 +749,13 @@ class UserData:
         Requests the Spotify user's saved albums and stores it locally.
         """
 
-        saved_albums = []
-
-        limit = 50
-        query_dict = { 'limit': limit }
+        query_dict = { 'limit': 50 }
         url = '/v1/me/albums'
 
-        # Get first page of items
-        results = spotify.make_authorized_request(self.session, url, query_dict=query_dict)
-        json = results.json()
-        for i in json['items']:
-            saved_albums.append(i['album'])
-
-        # Get the rest of the pages
-        while(json.get('next')):
-            results = spotify.make_authorized_request(self.session, json.get('next'), full_url=True)
-            json = results.json()
-            for i in json['items']:
-                saved_albums.append(i['album'])
+        # Get every page of items at once
+        items = spotify.make_paged_request(self.session, url, query_dict=query_dict)
 
-        self._saved_albums = saved_albums
+        self._saved_albums = [i['album'] for i in items]
 
 
 
@@ -530,27 +766,16 @@ class UserData:
         locally.
         """
 
-        followed_artists = []
-
-        limit = 50
         query_dict = {
-            'limit': limit,
+            'limit': 50,
             'type': 'artist' 
         }
         url = '/v1/me/following'
 
-        # Get the first page of items
-        results = spotify.make_authorized_request(self.session, url, query_dict=query_dict)
-        json = results.json()
-        followed_artists.extend(json['artists']['items'])
-
-        # Get the rest of the pages
-        while(json.get('next')):
-            results = spotify.make_authorized_request(self.session, json.get('next'), full_url=True)
-            json = results.json()
-            followed_artists.extend(json['items'])
-
-        self._followed_artists = followed_artists
+        # This endpoint pages by cursor, and puts its pages under
+        # 'artists', so its pages are requested one after another
+        self._followed_artists = spotify.make_paged_request(self.session,
+                url, query_dict=query_dict, container='artists')
 
 
 
@@ -667,21 +892,16 @@ class UserData:
 
         ids = [t['id'] for t in music_taste]
 
-        limit = 100
-        
-        # Split the song ids into sections (Spotify only lets you
-        # request so many at a time)
-        id_sections = split_into_subsections(ids, limit)
-        for section in id_sections:
-            url = '/v1/audio-features'
-            query_dict = { 'ids': spotify.create_id_querystr(section) }
-            results = spotify.make_authorized_request(self.session, url, query_dict=query_dict)
-
-            tracks = results.json()['audio_features'] 
-
-            music_taste = combine_track_json(music_taste, tracks)
+        # Audio features are the same for every user, so only the ones
+        # no one has requested yet are requested from Spotify
+        features = catalog.get_catalog_objects(self.session,
+                'audio_features', ids)
 
-        self._music_taste = music_taste
+        # Only the audio features are merged into the tracks, instead of
+        # replacing each track with a merged copy of it and its features
+        self._music_taste = merge_track_json(music_taste, features,
+                fields=AUDIO_FEATURES)
+        self._invalidate_index('music_taste')
 
 
 
@@ -700,4 +920,54 @@ class UserData:
             results = spotify.make_authorized_request(self.session, url, query_dict=query_dict)
             p['followers'] = results.json()['followers']
 
-        self._playlists = playlists 
+        self._playlists = playlists
+
+
+
+def _expand_resource_names(resources):
+    """Returns the given resources, with time ranges filled in.
+
+    A resource that's kept for each time range but given without one
+    is turned into one (name, time_range) tuple for each time range.
+
+    Parameters
+    ----------
+    resources : list
+        Resource names or (name, time_range) tuples.
+
+    Returns
+    -------
+    list
+        The resources, with every time range resource as a tuple.
+    """
+
+    expanded = []
+    for r in resources:
+        if r in TIME_RANGE_RESOURCES:
+            expanded.extend((r, time_range) for time_range in TIME_RANGES)
+        else:
+            expanded.append(r)
+    return expanded
+
+
+
+def _resource_dependencies(resource):
+    """Returns the resources that the given resource depends on.
+
+    Parameters
+    ----------
+    resource : str or tuple
+        A resource name, or a (name, time_range) tuple.
+
+    Returns
+    -------
+    list
+        The resources that have to be fetched before this one.
+    """
+
+    if isinstance(resource, tuple):
+        name, time_range = resource
+        return [(d, time_range) if d in TIME_RANGE_RESOURCES else d
+                for d in RESOURCE_DEPENDENCIES[name]]
+
+    return _expand_resource_names(RESOURCE_DEPENDENCIES[resource])
@@ -1,5 +1,6 @@
 """Miscellanous utility functions that help out with quiz creation."""
 
+import inspect
 import random
 
 def random_from_list(arr, num_choices, start=0, end=None):
@@ -46,7 +47,7 @@ def random_from_list(arr, num_choices, start=0, end=None):
 
 
 
-def random_from_list_blacklist(arr, blacklist, num_choices):
+def random_from_list_blacklist(arr, blacklist, num_choices, key=None):
     """Picks a number of random items from the list, with a blacklist.
 
     Randomly chooses a given number of items from the given list. Will
@@ -54,14 +55,23 @@ def random_from_list_blacklist(arr, blacklist, num_choices):
     aren't enough elements in the list from which to pick the chosen
     number of items, will return None.
 
+    Items are compared with the blacklist by their key, like their
+    Spotify ID, through a set, so checking an item takes constant time
+    no matter how long the blacklist is. Every way of picking the items
+    from the ones that aren't blacklisted is equally likely.
+
     Parameters
     ----------
     arr : list
         The list to pick items from
-    blacklist : list
-        A list of items which cannot be picked
+    blacklist : list or set
+        A list of items which cannot be picked, or a set of the keys of
+        the items which cannot be picked
     num_choices : int
         How many items to pick
+    key : function, optional
+        Returns the key of an item, which is what's compared with the
+        blacklist. (default is None: compare the items themselves)
 
     Returns
     -------
@@ -70,36 +80,36 @@ def random_from_list_blacklist(arr, blacklist, num_choices):
         number of items could not be picked.
     """
 
-    chosen = [] 
+    if key is None:
+        key = lambda item: item
 
-    # copy the list, so can delete items we've already tried to pick.
-    # This way, we don't end up picking the same blacklisted items 
-    # over and over
-    items = arr.copy()
+    if isinstance(blacklist, (set, frozenset)):
+        blocked = blacklist
+    else:
+        blocked = {key(item) for item in blacklist}
 
-    for i in range(num_choices):
-        # If list is empty, then we can't find enough items, sofail
-        if not items:
-            return None
+    chosen = []
 
-        # Keep picking a random item from the list until it's valid.
-        # Delete any picks that are invalid
-        i = random.randint(0, len(items)-1)
-        while len(items) > 1 and items[i] in blacklist:
-            del items[i]
-            i = random.randint(0, len(items)-1)
-
-        # If the above loop chooses the very last item in the list, it
-        # will not check if that item is blacklisted, so check here.
-        # If it is blacklisted, then there aren't enough items to pick
-        # from.
-        if items[i] in blacklist:
-            return None
+    # A Fisher-Yates shuffle of the list's indices, stopped as soon as
+    # enough items are picked. Only the indices that were swapped are
+    # kept, so nothing is copied and every position is tried at most
+    # once.
+    swapped = {}
+    for tried in range(len(arr)):
+        if len(chosen) == num_choices:
+            break
 
-        # Add the chosen items, and also delete it from the list so
-        # it can't be picked again
-        chosen.append(items[i])
-        del items[i]
+        j = random.randint(tried, len(arr)-1)
+        index = swapped.get(j, j)
+        swapped[j] = swapped.get(tried, tried)
+
+        item = arr[index]
+        if key(item) not in blocked:
+            chosen.append(item)
+
+    # If there weren't enough items that aren't blacklisted, fail
+    if len(chosen) < num_choices:
+        return None
 
     return chosen
 
@@ -174,30 +184,106 @@ def combine_track_json(tracks1, tracks2):
     list
         The two lists merged into one list of track dicts, each 
         formatted as Spotify's track JSON.
+
+    See Also
+    --------
+    merge_track_json() : To merge several lists into one without
+        indexing it again each time, or to merge only some fields.
+    """
+
+    return merge_track_json(tracks1, tracks2)
+
+
+
+def index_tracks(tracks):
+    """Returns an index of where each track is in a list, by id.
+
+    Parameters
+    ----------
+    tracks : list
+        A list of dicts, each with an "id" field, like Spotify's track
+        JSON.
+
+    Returns
+    -------
+    dict
+        Each id, mapped to the position of the first track in the list
+        with that id.
+    """
+
+    index = {}
+    for i, t in enumerate(tracks):
+        index.setdefault(t['id'], i)
+    return index
+
+
+
+def merge_track_json(tracks1, tracks2, index=None, fields=None):
+    """Merges a list of track JSON objects into another, by id.
+
+    Works like combine_track_json(), but finds each track's duplicate
+    through an index of tracks1 instead of searching all of tracks1 for
+    it, so merging takes time linear in the length of the lists. The
+    index is kept up to date with the tracks added to tracks1, so it
+    can be passed in again to merge more lists into tracks1 without
+    indexing it again.
+
+    If fields are given, only those fields of each track in tracks2 are
+    merged into its duplicate in tracks1, in place, instead of replacing
+    it with a merged copy of both. A track in tracks2 without a
+    duplicate is added as a compact track, with only its id and those
+    fields.
+
+    Parameters
+    ----------
+    tracks1 : list
+        A list of Spotify audio track data, each formatted as Spotify's
+        track JSON. Tracks from tracks2 are merged into this list.
+    tracks2 : list
+        A second list of Spotify audio track data, each formatted as
+        Spotify's track JSON.
+    index : dict, optional
+        The index of tracks1, as returned by index_tracks(). (default is
+        None: index tracks1 now)
+    fields : list, optional
+        The only fields to merge in from tracks2. (default is None:
+        merge every field)
+
+    Returns
+    -------
+    list
+        tracks1, with the tracks of tracks2 merged into it. If a track
+        has a value for the same field in both lists, the value from
+        tracks1 is kept.
     """
 
-    # Add each item in tracks2 to tracks1 
+    if index is None:
+        index = index_tracks(tracks1)
+
     for t2 in tracks2:
-        found = False
-        
-        # Look for a track with the same ID in tracks1
-        for i, t1 in enumerate(tracks1):
-            if t1['id'] == t2['id']:
-                # Merge the two track dicts into one
-                # We want to keep dict values in t1 over the dict
-                # values in t2, so have to do t2.update(t1). But we
-                # want to return tracks1 as the final list, so update
-                # the value in tracks1 with the updated version of t2.
-                t2.update(t1)
-                tracks1[i] = t2
-
-                found = True
-                break
+        i = index.get(t2['id'])
 
         # If the track doesn't exist in tracks1, add it
-        if not found:
+        if i is None:
+            if fields is not None:
+                t2 = {f: t2[f] for f in ['id'] + list(fields) if f in t2}
+            index[t2['id']] = len(tracks1)
             tracks1.append(t2)
 
+        elif fields is None:
+            # We want to keep dict values in t1 over the dict values in
+            # t2, so have to do t2.update(t1). But we want to return
+            # tracks1 as the final list, so update the value in tracks1
+            # with the updated version of t2.
+            t2.update(tracks1[i])
+            tracks1[i] = t2
+
+        else:
+            t1 = tracks1[i]
+            for f in fields:
+                if f in t2 and f not in t1:
+                    t1[f] = t2[f]
+
     return tracks1
 
 
@@ -336,3 +422,161 @@ def call_rand_functions_arg_sets(functions, args, num):
         return None
 
     return results
+
+
+
+def requires(*resources):
+    """Declares the UserData resources a question function uses.
+
+    A decorator for question functions, which saves the given resources
+    on the function as its "requirements" attribute. This lets quiz
+    creation request all the data that the picked questions will use
+    at once, before creating any of them (see QuestionPlan).
+
+    A resource is the name of a UserData method, or a (name,
+    time_range) tuple, like the ones UserData.prefetch() takes. If the
+    question function takes a time_range argument, a resource named
+    without a time range means the time range the function is called
+    with. Otherwise it means all of the time ranges.
+
+    Parameters
+    ----------
+    *resources
+        The resources the question function may use.
+
+    Returns
+    -------
+    function
+        The decorator, which returns the question function itself.
+    """
+
+    def decorator(function):
+        function.requirements = list(resources)
+        return function
+
+    return decorator
+
+
+
+def function_requirements(function, args):
+    """Returns the resources a question function needs for a call.
+
+    Returns the resources declared on the function with requires(),
+    with the time range of the given call filled in where the function
+    takes a time_range argument.
+
+    Parameters
+    ----------
+    function : function
+        The question function. If it wasn't declared with requires(),
+        it doesn't require anything.
+    args : list
+        The arguments the function will be called with.
+
+    Returns
+    -------
+    list
+        The resources the function call needs, in the format
+        UserData.prefetch() takes.
+    """
+
+    requirements = getattr(function, 'requirements', [])
+
+    bound = inspect.signature(function).bind_partial(*args).arguments
+    time_range = bound.get('time_range')
+    if time_range is None:
+        return list(requirements)
+
+    return [r if isinstance(r, tuple) else (r, time_range)
+            for r in requirements]
+
+
+
+class QuestionPlan:
+    """Randomly ordered question functions for one section of a quiz.
+
+    Decides ahead of time the order in which a section's question
+    functions would be tried, so that the resources the picked
+    questions need are known before any of them are created. The
+    functions are tried in the same random order as
+    call_rand_functions_arg_sets() would try them: the first num of
+    them are picked, and if one fails, the next one takes its place.
+
+    Attributes
+    ----------
+    calls : list
+        (function, args) tuples, in the order they'll be tried.
+    num : int
+        The number of function calls that must succeed.
+    """
+
+    def __init__(self, functions, args, num):
+        """Randomly orders the given functions.
+
+        Parameters
+        ----------
+        functions : list
+            A list of functions from which to pick and call.
+        args : list
+            A list of argument lists, one for each function, like
+            call_rand_functions_arg_sets() takes.
+        num : int
+            The number of functions to successfully call.
+        """
+
+        # Must have an argument list for each function, otherwise no
+        # functions can be called
+        self.calls = []
+        if len(args) == len(functions):
+            self.calls = list(zip(functions, args))
+        random.shuffle(self.calls)
+        self.num = num
+
+
+    def requirements(self):
+        """Returns the resources the picked function calls need.
+
+        Returns the union of the requirements of the first num function
+        calls: the ones that will be made if none of them fail. If some
+        do, the functions that replace them request what they need
+        themselves.
+
+        Returns
+        -------
+        set
+            The resources, in the format UserData.prefetch() takes.
+        """
+
+        requirements = set()
+        for function, args in self.calls[:self.num]:
+            requirements.update(function_requirements(function, args))
+        return requirements
+
+
+    def call(self):
+        """Calls the functions in order until enough have succeeded.
+
+        Returns
+        -------
+        list
+            A list of the return values of each successful function
+            call, or None if not enough of the functions could be
+            successfully called.
+        """
+
+        if len(self.calls) < self.num:
+            return None
+
+        results = []
+        for function, args in self.calls:
+            if len(results) == self.num:
+                break
+
+            result = function(*args)
+            if result is not None:
+                results.append(result)
+
+        if len(results) != self.num:
+            return None
+
+        return results
@@ -0,0 +1,335 @@
+"""A rate limiter that queues requests to an API instead of failing them.
+
+The Spotify API rate limits each application, and answers a request
+over the limit with a 429 status code and a Retry-After header saying
+how many seconds to wait. This module holds RequestScheduler, which
+every request to Spotify goes through (see spoton.spotify). It keeps a
+token-bucket budget shared by every request in the process, makes
+requests wait in line for it, and when the API answers with a 429,
+holds every request back for the Retry-After time and retries the
+request, instead of failing it.
+
+The budget can optionally be shared by every server process, through
+the Django cache. In that case, a 429 seen by one process also holds
+back the requests of every other process.
+"""
+
+from collections import deque
+import threading
+import time
+
+from django.core.cache import caches
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a request has to wait in line for too long."""
+    pass
+
+
+
+class RequestScheduler:
+    """Queues requests so they stay within an API's rate limit.
+
+    Requests wait in line, first come first served, for a token from a
+    token bucket that holds up to `burst` tokens and refills at `rate`
+    tokens per second. Waiting requests sleep on a condition variable
+    until it's their turn and a token is ready, so they don't poll.
+
+    If a request is answered with a 429 (Too Many Requests), every
+    request is held back for as long as the response's Retry-After
+    header says, and the request is sent again, up to `max_retries`
+    times.
+
+    Attributes
+    ----------
+    rate : float
+        How many requests can be made per second, on average.
+    burst : int
+        How many requests can be made at once, after a quiet period.
+    max_retries : int
+        How many times a request that's answered with a 429 is retried.
+    max_wait : float
+        The longest a request waits in line, in seconds, before
+        RateLimitTimeout is raised. None to wait forever.
+    cache
+        The Django cache that the budget is shared across processes
+        with, or None to only limit this process.
+    """
+
+    def __init__(self, rate, burst, max_retries=3, max_wait=None,
+            cache_alias=None, cache_key='ratelimit'):
+        """Creates a scheduler with a full bucket and an empty line.
+
+        Parameters
+        ----------
+        rate : float
+            How many requests can be made per second, on average.
+        burst : int
+            How many requests can be made at once.
+        max_retries : int, optional
+            How many times to retry a request answered with a 429.
+            (default is 3)
+        max_wait : float, optional
+            The longest a request waits in line, in seconds. (default is
+            None: wait forever)
+        cache_alias : str, optional
+            The name of the Django cache (in the CACHES setting) to
+            share the budget and any Retry-After holds with other
+            processes through. (default is None: don't share)
+        cache_key : str, optional
+            The prefix of the keys used in that cache. (default is
+            'ratelimit')
+        """
+
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.cache = caches[cache_alias] if cache_alias else None
+        self.cache_key = cache_key
+
+        self._condition = threading.Condition()
+        self._line = deque()
+        self._tokens = burst
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0
+
+        self._requests = 0
+        self._throttled = 0
+        self._throttle_seconds = 0
+        self._rate_limited = 0
+        self._max_queue_depth = 0
+
+
+    def request(self, send):
+        """Sends a request once it's within the rate limit.
+
+        Waits in line for the budget, then calls send() to make the
+        request. If the response is a 429, holds back every request for
+        the Retry-After time and tries again.
+
+        Parameters
+        ----------
+        send : function
+            Makes the request, and returns its requests.Response.
+
+        Returns
+        -------
+        requests.models.Response
+            The response. This is only a 429 if it still was after
+            max_retries retries.
+
+        Raises
+        ------
+        RateLimitTimeout
+            If the request had to wait in line longer than max_wait.
+        """
+
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            response = send()
+
+            if response.status_code != 429:
+                break
+
+            self.hold(_retry_after(response))
+
+        return response
+
+
+    def acquire(self):
+        """Waits in line until a request can be made within the budget.
+
+        Raises
+        ------
+        RateLimitTimeout
+            If this had to wait longer than max_wait.
+        """
+
+        me = object()
+        start = time.monotonic()
+
+        with self._condition:
+            self._line.append(me)
+            self._max_queue_depth = max(self._max_queue_depth,
+                    len(self._line))
+
+            try:
+                while True:
+                    # Only the front of the line can take a token
+                    delay = None
+                    if self._line[0] is me:
+                        delay = self._delay()
+                        if delay <= 0:
+                            self._tokens -= 1
+                            break
+
+                    # Wait to be first in line, or for a token
+                    waited = time.monotonic() - start
+                    if self.max_wait is not None:
+                        if waited >= self.max_wait:
+                            raise RateLimitTimeout("Waited " + str(waited)
+                                    + " seconds for the rate limit")
+                        remaining = self.max_wait - waited
+                        delay = remaining if delay is None else min(delay, remaining)
+
+                    self._condition.wait(delay)
+
+            finally:
+                self._line.remove(me)
+                # The next in line might be able to go now
+                self._condition.notify_all()
+
+                waited = time.monotonic() - start
+                self._requests += 1
+                if waited > 0.001:
+                    self._throttled += 1
+                    self._throttle_seconds += waited
+
+
+    def hold(self, seconds):
+        """Holds back every request for the given number of seconds.
+
+        Called when the API answers with a 429. If the budget is shared
+        through the cache, holds back the other processes too.
+
+        Parameters
+        ----------
+        seconds : float
+            How long to wait before making any more requests.
+        """
+
+        until = time.time() + seconds
+
+        with self._condition:
+            self._rate_limited += 1
+            self._blocked_until = max(self._blocked_until, until)
+
+            # Everything that was allowed so far is likely what went
+            # over the limit, so start over with an empty bucket
+            self._tokens = 0
+            self._last_refill = time.monotonic()
+
+            if self.cache is not None:
+                key = self.cache_key + ':blocked_until'
+                if (self.cache.get(key) or 0) < until:
+                    self.cache.set(key, until, timeout=int(seconds) + 1)
+
+            self._condition.notify_all()
+
+
+    def metrics(self):
+        """Returns statistics about the requests that went through.
+
+        Returns
+        -------
+        dict
+            queue_depth : the number of requests waiting in line now
+            max_queue_depth : the most requests ever waiting at once
+            requests : the number of requests let through
+            throttled : how many of them had to wait
+            throttle_seconds : the total time spent waiting in line
+            rate_limited : how many 429 responses were received
+        """
+
+        with self._condition:
+            return {
+                'queue_depth': len(self._line),
+                'max_queue_depth': self._max_queue_depth,
+                'requests': self._requests,
+                'throttled': self._throttled,
+                'throttle_seconds': self._throttle_seconds,
+                'rate_limited': self._rate_limited,
+            }
+
+
+    def _delay(self):
+        """Returns how long until the next request can be made.
+
+        Refills the bucket for the time that's passed, then returns 0
+        if a request can be made right now, or otherwise the number of
+        seconds until one can. Must be called with the condition held.
+
+        Returns
+        -------
+        float
+            The number of seconds to wait, or 0.
+        """
+
+        now = time.monotonic()
+        self._tokens = min(self.burst,
+                self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+        # Held back by a 429, either seen here or by another process
+        blocked_until = self._blocked_until
+        if self.cache is not None:
+            blocked_until = max(blocked_until,
+                    self.cache.get(self.cache_key + ':blocked_until') or 0)
+        if blocked_until > time.time():
+            return blocked_until - time.time()
+
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.rate
+
+        if self.cache is not None:
+            return self._shared_delay()
+
+        return 0
+
+
+    def _shared_delay(self):
+        """Takes a slot in the budget shared by every process.
+
+        Counts this request against the current one-second window in
+        the cache. If the window is already full, takes the count back,
+        so the window only counts requests that went ahead, and returns
+        the time until the next one instead.
+
+        Returns
+        -------
+        float
+            The number of seconds to wait, or 0 if the request counted.
+        """
+
+        now = time.time()
+        key = self.cache_key + ':window:' + str(int(now))
+
+        self.cache.add(key, 0, timeout=2)
+        try:
+            count = self.cache.incr(key)
+        except ValueError:
+            # The key expired in between, so this window is over
+            return 0
+
+        if count > self.rate:
+            try:
+                self.cache.decr(key)
+            except ValueError:
+                pass
+            return int(now) + 1 - now
+
+        return 0
+
+
+
+def _retry_after(response, default=1):
+    """Returns the seconds a 429 response says to wait before retrying.
+
+    Parameters
+    ----------
+    response : requests.models.Response
+        The 429 response.
+    default : float, optional
+        The seconds to wait if the response doesn't say. (default is 1)
+
+    Returns
+    -------
+    float
+        The number of seconds to wait.
+    """
+
+    try:
+        return max(0, float(response.headers.get('Retry-After')))
+    except (TypeError, ValueError):
+        return default
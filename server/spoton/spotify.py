@@ -16,9 +16,24 @@ make_authorized_request(session, url, full_url=False, query_dict={},
 data={}, raise_on_error=True)
     Makes an authorized request to the Spotify API using the tokens
     in the given sessions.
+make_paged_request(session, url, query_dict={}, container=None)
+    Makes authorized requests for every page of a paged Spotify
+    endpoint, several at once, and returns all of the items.
 make_noauth_request(url, data={})
     Makes a request to the Spotify API that doesn't require any
     authorization.
+get_http_session()
+    Returns the pooled, keep-alive HTTP session that every request to
+    Spotify goes through.
+get_request_scheduler()
+    Returns the rate limiter that every request to Spotify waits in
+    line for. Its metrics() describe how much requests are throttled.
+response_cache_metrics()
+    Returns how often authorized requests were answered from the
+    conditional-request response cache.
+noauth_token_metrics()
+    Returns how often the shared Non-Authorized Access Token was
+    reused, and how often it had to be requested.
 
 Notes
 -----
@@ -68,14 +83,23 @@ https://developer.spotify.com/documentation/general/guides/authorization-guide/#
 
 import atexit
 import base64
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import os
 import requests
 import threading
+import time
 import urllib
 from urllib.parse import urlencode
 
+from django.conf import settings
+from django.core.cache import caches
 from django.shortcuts import redirect
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from spoton.lrucache import LRUCache
+from spoton.ratelimit import RequestScheduler, RateLimitTimeout
 
 
 logger = logging.getLogger(__name__)
@@ -130,6 +154,32 @@ AUTH_ACCESS_TOKEN = 'auth_access_token'
 
 
 
+"""Constant session dictionary keys
+
+An Authorized Access Token expires some time after it's issued. Instead
+of deleting the token when it expires, the session stores the time (in
+seconds since the epoch) that it expires, and the earlier time at which
+a new token should be requested, so that a request never goes out with
+a token that's just about to expire. Both are checked whenever the
+token is read, see _get_auth_access_token().
+"""
+AUTH_ACCESS_TOKEN_EXPIRES = 'auth_access_token_expires'
+AUTH_ACCESS_TOKEN_REFRESH_AT = 'auth_access_token_refresh_at'
+
+
+
+"""Global variables
+
+Requests for each user's Authorized Access Token that are in progress,
+by the user's Spotify ID. When several threads need a new token for the
+same user at once, only the first one requests it and the rest wait for
+it, see _refresh_authorized_token().
+"""
+_auth_refreshes = {}
+_auth_refreshes_lock = threading.Lock()
+
+
+
 """A constant session dictionary key 
 
 A Refresh Token allows a user to stay indefinitely "logged in" to their
@@ -152,19 +202,87 @@ USER_ID = 'user_id'
 
 
 
-"""A global variable 
+"""A constant cache key
 
 To access public Spotify data, we don't need authorization from any
 particular user. We just need to give Spotify assurance that the
 application has permission to use Spotify data, which comes in the form
 of a Non-Authorized Access Token. The same token can be used across all
-user sessions, so it is stored here as a global variable.
+user sessions, and across every server process, so it is stored in the
+Django cache (the one named by the SPOTIFY_TOKEN_CACHE setting) under
+this key, along with the times it expires and should be refreshed at.
+"""
+NOAUTH_ACCESS_TOKEN = 'spotify_noauth_access_token'
+
+"""A constant cache key
+
+Whichever caller manages to add this key to the cache is the one that
+requests a new Non-Authorized Access Token. Every other caller, in any
+server process, reuses the old token or waits for the new one. See
+_get_noauth_access_token().
 """
-noauth_access_token = None
+NOAUTH_ACCESS_TOKEN_LEASE = 'spotify_noauth_access_token_lease'
 
+"""Global variables
+
+Only one thread in each process tries to take the lease on refreshing
+the Non-Authorized Access Token at a time. The counters record how many
+times the token was read from the cache (hits), wasn't there or was
+about to expire (misses), and was actually requested (refreshes). See
+noauth_token_metrics().
+"""
+_noauth_refresh_lock = threading.Lock()
+_noauth_metrics_lock = threading.Lock()
+_noauth_metrics = {'hits': 0, 'misses': 0, 'refreshes': 0}
 
 
 
+"""The base URL of every Spotify Web API endpoint"""
+SPOTIFY_API_URL = 'https://api.spotify.com'
+
+"""The Spotify endpoint that hands out every kind of access token"""
+SPOTIFY_TOKEN_URL = 'https://accounts.spotify.com/api/token'
+
+
+
+"""A global variable
+
+Every request this module makes to Spotify goes through one pooled HTTP
+session per process, so that TCP and TLS connections to Spotify's
+servers are kept alive and reused instead of being opened for every
+request. It is created the first time it's needed, see
+get_http_session().
+"""
+http_session = None
+_http_session_lock = threading.Lock()
+
+
+
+"""A global variable
+
+Spotify rate limits this application as a whole, so every request to
+Spotify from this process waits in line for the same rate limit budget,
+and is retried when Spotify says it's over the limit. It is created the
+first time it's needed, see get_request_scheduler().
+"""
+request_scheduler = None
+_request_scheduler_lock = threading.Lock()
+
+
+
+"""A global variable
+
+Spotify answers most GET requests with an ETag, and answers a request
+that sends that ETag back in If-None-Match with an empty 304 when the
+data hasn't changed. This caches the last body of each authorized GET,
+by user and URL, so make_authorized_request() can make conditional
+requests and reuse the body on a 304. It is created the first time it's
+needed, see get_response_cache().
+"""
+response_cache = None
+_response_cache_lock = threading.Lock()
+_response_cache_metrics = {'not_modified': 0}
+
 
 
 # Load in the Spotify app client authorization from an external file
@@ -176,35 +294,279 @@ f.close()
 
 
 
+def get_http_session():
+    """Returns the process-wide pooled HTTP session used for Spotify.
 
-def cleanup_timers():
-    """Cancels any running timers spawned by this module.
+    Returns the requests.Session that every request to Spotify goes
+    through, creating it the first time this is called. The session
+    keeps connections to each of Spotify's hosts alive in a connection
+    pool, so consecutive requests skip the TCP and TLS handshakes.
 
-    Cancels any currently running timers (threading.Timer) that were
-    created by this module (to clear tokens after they expire).
+    The pool is configured with these Django settings:
 
-    See Also
-    --------
-    _set_auth_access_token, _set_noauth_access_token
+    SPOTIFY_HTTP_POOL_CONNECTIONS
+        The number of hosts to keep a connection pool for.
+    SPOTIFY_HTTP_POOL_MAXSIZE
+        The maximum number of connections kept open to any one host.
+    SPOTIFY_HTTP_HOST_POOL_MAXSIZE
+        A dict of hostname to maximum number of connections, which
+        overrides SPOTIFY_HTTP_POOL_MAXSIZE for those hosts.
+    SPOTIFY_HTTP_POOL_BLOCK
+        Whether a request should wait for a free connection when its
+        host's pool is used up, rather than opening a connection that
+        won't be kept. This is what enforces the per-host limits.
+
+    Returns
+    -------
+    requests.Session
+        The pooled HTTP session.
     """
 
-    for t in threading.enumerate():
-        if isinstance(t, threading.Timer):
+    global http_session
+    if http_session is None:
+        with _http_session_lock:
+            if http_session is None:
+                http_session = _create_http_session()
+    return http_session
+
+
+
+def close_http_session():
+    """Closes the pooled HTTP session and all of its connections.
+
+    Closes the session returned by get_http_session(), if there is one.
+    The next request to Spotify will create a new session, with
+    whatever the settings are at that point.
+    """
+
+    global http_session
+    with _http_session_lock:
+        if http_session is not None:
+            http_session.close()
+            http_session = None
+
+
+# Close any kept-alive connections when the server exits
+atexit.register(close_http_session)
+
+
+
+def get_request_scheduler():
+    """Returns the process-wide rate limiter for requests to Spotify.
+
+    Returns the RequestScheduler (see spoton.ratelimit) that every
+    request to Spotify waits in line for, creating it the first time
+    this is called. It's configured with these Django settings:
+
+    SPOTIFY_RATE_LIMIT_RATE
+        How many requests can be made per second, on average.
+    SPOTIFY_RATE_LIMIT_BURST
+        How many requests can be made at once.
+    SPOTIFY_RATE_LIMIT_MAX_RETRIES
+        How many times a request Spotify answers with a 429 is retried,
+        after waiting for as long as its Retry-After header says.
+    SPOTIFY_RATE_LIMIT_MAX_WAIT
+        The most seconds a request waits in line before it fails.
+    SPOTIFY_RATE_LIMIT_CACHE
+        The name of a Django cache to share the budget with every other
+        server process through, or None to only limit this process.
+
+    Returns
+    -------
+    spoton.ratelimit.RequestScheduler
+        The rate limiter.
+    """
+
+    global request_scheduler
+    if request_scheduler is None:
+        with _request_scheduler_lock:
+            if request_scheduler is None:
+                request_scheduler = RequestScheduler(
+                    rate=getattr(settings, 'SPOTIFY_RATE_LIMIT_RATE', 25),
+                    burst=getattr(settings, 'SPOTIFY_RATE_LIMIT_BURST', 50),
+                    max_retries=getattr(settings, 'SPOTIFY_RATE_LIMIT_MAX_RETRIES', 3),
+                    max_wait=getattr(settings, 'SPOTIFY_RATE_LIMIT_MAX_WAIT', 30),
+                    cache_alias=getattr(settings, 'SPOTIFY_RATE_LIMIT_CACHE', None),
+                    cache_key='spotify_ratelimit')
+    return request_scheduler
+
+
+
+def reset_request_scheduler():
+    """Throws away the rate limiter, along with its budget and metrics.
+
+    The next request to Spotify will create a new one, with whatever
+    the settings are at that point.
+    """
+
+    global request_scheduler
+    with _request_scheduler_lock:
+        request_scheduler = None
 
-            # Only cancel timers that this module spawned, i.e.
-            # ones that clear Access Tokens.
-            if (t.function == _clear_auth_access_token) or \
-                    (t.function == _clear_noauth_access_token):
-                t.function(*t.args)
-            t.cancel()
-    
 
-# If timers are still running when the server is quit or tests
-# complete, the program will fully end, and they'll need a SIGINT (^C)
-# to return to the terminal. This will cancel all timers when the
-# server exits so that it will properly exit and return to the
-# terminal.
-atexit.register(cleanup_timers)
+
+def get_response_cache():
+    """Returns the process-wide cache of authorized GET responses.
+
+    Returns the LRUCache (see spoton.lrucache) that
+    make_authorized_request() keeps ETags and bodies in, keyed by
+    (user ID, URL), creating it the first time this is called. It's
+    configured with these Django settings:
+
+    SPOTIFY_RESPONSE_CACHE_MAX_BYTES
+        The most bytes of response bodies to keep, or 0 to not cache
+        responses at all.
+    SPOTIFY_RESPONSE_CACHE_TTL
+        How many seconds a response is kept after it was last received
+        in full.
+
+    Returns
+    -------
+    spoton.lrucache.LRUCache
+        The response cache.
+    """
+
+    global response_cache
+    if response_cache is None:
+        with _response_cache_lock:
+            if response_cache is None:
+                response_cache = LRUCache(
+                    max_size=getattr(settings,
+                        'SPOTIFY_RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024),
+                    ttl=getattr(settings, 'SPOTIFY_RESPONSE_CACHE_TTL', 3600),
+                    size=lambda entry: len(entry['content']))
+    return response_cache
+
+
+
+def reset_response_cache():
+    """Throws away the response cache, along with its metrics.
+
+    The next authorized request will create a new one, with whatever
+    the settings are at that point.
+    """
+
+    global response_cache
+    with _response_cache_lock:
+        response_cache = None
+        _response_cache_metrics['not_modified'] = 0
+
+
+
+def response_cache_metrics():
+    """Returns statistics about the conditional-request response cache.
+
+    Returns
+    -------
+    dict
+        The statistics of the LRUCache (see LRUCache.stats()), where a
+        hit is a request sent with If-None-Match, and:
+        not_modified : how many requests were answered with a 304, and
+            served from the cache
+        not_modified_ratio : not_modified out of all lookups, or 0 if
+            there were none
+    """
+
+    stats = get_response_cache().stats()
+    lookups = stats['hits'] + stats['misses']
+    with _response_cache_lock:
+        stats['not_modified'] = _response_cache_metrics['not_modified']
+    stats['not_modified_ratio'] = \
+            stats['not_modified'] / lookups if lookups else 0
+    return stats
+
+
+
+def _create_http_session():
+    """Creates a requests.Session with a pool configured from settings.
+
+    Returns
+    -------
+    requests.Session
+        A new session, with a connection pool mounted for every
+        Spotify URL. See get_http_session() for the settings used.
+    """
+
+    pool_connections = getattr(settings, 'SPOTIFY_HTTP_POOL_CONNECTIONS', 4)
+    pool_maxsize = getattr(settings, 'SPOTIFY_HTTP_POOL_MAXSIZE', 10)
+    pool_block = getattr(settings, 'SPOTIFY_HTTP_POOL_BLOCK', True)
+    host_maxsizes = getattr(settings, 'SPOTIFY_HTTP_HOST_POOL_MAXSIZE', {})
+
+    session = requests.Session()
+
+    # The default pool, used by any host without its own limit
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize, pool_block=pool_block)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    # Hosts with their own limits get their own pool. requests picks
+    # the adapter with the longest matching prefix.
+    for host, maxsize in host_maxsizes.items():
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=maxsize,
+                pool_block=pool_block)
+        session.mount('https://' + host, adapter)
+
+    return session
+
+
+
+def _http_timeout():
+    """Returns the (connect, read) timeout for requests to Spotify.
+
+    The timeouts come from the SPOTIFY_HTTP_CONNECT_TIMEOUT and
+    SPOTIFY_HTTP_READ_TIMEOUT Django settings, in seconds.
+
+    Returns
+    -------
+    tuple
+        The connect timeout and the read timeout, in seconds.
+    """
+
+    return (getattr(settings, 'SPOTIFY_HTTP_CONNECT_TIMEOUT', 3.05),
+            getattr(settings, 'SPOTIFY_HTTP_READ_TIMEOUT', 15))
+
+
+
+def _http_request(method, url, **kwargs):
+    """Makes an HTTP request to Spotify through the pooled session.
+
+    The request waits in line for the rate limit first, and is retried
+    if Spotify answers that it's over the limit (see
+    get_request_scheduler()).
+
+    Takes the same arguments as requests.request(). If no timeout is
+    given, the configured Spotify timeouts are used.
+
+    Parameters
+    ----------
+    method : str
+        The HTTP method of the request, like 'GET' or 'POST'.
+    url : str
+        The full URL to make the request to.
+    **kwargs
+        Any other arguments to pass along to requests.
+
+    Returns
+    -------
+    requests.models.Response
+        The results of the request.
+
+    Raises
+    ------
+    SpotifyRequestException
+        If the request waited in line for the rate limit for too long.
+    """
+
+    kwargs.setdefault('timeout', _http_timeout())
+
+    def send():
+        return get_http_session().request(method, url, **kwargs)
+
+    try:
+        return get_request_scheduler().request(send)
+    except RateLimitTimeout as e:
+        raise SpotifyRequestException(url + ": " + str(e))
 
 
 
@@ -311,8 +673,8 @@ def login(session, authorization_code, redirect_url):
     headers = {
         'Authorization': 'Basic '+ str(client_authorization, "utf-8"),
     }
-    url = 'https://accounts.spotify.com/api/token'
-    results = requests.post(url, data=data, headers=headers)
+    url = SPOTIFY_TOKEN_URL
+    results = _http_request('POST', url, data=data, headers=headers)
 
     # Authorized Access Code request failed
     if results.status_code != 200:
@@ -343,8 +705,8 @@ def login(session, authorization_code, redirect_url):
     headers = {
         'Authorization': "Bearer " + access_token
     }
-    url = "https://api.spotify.com/v1/me"
-    results = requests.get(url=url, headers=headers)
+    url = SPOTIFY_API_URL + "/v1/me"
+    results = _http_request('GET', url, headers=headers)
 
     # Personal info request failed
     if results.status_code != 200:
@@ -448,10 +810,35 @@ def make_authorized_request(session, url, full_url=False, query_dict={}, data={}
     # If url type is relative, assemble full URL.
     final_url = url
     if not full_url:
-        final_url = "https://api.spotify.com" + url + query_string
+        final_url = SPOTIFY_API_URL + url + query_string
+
+    # If this user got this URL before, ask Spotify to only send it
+    # again if it changed
+    cache = get_response_cache()
+    cache_key = None
+    cached = None
+    user_id = get_user_id(session)
+    if user_id is not None and not data and cache.max_size > 0:
+        cache_key = (user_id, final_url)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            headers['If-None-Match'] = cached['etag']
 
     # Make the GET request
-    results = requests.get(url=final_url, data=data, headers=headers)
+    results = _http_request('GET', final_url, data=data, headers=headers)
+
+    if results.status_code == 304 and cached is not None:
+        with _response_cache_lock:
+            _response_cache_metrics['not_modified'] += 1
+        results = _cached_response(cached, final_url)
+    elif results.status_code == 200 and cache_key is not None \
+            and results.headers.get('ETag'):
+        cache.set(cache_key, {
+            'etag': results.headers['ETag'],
+            'content': results.content,
+            'headers': dict(results.headers),
+            'encoding': results.encoding,
+        })
 
     if results.status_code != 200 and raise_on_error:
         raise SpotifyRequestException(final_url + " returned " + str(results.status_code))
@@ -460,6 +847,83 @@ def make_authorized_request(session, url, full_url=False, query_dict={}, data={}
 
 
 
+def make_paged_request(session, url, query_dict={}, container=None,
+        max_workers=None):
+    """Requests every page of a paged Spotify endpoint, for a user.
+
+    Makes an authorized request (see make_authorized_request() ) to a
+    Spotify endpoint that returns its items a page at a time, and
+    returns the items from every page, in order.
+
+    Most paged endpoints are offset-based: the first page says how many
+    items there are in total, so the rest of the pages are requested at
+    once, by offset, at most max_workers at a time. Cursor-based
+    endpoints (like /v1/me/following) only say where the next page is,
+    so their pages are requested one after another.
+
+    Parameters
+    ----------
+    session : django.contrib.sessions.backend.db.SessionStore
+        The user's session object (retrieved from a Django request)
+    url : str
+        The Spotify API endpoint's URL to make the request to, relative
+        to 'https://api.spotify.com', with a leading '/'.
+    query_dict : dict, optional
+        A dictionary of key/value pairs to append on the URL's query
+        string, like the page size under 'limit'. (default is empty)
+    container : str, optional
+        The key in the response JSON that the paging object is under,
+        for endpoints that don't return it at the top level, like
+        'artists' for /v1/me/following. (default is None)
+    max_workers : int, optional
+        The most pages to request at once. (default is the
+        SPOTIFY_PAGED_REQUEST_WORKERS setting, or 4)
+
+    Returns
+    -------
+    list
+        The items of every page, in order.
+    """
+
+    def get_page(json):
+        return json[container] if container else json
+
+    page = get_page(make_authorized_request(session, url,
+            query_dict=query_dict).json())
+    items = list(page['items'])
+
+    total = page.get('total')
+    limit = page.get('limit') or len(page['items'])
+
+    # Cursor-based pages don't have a total, so follow them one by one
+    if 'cursors' in page or total is None or not limit:
+        while page.get('next'):
+            page = get_page(make_authorized_request(session, page['next'],
+                    full_url=True).json())
+            items.extend(page['items'])
+        return items
+
+    offsets = range(page.get('offset', 0) + limit, total, limit)
+    if not offsets:
+        return items
+
+    if max_workers is None:
+        max_workers = getattr(settings, 'SPOTIFY_PAGED_REQUEST_WORKERS', 4)
+
+    def get_offset(offset):
+        page_query = dict(query_dict, offset=offset, limit=limit)
+        return get_page(make_authorized_request(session, url,
+                query_dict=page_query).json())['items']
+
+    # map() returns the pages in the order of their offsets
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for page_items in executor.map(get_offset, offsets):
+            items.extend(page_items)
+
+    return items
+
+
+
 def make_noauth_request(url, data={}):
     """Makes a GET request to Spotify that requires no authorization.
 
@@ -487,6 +951,12 @@ def make_noauth_request(url, data={}):
     -------
     requests.models.Response 
         The results of the successful GET request.
+
+    Raises
+    ------
+    SpotifyRequestException
+        If the request fails, or there's no Non-Authorized Access Token
+        to make it with (see _get_noauth_access_token() ).
     """
 
     # Get Spotify client app's authorization
@@ -495,15 +965,43 @@ def make_noauth_request(url, data={}):
         'Authorization': 'Bearer ' + token
     }
 
-    full_url = 'https://api.spotify.com' + url
+    full_url = SPOTIFY_API_URL + url
 
     # Make the request
-    results = requests.get(url=full_url, data=data, headers=headers)
+    results = _http_request('GET', full_url, data=data, headers=headers)
 
     return results
 
 
 
+def _cached_response(entry, url):
+    """Builds a 200 response out of a response cache entry.
+
+    Parameters
+    ----------
+    entry : dict
+        The entry in the response cache (see get_response_cache() ),
+        with the body, headers and encoding of the original response.
+    url : str
+        The URL that was requested.
+
+    Returns
+    -------
+    requests.models.Response
+        A new response, like the original one.
+    """
+
+    response = requests.models.Response()
+    response.status_code = 200
+    response.reason = 'OK'
+    response.url = url
+    response._content = entry['content']
+    response.headers = CaseInsensitiveDict(entry['headers'])
+    response.encoding = entry['encoding']
+    return response
+
+
+
 def _request_authorized_token(session):
     """Requests and saves an Authorized Access Token from Spotify.
 
@@ -538,10 +1036,10 @@ def _request_authorized_token(session):
     headers = {
         'Authorization': 'Basic '+ str(client_authorization, "utf-8"),
     }
-    url = 'https://accounts.spotify.com/api/token'
+    url = SPOTIFY_TOKEN_URL
 
     # Make the request
-    result = requests.post(url, data=data, headers=headers)
+    result = _http_request('POST', url, data=data, headers=headers)
     
     # if request failed
     if result.status_code != 200:
@@ -567,7 +1065,7 @@ def _request_noauth_access_token():
     """Requests and saves a Non-Authorized Access Token from Spotify.
 
     Requests a Non-Authorized Access Token from the Spotify API, which
-    will be saved globally.
+    will be saved in the cache for every server process to use.
     """
 
     # The Spotify app's credentials
@@ -577,10 +1075,10 @@ def _request_noauth_access_token():
     headers = {
         'Authorization': 'Basic '+ str(client_authorization, "utf-8"),
     }
-    url = 'https://accounts.spotify.com/api/token'
+    url = SPOTIFY_TOKEN_URL
      
     # Make the request
-    result = requests.post(url, data=data, headers=headers)
+    result = _http_request('POST', url, data=data, headers=headers)
 
     # If request failed
     if result.status_code != 200:
@@ -590,7 +1088,7 @@ def _request_noauth_access_token():
 
     json = result.json()
 
-    # Get the access token and save it globally
+    # Get the access token and save it for every process
     access_token = json.get('access_token')
     timeout = json.get('expires_in')
     _set_noauth_access_token(access_token, timeout)
@@ -703,8 +1201,11 @@ def _get_auth_access_token(session):
     """If a user is logged in, returns the session's auth access token.
 
     Returns the Spotify Authorized Access Token, if there is one, from
-    the given session. If there is not one, requests one from the
-    Spotify API and returns it.
+    the given session. If there is not one, or it's about to expire,
+    requests a new one from the Spotify API and returns it. If that
+    request fails, the old token is returned until it actually expires.
+    If the same user's token is already being requested, waits for that
+    request instead of making another (see _refresh_authorized_token()).
 
     This requires a Spotify user to be logged into the session with
     the login() function. If no user is logged in, an error will
@@ -719,22 +1220,98 @@ def _get_auth_access_token(session):
     -------
     str
         An Authorized Access Token associated with the Spotify user
-        logged into the session.
+        logged into the session, or None if there's no unexpired token.
     """
 
     token = session.get(AUTH_ACCESS_TOKEN)
-    if token:
+    if token and time.time() < (session.get(AUTH_ACCESS_TOKEN_REFRESH_AT) or 0):
         return token
 
-    _request_authorized_token(session)
-    return session.get(AUTH_ACCESS_TOKEN)
+    _refresh_authorized_token(session)
+
+    if time.time() < (session.get(AUTH_ACCESS_TOKEN_EXPIRES) or 0):
+        return session.get(AUTH_ACCESS_TOKEN)
+    return None
+
+
+def _refresh_authorized_token(session):
+    """Requests a new auth access token, once per user at a time.
+
+    Requests a new Authorized Access Token for the user logged into the
+    given session, and saves it in the session. If a token is already
+    being requested for the same Spotify user, by any thread in this
+    process, doesn't make another request: waits for that one to finish
+    and saves the same token (and Refresh Token) in this session too.
+
+    Parameters
+    ----------
+    session : django.contrib.sessions.backend.db.SessionStore
+        The user's session object (retrieved from a Django request)
+    """
+
+    # Sessions are matched up by user. Before the user ID is known,
+    # their Refresh Token identifies them just as well.
+    key = get_user_id(session) or _get_refresh_token(session)
+    if key is None:
+        # No one's logged in, so this raises an exception
+        _request_authorized_token(session)
+        return
+
+    with _auth_refreshes_lock:
+        refresh = _auth_refreshes.get(key)
+        leader = refresh is None
+        if leader:
+            refresh = _AuthRefresh()
+            _auth_refreshes[key] = refresh
+
+    if leader:
+        try:
+            _request_authorized_token(session)
+            refresh.values = {k: session.get(k) for k in _AUTH_REFRESH_KEYS}
+        finally:
+            with _auth_refreshes_lock:
+                del _auth_refreshes[key]
+            refresh.done.set()
+        return
+
+    # Another caller is requesting the token; wait for theirs
+    timeout = getattr(settings, 'SPOTIFY_TOKEN_LEASE_TIMEOUT', 10)
+    if refresh.done.wait(timeout) and refresh.values:
+        for k, value in refresh.values.items():
+            if value is not None:
+                session[k] = value
+
+
+
+class _AuthRefresh:
+    """A request for one user's auth access token that others wait on.
+
+    Attributes
+    ----------
+    done : threading.Event
+        Set once the request has finished, whether it worked or not.
+    values : dict
+        The session values the request saved (see _AUTH_REFRESH_KEYS),
+        or None if it raised an exception.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.values = None
+
+
+
+"""The session keys a token refresh saves, copied to waiting sessions"""
+_AUTH_REFRESH_KEYS = [AUTH_ACCESS_TOKEN, AUTH_ACCESS_TOKEN_EXPIRES,
+        AUTH_ACCESS_TOKEN_REFRESH_AT, REFRESH_TOKEN]
+
 
 
 def _set_auth_access_token(session, token, timeout):
     """Stores an auth access token in a user session for some length.
 
-    Stores the given Authorized Access Token in the given user session.
-    The token will be deleted after the given number of seconds. This
+    Stores the given Authorized Access Token in the given user session,
+    along with when it expires, after the given number of seconds. This
     token is used to request private user data from the Spotify API for
     whatever Spotify user the token is generated for.
 
@@ -748,18 +1325,18 @@ def _set_auth_access_token(session, token, timeout):
         The time (in seconds) after which the token expires.
     """
 
-    session[AUTH_ACCESS_TOKEN] = token
+    expires, refresh_at = _token_expiry(timeout)
 
-    # Set a timer to delete the token 
-    timer = threading.Timer(timeout, _clear_auth_access_token, [session])
-    timer.start()
+    session[AUTH_ACCESS_TOKEN] = token
+    session[AUTH_ACCESS_TOKEN_EXPIRES] = expires
+    session[AUTH_ACCESS_TOKEN_REFRESH_AT] = refresh_at
 
 
 def _clear_auth_access_token(session):
     """Deletes the Spotify auth access token in the given session.
 
     Deletes the Authorized Access Token in the given session, if there
-    is one. This is used to delete the token after it expires.
+    is one, along with its expiry times.
 
     Parameters
     ----------
@@ -768,26 +1345,129 @@ def _clear_auth_access_token(session):
     """
 
     session[AUTH_ACCESS_TOKEN] = None
+    session[AUTH_ACCESS_TOKEN_EXPIRES] = None
+    session[AUTH_ACCESS_TOKEN_REFRESH_AT] = None
 
 
 def _get_noauth_access_token():
     """Returns a valid noauth access token.
 
-    Returns the session's Non-Authorized Access Token, if it exists. If
-    it doesn't exist, requests one from the Spotify API and returns it.
+    Returns the server's Non-Authorized Access Token, if it exists. If
+    it doesn't exist, or it's about to expire, requests a new one from
+    the Spotify API and returns it.
+
+    Only one caller across every server process requests a new token
+    at a time: the one that takes the lease in the cache. While it does,
+    the others keep using the old token if it hasn't expired yet, and
+    otherwise wait for the new one. If the request fails, the old token
+    is returned until it actually expires.
 
     Returns
     -------
     str
-        A valid Non-Authorized Access Token
+        A valid Non-Authorized Access Token.
+
+    Raises
+    ------
+    SpotifyRequestException
+        If there's no unexpired token, and no new one could be gotten,
+        like when another process held the lease for too long.
     """
 
-    global noauth_access_token
-    if noauth_access_token:
-        return noauth_access_token
+    entry = _load_noauth_access_token()
+    if entry and time.time() < entry['refresh_at']:
+        _count_noauth_metric('hits')
+        return entry['token']
+
+    _count_noauth_metric('misses')
+
+    # If another thread here is already refreshing the token, use the
+    # old one while it's still valid instead of waiting
+    if _unexpired(entry):
+        if not _noauth_refresh_lock.acquire(blocking=False):
+            return entry['token']
+    else:
+        _noauth_refresh_lock.acquire()
+
+    try:
+        # It may have been refreshed while waiting for the lock
+        entry = _load_noauth_access_token()
+        if entry and time.time() < entry['refresh_at']:
+            return entry['token']
+
+        cache = _token_cache()
+        lease_timeout = getattr(settings, 'SPOTIFY_TOKEN_LEASE_TIMEOUT', 10)
+        if cache.add(NOAUTH_ACCESS_TOKEN_LEASE, True, timeout=lease_timeout):
+            try:
+                _count_noauth_metric('refreshes')
+                _request_noauth_access_token()
+            finally:
+                cache.delete(NOAUTH_ACCESS_TOKEN_LEASE)
+            entry = _load_noauth_access_token()
+
+        elif not _unexpired(entry):
+            # Another process is requesting a token and there's no
+            # valid one in the meantime, so wait for it
+            deadline = time.time() + lease_timeout
+            while time.time() < deadline and cache.get(NOAUTH_ACCESS_TOKEN_LEASE):
+                time.sleep(0.05)
+            entry = _load_noauth_access_token()
+
+    finally:
+        _noauth_refresh_lock.release()
+
+    if _unexpired(entry):
+        return entry['token']
+    raise SpotifyRequestException(
+            "Couldn't get a Non-Authorized Access Token")
+
+
 
-    _request_noauth_access_token()
-    return noauth_access_token
+def noauth_token_metrics():
+    """Returns how the Non-Authorized Access Token has been used.
+
+    The counts are for this process only.
+
+    Returns
+    -------
+    dict
+        hits : how many times the token was read from the cache
+        misses : how many times it was missing or about to expire
+        refreshes : how many times a new token was requested
+    """
+
+    with _noauth_metrics_lock:
+        return dict(_noauth_metrics)
+
+
+
+def _count_noauth_metric(name):
+    """Adds one to one of the counters noauth_token_metrics() returns."""
+
+    with _noauth_metrics_lock:
+        _noauth_metrics[name] += 1
+
+
+
+def _load_noauth_access_token():
+    """Returns the cached noauth access token and its expiry times.
+
+    Returns
+    -------
+    dict
+        The token under 'token', and the times it expires and should
+        be refreshed at (in seconds since the epoch) under 'expires'
+        and 'refresh_at'. None if there's no token in the cache.
+    """
+
+    return _token_cache().get(NOAUTH_ACCESS_TOKEN)
+
+
+
+def _unexpired(entry):
+    """Returns whether a cached token entry holds an unexpired token."""
+
+    return bool(entry and entry['token'] and time.time() < entry['expires'])
 
 
 
@@ -797,8 +1477,8 @@ def _set_noauth_access_token(token, timeout):
     Sets the Spotify Non-Authorized Access Token for the server. This
     token is used to request public data from the Spotify API. Because
     it doesn't require any special user permissions, there is one token
-    for the entire server. The token will deleted after the given
-    number of seconds.
+    for the entire server, kept in the cache. The token expires after
+    the given number of seconds.
 
     Parameters
     ----------
@@ -808,19 +1488,64 @@ def _set_noauth_access_token(token, timeout):
         The time (in seconds) after which the token expires.
     """
 
-    global noauth_access_token
-    noauth_access_token = token
-    timer = threading.Timer(timeout, _clear_noauth_access_token)
-    timer.start()
+    expires, refresh_at = _token_expiry(timeout)
+    entry = {
+        'token': token,
+        'expires': expires,
+        'refresh_at': refresh_at,
+    }
+    _token_cache().set(NOAUTH_ACCESS_TOKEN, entry, timeout=timeout)
 
 
 def _clear_noauth_access_token():
-    """Deletes the Spotify noauth access token from the given session.
+    """Deletes the Spotify noauth access token.
+
+    Deletes the Non-Authorized Access Token from the cache, if it
+    exists.
+    """
+
+    _token_cache().delete(NOAUTH_ACCESS_TOKEN)
+
+
+
+def _token_cache():
+    """Returns the Django cache that access tokens are shared through.
+
+    This is the cache named by the SPOTIFY_TOKEN_CACHE setting. To
+    share tokens between server processes, it should be a cache they
+    all use, like Memcached or Redis, rather than the default
+    local-memory cache.
 
-    Deletes the Non-Authorized Access Token from the given session, if
-    it exists. This is used to delete the token after it expires.
+    Returns
+    -------
+    django.core.cache.backends.base.BaseCache
+        The cache.
     """
 
-    global noauth_access_token
-    noauth_access_token = None
+    return caches[getattr(settings, 'SPOTIFY_TOKEN_CACHE', 'default')]
+
+
+
+def _token_expiry(timeout):
+    """Returns when a token issued now expires and should be refreshed.
+
+    A token should be refreshed some time before it expires, so that
+    requests that are already on their way with it don't fail. That
+    time is the SPOTIFY_TOKEN_REFRESH_SKEW setting (in seconds), but
+    never more than half of the token's lifetime.
+
+    Parameters
+    ----------
+    timeout : int
+        The time (in seconds) after which the token expires.
+
+    Returns
+    -------
+    tuple
+        The time the token expires and the time it should be refreshed
+        at, both in seconds since the epoch.
+    """
 
+    now = time.time()
+    skew = min(getattr(settings, 'SPOTIFY_TOKEN_REFRESH_SKEW', 60), timeout / 2)
+    return now + timeout, now + timeout - skew
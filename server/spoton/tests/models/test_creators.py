@@ -7,6 +7,7 @@ from django.test import TestCase, TransactionTestCase
 
 from spoton.models.quiz import *
 from spoton.models.creators import *
+from spoton.models.drafts import QuestionDraft, QuizDraft
 
 
 class ChoiceCreationFunctionTests(TransactionTestCase):
@@ -1053,3 +1054,49 @@ class GetLargestImageTests(TestCase):
         self.assertIsNone(url)
 
 
+
+
+
+
+class CreateObjectTests(TestCase):
+    """
+    Tests create_object(), which saves the model object it creates,
+    unless it belongs to a draft, in which case it creates a draft.
+    """
+
+    def test_create_object(self):
+        """
+        For a saved quiz, create_object() should save the objects it
+        creates.
+        """
+        quiz = Quiz.objects.create(user_id='cassius')
+
+        q = create_object(CheckboxQuestion, quiz=quiz, text='Question')
+        c = create_genre_choice(q, 'pop', answer=True)
+
+        self.assertIsInstance(q, CheckboxQuestion)
+        self.assertEqual(q.choices.get(), c)
+
+
+    def test_create_object_draft(self):
+        """
+        For a quiz draft, create_object() and the choice creation
+        functions should only create drafts, without any queries.
+        """
+        quiz = QuizDraft(user_id='cassius')
+
+        with self.assertNumQueries(0):
+            q = create_object(CheckboxQuestion, quiz=quiz, text='Question',
+                    multiselect=True)
+            create_genre_choice(q, 'pop', answer=True)
+            create_genre_choices(q, ['rock', 'ska'])
+
+        self.assertIsInstance(q, QuestionDraft)
+        self.assertIs(q.model, CheckboxQuestion)
+        self.assertIs(q.quiz, quiz)
+        self.assertEqual(q.fields, {'text': 'Question', 'multiselect': True})
+        self.assertEqual([c.fields['primary_text'] for c in q.choices],
+                ['pop', 'rock', 'ska'])
+        self.assertEqual([c.fields['answer'] for c in q.choices],
+                [True, False, False])
+        self.assertEqual(Question.objects.count(), 0)
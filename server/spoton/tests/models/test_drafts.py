@@ -0,0 +1,164 @@
+"""Tests the in-memory drafts of a quiz, and saving them.
+
+Tests the file spoton/models/drafts.py.
+"""
+
+import json
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.test import TestCase
+
+from spoton.models.creators import *
+from spoton.models.drafts import *
+from spoton.models.quiz import *
+from spoton.models.utils import STRUCTURAL_VALIDATION, validation_policy
+
+
+class DraftTests(TestCase):
+    """
+    Tests QuizDraft, QuestionDraft and ChoiceDraft, which hold a quiz
+    while it's being generated.
+    """
+
+    def test_choices_added(self):
+        """
+        Creating a ChoiceDraft should add it to its question's choices.
+        """
+        quiz = QuizDraft(user_id='cassius')
+        question = QuestionDraft(CheckboxQuestion, quiz=quiz, text='Question')
+        choice = ChoiceDraft(question, primary_text='pop', answer=True)
+
+        self.assertEqual(question.choices, [choice])
+        self.assertEqual(choice.fields, {'primary_text': 'pop', 'answer': True})
+
+
+    def test_slots(self):
+        """
+        Drafts should only have the attributes in their __slots__, so
+        they're as small as they can be.
+        """
+        quiz = QuizDraft(user_id='cassius')
+        question = QuestionDraft(SliderQuestion, quiz=quiz, text='Question')
+        choice = ChoiceDraft(question, primary_text='pop')
+
+        for draft in [quiz, question, choice]:
+            self.assertFalse(hasattr(draft, '__dict__'))
+            with self.assertRaises(AttributeError):
+                draft.other = 1
+
+
+
+class MaterializeQuizTests(TestCase):
+    """
+    Tests materialize_quiz(), which validates a quiz draft, and saves
+    it as model objects all at once.
+    """
+
+    def _draft(self, num_checkbox=5, num_slider=5):
+        """
+        Returns a quiz draft with the given numbers of questions, each
+        checkbox question with 4 choices.
+        """
+        quiz = QuizDraft(user_id='cassius')
+        for i in range(num_checkbox):
+            q = create_object(CheckboxQuestion, quiz=quiz,
+                    text='Checkbox ' + str(i))
+            create_genre_choice(q, 'genre ' + str(i), answer=True)
+            create_genre_choices(q, ['a', 'b', 'c'])
+            quiz.questions.append(q)
+        for i in range(num_slider):
+            quiz.questions.append(create_object(SliderQuestion, quiz=quiz,
+                    text='Slider ' + str(i), slider_min=0, slider_max=10,
+                    answer=i))
+        return quiz
+
+
+    def test_materialize_quiz(self):
+        """
+        materialize_quiz() should save the quiz, its questions and their
+        choices with the same few queries, no matter how many choices
+        there are.
+        """
+        draft = self._draft()
+
+        # A savepoint, checking the quiz's ID is unused, the quiz, all of
+        # the questions, loading their IDs, all of the choices, loading
+        # the choices' IDs and saving the quiz's payload, and the release
+        with self.assertNumQueries(1 + 1 + 1 + 2 + 1 + 2 + 1):
+            quiz = materialize_quiz(draft)
+
+        self.assertIsInstance(quiz, Quiz)
+        self.assertIsNotNone(quiz.uuid)
+        quiz = Quiz.objects.get(user_id='cassius')
+        self.assertEqual(quiz.questions.count(), 10)
+        self.assertEqual(Choice.objects.count(), 20)
+        for q in CheckboxQuestion.objects.all():
+            self.assertEqual(q.choices.count(), 4)
+            self.assertEqual(q.answers().get().primary_text,
+                    'genre ' + q.text[-1])
+        self.assertCountEqual([q.answer for q in SliderQuestion.objects.all()],
+                range(5))
+        self.assertEqual(json.loads(quiz.payload), quiz.json())
+        self.assertEqual(quiz.payload_version, PAYLOAD_VERSION)
+
+
+    def test_materialize_quiz_structural_validation(self):
+        """
+        With STRUCTURAL_VALIDATION, materialize_quiz() shouldn't check
+        that the quiz's ID is unused before saving it, but should still
+        fail if it's used.
+        """
+        with validation_policy(STRUCTURAL_VALIDATION):
+            # The same queries, without the check
+            with self.assertNumQueries(1 + 1 + 2 + 1 + 2 + 1):
+                materialize_quiz(self._draft())
+
+            with self.assertRaises(IntegrityError):
+                materialize_quiz(self._draft())
+
+        self.assertEqual(Question.objects.count(), 10)
+
+
+    def test_materialize_quiz_unused_questions(self):
+        """
+        Question drafts that were created but aren't in the quiz, and
+        their choices, shouldn't be saved.
+        """
+        draft = self._draft(3, 0)
+        draft.questions = draft.questions[1:]
+
+        materialize_quiz(draft)
+
+        self.assertEqual(Question.objects.count(), 2)
+        self.assertEqual(Choice.objects.count(), 8)
+
+
+    def test_materialize_quiz_invalid(self):
+        """
+        If any part of the quiz is invalid, materialize_quiz() should
+        raise a ValidationError before saving anything.
+        """
+        draft = self._draft()
+        draft.questions[-1].fields['slider_min'] = 20
+
+        self.assertRaises(ValidationError, materialize_quiz, draft)
+
+        self.assertEqual(Quiz.objects.count(), 0)
+        self.assertEqual(Question.objects.count(), 0)
+
+
+    def test_materialize_quiz_rolls_back(self):
+        """
+        If saving fails partway through, nothing should be saved.
+        """
+        draft = self._draft()
+
+        with mock.patch.object(Choice.objects, 'bulk_create',
+                side_effect=IntegrityError):
+            self.assertRaises(IntegrityError, materialize_quiz, draft)
+
+        self.assertEqual(Quiz.objects.count(), 0)
+        self.assertEqual(Question.objects.count(), 0)
+        self.assertEqual(Choice.objects.count(), 0)
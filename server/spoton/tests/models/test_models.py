@@ -7,12 +7,15 @@ import uuid
 
 from django.test import TestCase, TransactionTestCase
 from django.core.exceptions import ValidationError,ObjectDoesNotExist
-from django.db import transaction
+from django.db import connection, transaction
 from django.db.models.signals import m2m_changed
 from django.db.utils import OperationalError,IntegrityError
+from django.test.utils import CaptureQueriesContext
 
 from spoton.models.quiz import *
 from spoton.models.response import *
+from spoton.models.utils import (FULL_VALIDATION, STRUCTURAL_VALIDATION,
+        get_validation_policy, validation_policy)
 
 
 class DeleteModelsTests(TransactionTestCase):
@@ -32,7 +35,8 @@ class DeleteModelsTests(TransactionTestCase):
         """
 
         super(DeleteModelsTests, cls).setUpClass()
-        m2m_changed.disconnect(clean_choices)
+        m2m_changed.disconnect(clean_choices,
+                sender=CheckboxResponse.choices.through)
 
 
     @classmethod
@@ -40,7 +44,8 @@ class DeleteModelsTests(TransactionTestCase):
         """
         Reconnect the m2m signal handler once the tests are finished.
         """
-        m2m_changed.connect(clean_choices)
+        m2m_changed.connect(clean_choices,
+                sender=CheckboxResponse.choices.through)
         super(DeleteModelsTests, cls).tearDownClass()
 
 
@@ -192,6 +197,213 @@ class DeleteModelsTests(TransactionTestCase):
 
 
 
+class DeleteNumQueriesTests(TestCase):
+    """
+    Tests that quizzes and responses are deleted in bulk: deleting them
+    should take the same number of queries no matter how many
+    questions, choices and answers they have.
+    """
+
+    def create_quiz(self, user_id, num_questions, num_responses):
+        """
+        Creates a quiz with num_questions checkbox questions with four
+        choices each, num_questions slider questions, and num_responses
+        responses that answer every question.
+        """
+
+        quiz = Quiz.objects.create(user_id=user_id)
+
+        questions = []
+        for i in range(num_questions):
+            q = CheckboxQuestion.objects.create(quiz=quiz)
+            c = Choice.objects.create(question=q, answer=True)
+            for j in range(3):
+                Choice.objects.create(question=q, answer=False)
+            questions.append((q, c, SliderQuestion.objects.create(quiz=quiz)))
+
+        for i in range(num_responses):
+            r = Response.objects.create(quiz=quiz)
+            for q, c, s in questions:
+                a = CheckboxResponse.objects.create(question=q, response=r)
+                a.choices.add(c)
+                SliderResponse.objects.create(question=s, response=r,
+                        answer=1)
+
+        return quiz
+
+
+    def assert_all_deleted(self):
+        """
+        Asserts that there are no quiz or response objects left.
+        """
+
+        self.assertEqual(Quiz.objects.count(), 0)
+        self.assertEqual(Question.objects.count(), 0)
+        self.assertEqual(Choice.objects.count(), 0)
+        self.assertEqual(Response.objects.count(), 0)
+        self.assertEqual(QuestionResponse.objects.count(), 0)
+        self.assertEqual(CheckboxResponse.choices.through.objects.count(), 0)
+
+
+    def test_delete_quizzes_num_queries(self):
+        """
+        Deleting a set of Quizzes should take the same number of
+        queries for a small quiz as for a large one.
+        """
+
+        self.create_quiz('cassius', 1, 1)
+        with CaptureQueriesContext(connection) as small:
+            Quiz.objects.filter(user_id='cassius').delete()
+        self.assert_all_deleted()
+
+        self.create_quiz('cassius', 5, 8)
+        with self.assertNumQueries(len(small)):
+            Quiz.objects.filter(user_id='cassius').delete()
+        self.assert_all_deleted()
+
+
+    def test_delete_quiz_num_queries(self):
+        """
+        Deleting a single Quiz should take the same number of queries
+        for a small quiz as for a large one.
+        """
+
+        quiz = self.create_quiz('cassius', 1, 1)
+        with CaptureQueriesContext(connection) as small:
+            quiz.delete()
+        self.assert_all_deleted()
+
+        quiz = self.create_quiz('cassius', 5, 8)
+        with self.assertNumQueries(len(small)):
+            quiz.delete()
+        self.assert_all_deleted()
+
+
+    def test_delete_response_num_queries(self):
+        """
+        Deleting a Response should take the same number of queries no
+        matter how many questions it answers, and should only delete
+        that response's answers.
+        """
+
+        quiz = self.create_quiz('cassius', 1, 2)
+        with CaptureQueriesContext(connection) as small:
+            quiz.responses.first().delete()
+        self.assertEqual(quiz.responses.count(), 1)
+        self.assertEqual(QuestionResponse.objects.count(), 2)
+        quiz.delete()
+
+        quiz = self.create_quiz('cassius', 5, 2)
+        with self.assertNumQueries(len(small)):
+            quiz.responses.first().delete()
+        self.assertEqual(quiz.responses.count(), 1)
+        self.assertEqual(QuestionResponse.objects.count(), 10)
+        self.assertEqual(CheckboxResponse.choices.through.objects.count(), 5)
+
+
+
+class ValidationPolicyTests(TestCase):
+    """
+    Tests the validation policies that models using CleanOnSaveMixin
+    are saved with, see validation_policy() in spoton/models/utils.py.
+    """
+
+    def setUp(self):
+        """
+        Create a quiz and question the tests can add choices to.
+        """
+        self.quiz = Quiz.objects.create(user_id='cassius')
+        self.question = CheckboxQuestion.objects.create(quiz=self.quiz)
+
+
+    def test_default_policy(self):
+        """
+        The policy should be the MODEL_VALIDATION_POLICY setting when
+        none is set, and FULL_VALIDATION if that isn't set either.
+        """
+        self.assertEqual(get_validation_policy(), FULL_VALIDATION)
+
+        with self.settings(MODEL_VALIDATION_POLICY=STRUCTURAL_VALIDATION):
+            self.assertEqual(get_validation_policy(), STRUCTURAL_VALIDATION)
+            with validation_policy(FULL_VALIDATION):
+                self.assertEqual(get_validation_policy(), FULL_VALIDATION)
+
+
+    def test_policy_restored(self):
+        """
+        validation_policy() should restore the previous policy when it's
+        done, even if it's nested, or something raises an error.
+        """
+        with validation_policy(STRUCTURAL_VALIDATION):
+            with validation_policy(FULL_VALIDATION):
+                self.assertEqual(get_validation_policy(), FULL_VALIDATION)
+            self.assertEqual(get_validation_policy(), STRUCTURAL_VALIDATION)
+
+            with self.assertRaises(KeyError):
+                with validation_policy(FULL_VALIDATION):
+                    raise KeyError()
+            self.assertEqual(get_validation_policy(), STRUCTURAL_VALIDATION)
+
+        self.assertEqual(get_validation_policy(), FULL_VALIDATION)
+
+
+    def test_unknown_policy(self):
+        """
+        validation_policy() should raise a ValueError for a policy that
+        doesn't exist.
+        """
+        with self.assertRaises(ValueError):
+            with validation_policy('none'):
+                pass
+
+
+    def test_full_validation_checks_relations(self):
+        """
+        With FULL_VALIDATION, saving an object should check that the
+        objects it's related to exist.
+        """
+        with self.assertRaises(ValidationError):
+            Choice.objects.create(question_id=self.question.id + 100)
+
+        with self.assertNumQueries(2):
+            Choice.objects.create(question=self.question)
+
+
+    def test_structural_validation_num_queries(self):
+        """
+        With STRUCTURAL_VALIDATION, saving an object shouldn't query the
+        database for anything but saving it.
+        """
+        with validation_policy(STRUCTURAL_VALIDATION):
+            with self.assertNumQueries(1):
+                Choice.objects.create(question=self.question)
+
+            # Just the question
+            with self.assertNumQueries(1):
+                SliderQuestion.objects.create(quiz=self.quiz)
+
+        self.assertEqual(self.question.choices.count(), 1)
+
+
+    def test_structural_validation_checks_fields(self):
+        """
+        With STRUCTURAL_VALIDATION, saving an object should still
+        validate its fields and run its clean() method.
+        """
+        with validation_policy(STRUCTURAL_VALIDATION):
+            with self.assertRaises(ValidationError):
+                Choice.objects.create(question=self.question,
+                        primary_text='x' * 101)
+
+            with self.assertRaises(ValidationError):
+                SliderQuestion.objects.create(quiz=self.quiz, slider_min=5,
+                        slider_max=1, answer=3)
+
+        self.assertEqual(Choice.objects.count(), 0)
+        self.assertEqual(SliderQuestion.objects.count(), 0)
+
+
+
 class ParentFieldsAreRequiredTests(TransactionTestCase):
     """
     Tests that the important ForeignKey relationships are not null.
@@ -3,8 +3,12 @@
 Tests the file spoton/models/quiz.py.
 """
 
+import hashlib
+import io
+import json
 import uuid
 
+from django.core.management import call_command
 from django.test import TestCase, TransactionTestCase
 from django.core.exceptions import ValidationError,ObjectDoesNotExist
 from django.db import transaction
@@ -41,6 +45,31 @@ class QuizTests(TransactionTestCase):
         self.assertEqual(quiz.json(), json)
 
 
+    def test_quiz_json_num_queries(self):
+        """
+        json() in Quiz should take the same number of queries no matter
+        how many questions and choices the quiz has.
+        """
+
+        quiz = Quiz.objects.create(user_id='cassius')
+
+        for num_questions in [1, 5, 20]:
+            while CheckboxQuestion.objects.count() < num_questions:
+                q = CheckboxQuestion.objects.create(quiz=quiz)
+                for i in range(4):
+                    Choice.objects.create(question=q, answer=(i == 0))
+                SliderQuestion.objects.create(quiz=quiz)
+
+            # The questions, and the choices
+            with self.assertNumQueries(2):
+                json = quiz.json()
+
+            self.assertEqual(len(json['questions']), 2 * num_questions)
+            for q in json['questions']:
+                if q['type'] != 'slider':
+                    self.assertEqual(len(q['choices']), 4)
+
+
     def test_quiz_json_no_questions(self):
         """
         json() in Quiz should work even if the quiz has no questions:
@@ -58,13 +87,141 @@ class QuizTests(TransactionTestCase):
 
 
 
+class QuizPayloadTests(TestCase):
+    """
+    Tests the JSON payload a Quiz stores, so the quiz page doesn't have
+    to build it from the quiz's questions.
+    """
+
+    def setUp(self):
+        """
+        Creates a quiz with a checkbox question and a slider question,
+        whose payload hasn't been built.
+        """
+
+        self.quiz = Quiz.objects.create(user_id='cassius')
+        q = CheckboxQuestion.objects.create(quiz=self.quiz)
+        Choice.objects.create(question=q, answer=True, primary_text='pop')
+        SliderQuestion.objects.create(quiz=self.quiz)
+
+
+    def test_save_payload(self):
+        """
+        save_payload() should save the quiz's serialized JSON, its hash,
+        and the current payload version.
+        """
+
+        self.quiz.save_payload()
+
+        quiz = Quiz.objects.get()
+        self.assertEqual(json.loads(quiz.payload), quiz.json())
+        self.assertEqual(quiz.payload_hash,
+                hashlib.sha256(quiz.payload.encode('utf-8')).hexdigest())
+        self.assertEqual(quiz.payload_version, PAYLOAD_VERSION)
+
+
+    def test_get_payload(self):
+        """
+        get_payload() should return a stored payload and its hash with
+        one query.
+        """
+
+        self.quiz.save_payload()
+
+        with self.assertNumQueries(1):
+            payload, payload_hash = Quiz.get_payload(self.quiz.uuid)
+
+        self.assertEqual(payload, self.quiz.payload)
+        self.assertEqual(payload_hash, self.quiz.payload_hash)
+        self.assertIsNone(Quiz.get_payload(uuid.uuid4()))
+
+
+    def test_get_payload_out_of_date(self):
+        """
+        If the payload was never built, or was built with an older
+        payload version, get_payload() should rebuild and save it.
+        """
+
+        payload, payload_hash = Quiz.get_payload(self.quiz.uuid)
+
+        self.assertEqual(json.loads(payload), self.quiz.json())
+        self.assertEqual(Quiz.objects.get().payload, payload)
+
+        Quiz.objects.update(payload='{}', payload_version=PAYLOAD_VERSION - 1)
+
+        payload, payload_hash = Quiz.get_payload(self.quiz.uuid)
+        self.assertEqual(json.loads(payload), self.quiz.json())
+
+
+    def test_rebuild_quiz_payloads(self):
+        """
+        The rebuild_quiz_payloads command should rebuild the payloads
+        that are out of date, or every payload with --all.
+        """
+
+        other = Quiz.objects.create(user_id='benjmain')
+        other.save_payload()
+        Quiz.objects.filter(pk=other.pk).update(payload='{}')
+
+        out = io.StringIO()
+        call_command('rebuild_quiz_payloads', stdout=out)
+
+        self.assertIn("Rebuilt 1 quiz payload", out.getvalue())
+        self.assertEqual(json.loads(Quiz.objects.get(pk='cassius').payload),
+                self.quiz.json())
+        self.assertEqual(Quiz.objects.get(pk='benjmain').payload, '{}')
+
+        call_command('rebuild_quiz_payloads', '--all', stdout=out)
+
+        self.assertIn("Rebuilt 2 quiz payloads", out.getvalue())
+        self.assertEqual(json.loads(Quiz.objects.get(pk='benjmain').payload),
+                other.json())
+
+
+
 class QuestionTests(TransactionTestCase):
     """
     Tests functions of the model Question, which holds one Question in
     a Quiz, and all of its related data.
     """
 
-    pass
+    def test_questions_loaded_as_their_kind(self):
+        """
+        Loading questions from the Question table should create each
+        one as its kind's subclass, with one query.
+        """
+
+        quiz = Quiz.objects.create(user_id='cassius')
+        c = CheckboxQuestion.objects.create(quiz=quiz, multiselect=True)
+        s = SliderQuestion.objects.create(quiz=quiz)
+        q = Question.objects.create(quiz=quiz)
+
+        with self.assertNumQueries(1):
+            questions = list(quiz.questions.order_by('id'))
+        self.assertEqual([type(q) for q in questions],
+                [CheckboxQuestion, SliderQuestion, Question])
+        self.assertEqual(questions, [c, s, q])
+        self.assertTrue(questions[0].multiselect)
+        self.assertEqual(questions[1].answer, 5)
+
+
+    def test_kind_managers(self):
+        """
+        Each subclass's manager should only have the questions of its
+        kind, and creating a question through it should set the kind.
+        """
+
+        quiz = Quiz.objects.create(user_id='cassius')
+        c = CheckboxQuestion.objects.create(quiz=quiz)
+        s = SliderQuestion.objects.create(quiz=quiz)
+
+        self.assertEqual(c.kind, Question.CHECKBOX)
+        self.assertEqual(s.kind, Question.SLIDER)
+        self.assertCountEqual(CheckboxQuestion.objects.all(), [c])
+        self.assertCountEqual(SliderQuestion.objects.all(), [s])
+        self.assertCountEqual(Question.objects.all(), [c, s])
+        with self.assertRaises(CheckboxQuestion.DoesNotExist):
+            CheckboxQuestion.objects.get(id=s.id)
 
 
 
@@ -307,6 +464,21 @@ class SliderQuestionTests(TransactionTestCase):
             self.fail("Validation error raised when creating Slider Question")
 
 
+    def test_create_slider_question_without_values(self):
+        """
+        A SliderQuestion should be given the default min, max and
+        answer if they're not given, but saving one without them should
+        raise an error.
+        """
+
+        quiz = Quiz.objects.create(user_id='cassius')
+        q = SliderQuestion.objects.create(quiz=quiz)
+        self.assertEqual((q.slider_min, q.slider_max, q.answer), (0, 10, 5))
+
+        q.answer = None
+        self.assertRaises(ValidationError, q.save)
+
+
     def test_create_slider_question_with_wrong_range(self):
         """
         If a SliderQuestion's minimum value is not less than its max
@@ -60,6 +60,29 @@ class QuestionResponseTests(TransactionTestCase):
                 response=response, question=q1)
 
 
+    def test_answers_loaded_as_their_kind(self):
+        """
+        Loading answers from the QuestionResponse table should create
+        each one as its kind's subclass, with one query.
+        """
+
+        quiz = Quiz.objects.create(user_id='cassius')
+        q1 = CheckboxQuestion.objects.create(quiz=quiz)
+        q2 = SliderQuestion.objects.create(quiz=quiz)
+        response = Response.objects.create(quiz=quiz)
+        a1 = CheckboxResponse.objects.create(response=response, question=q1)
+        a2 = SliderResponse.objects.create(response=response, question=q2,
+                answer=3)
+
+        with self.assertNumQueries(1):
+            answers = list(response.answers.order_by('id'))
+        self.assertEqual([type(a) for a in answers],
+                [CheckboxResponse, SliderResponse])
+        self.assertEqual(answers, [a1, a2])
+        self.assertEqual(answers[1].answer, 3)
+        self.assertCountEqual(SliderResponse.objects.all(), [a2])
+
+
     def test_background_color_validation(self):
         """
         The Response background_color field should be an int in between
@@ -168,6 +191,134 @@ class CheckboxResponseTests(TransactionTestCase):
             CheckboxResponse.objects.create(response=response,question=q1)
 
 
+    def test_add_choice_to_slider_response(self):
+        """
+        Adding a Choice to a QuestionResponse that isn't a
+        CheckboxResponse should raise a ValidationError.
+        """
+
+        quiz = Quiz.objects.create(user_id='cassius')
+        q1 = CheckboxQuestion.objects.create(quiz=quiz)
+        q2 = SliderQuestion.objects.create(quiz=quiz)
+        c1 = Choice.objects.create(question=q1)
+        response = Response.objects.create(quiz=quiz)
+        answer = SliderResponse.objects.create(response=response, question=q2,
+                answer=5)
+        with self.assertRaises(ValidationError):
+            answer.choices.add(c1)
+
+
+    def test_add_choices_num_queries(self):
+        """
+        Adding several Choices to a CheckboxResponse about a
+        multiselect CheckboxQuestion at once should check them with one
+        query, no matter how many there are.
+        """
+
+        quiz = Quiz.objects.create(user_id='cassius')
+        q = CheckboxQuestion.objects.create(quiz=quiz, multiselect=True)
+        choices = [Choice.objects.create(question=q) for i in range(8)]
+        r = Response.objects.create(quiz=quiz)
+        answer = CheckboxResponse.objects.create(response=r, question=q)
+
+        # Starting the transaction, finding the choices that are already
+        # there, checking the added ones, and inserting them
+        with self.assertNumQueries(4):
+            answer.choices.add(*choices)
+        self.assertCountEqual(answer.choices.all(), choices)
+
+
+    def test_add_choice_from_choice(self):
+        """
+        Adding a CheckboxResponse to a Choice's responses should be
+        validated like adding the Choice to the CheckboxResponse.
+        """
+
+        quiz = Quiz.objects.create(user_id='cassius')
+        q1 = CheckboxQuestion.objects.create(quiz=quiz)
+        q2 = CheckboxQuestion.objects.create(quiz=quiz)
+        c1 = Choice.objects.create(question=q1)
+        c2 = Choice.objects.create(question=q2)
+        r = Response.objects.create(quiz=quiz)
+        answer = CheckboxResponse.objects.create(response=r, question=q1)
+
+        c1.choice_responses.add(answer)
+        with self.assertRaises(ValidationError):
+            c2.choice_responses.add(answer)
+        self.assertCountEqual(answer.choices.all(), [c1])
+
+
+    def test_set_choices_multiselect(self):
+        """
+        set_choices() should replace the selected Choices of a
+        CheckboxResponse about a multiselect CheckboxQuestion with any
+        number of its Choices.
+        """
+
+        quiz = Quiz.objects.create(user_id='cassius')
+        q = CheckboxQuestion.objects.create(quiz=quiz, multiselect=True)
+        c1 = Choice.objects.create(question=q, answer=True)
+        c2 = Choice.objects.create(question=q)
+        c3 = Choice.objects.create(question=q)
+        r = Response.objects.create(quiz=quiz)
+        answer = CheckboxResponse.objects.create(response=r, question=q)
+
+        answer.set_choices([c1.id, c2.id, c1.id])
+        self.assertCountEqual(answer.choices.all(), [c1, c2])
+
+        answer.set_choices([c3.id])
+        self.assertCountEqual(answer.choices.all(), [c3])
+
+        answer.set_choices([])
+        self.assertEqual(answer.choices.count(), 0)
+
+
+    def test_set_choices_single_select(self):
+        """
+        set_choices() should allow one Choice for a CheckboxResponse
+        about a single-select CheckboxQuestion, and raise a
+        ValidationError for more, without changing the selected
+        Choices.
+        """
+
+        quiz = Quiz.objects.create(user_id='cassius')
+        q = CheckboxQuestion.objects.create(quiz=quiz)
+        c1 = Choice.objects.create(question=q, answer=True)
+        c2 = Choice.objects.create(question=q)
+        r = Response.objects.create(quiz=quiz)
+        answer = CheckboxResponse.objects.create(response=r, question=q)
+
+        answer.set_choices([c1.id])
+        answer.set_choices([c2.id])
+        self.assertCountEqual(answer.choices.all(), [c2])
+
+        with self.assertRaises(ValidationError):
+            answer.set_choices([c1.id, c2.id])
+        self.assertCountEqual(answer.choices.all(), [c2])
+
+
+    def test_set_choices_invalid_choice(self):
+        """
+        set_choices() should raise a ValidationError if any of the
+        Choices belong to a different question, without changing the
+        selected Choices.
+        """
+
+        quiz = Quiz.objects.create(user_id='cassius')
+        q1 = CheckboxQuestion.objects.create(quiz=quiz, multiselect=True)
+        q2 = CheckboxQuestion.objects.create(quiz=quiz)
+        c1 = Choice.objects.create(question=q1)
+        c2 = Choice.objects.create(question=q1)
+        c3 = Choice.objects.create(question=q2)
+        r = Response.objects.create(quiz=quiz)
+        answer = CheckboxResponse.objects.create(response=r, question=q1)
+        answer.set_choices([c1.id])
+
+        with self.assertRaises(ValidationError):
+            answer.set_choices([c2.id, c3.id])
+        self.assertCountEqual(answer.choices.all(), [c1])
+
+
 
 class SliderResponseTests(TransactionTestCase):
     """
@@ -177,6 +328,19 @@ class SliderResponseTests(TransactionTestCase):
     Tests the model's field validation and custom functions.
     """
 
+    def test_no_answer(self):
+        """
+        Creating a SliderResponse without an answer should raise a
+        ValidationError.
+        """
+
+        quiz = Quiz.objects.create(user_id='cassius')
+        q1 = SliderQuestion.objects.create(quiz=quiz)
+        response = Response.objects.create(quiz=quiz)
+        with self.assertRaises(ValidationError):
+            SliderResponse.objects.create(response=response, question=q1)
+
+
     def test_wrong_question_type(self):
         """
         Creating a SliderResponse with a CheckboxQuestion should raise
@@ -187,4 +351,5 @@ class SliderResponseTests(TransactionTestCase):
         q1 = CheckboxQuestion.objects.create(quiz=quiz)
         response = Response.objects.create(quiz=quiz)
         with self.assertRaises(ValidationError):
-            SliderResponse.objects.create(response=response,question=q1)
+            SliderResponse.objects.create(response=response,question=q1,
+                    answer=5)
@@ -0,0 +1,565 @@
+"""Tests generating quizzes in the background, with quiz jobs.
+
+Tests the files spoton/quiz/jobs.py and spoton/models/jobs.py, and the
+quiz_job_status view.
+"""
+
+from datetime import timedelta
+import threading
+from unittest import mock
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.client import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from spoton import spotify
+from spoton.models.jobs import QuizJob
+from spoton.models.quiz import Quiz
+from spoton.quiz import jobs
+from spoton.quiz.jobs import *
+
+
+class QuizJobQueueTests(TestCase):
+    """
+    Tests QuizJobQueue, the bounded pool of workers that runs quiz
+    jobs.
+    """
+
+    def setUp(self):
+        """
+        Creates a pool with one worker and one place in line, and an
+        event that holds back the jobs until a test sets it.
+        """
+
+        self.queue = QuizJobQueue(max_workers=1, max_pending=1)
+        self.release = threading.Event()
+        self.ran = []
+
+    def tearDown(self):
+        self.release.set()
+        self.queue.shutdown()
+
+
+    def job(self, i):
+        """A job that waits for the release event."""
+        self.release.wait(5)
+        self.ran.append(i)
+
+
+    def test_submit(self):
+        """
+        submit() should run the jobs it accepts on a worker.
+        """
+
+        self.assertTrue(self.queue.submit(self.job, 1))
+        self.assertTrue(self.queue.submit(self.job, 2))
+
+        self.release.set()
+        self.queue.shutdown()
+
+        self.assertEqual(self.ran, [1, 2])
+        self.assertEqual(self.queue.stats(),
+                {'in_pool': 0, 'accepted': 2, 'rejected': 0})
+
+
+    def test_submit_full(self):
+        """
+        Once every worker is busy and the line is full, submit() should
+        turn jobs away, and accept them again once there's room.
+        """
+
+        self.assertTrue(self.queue.submit(self.job, 1))
+        self.assertTrue(self.queue.submit(self.job, 2))
+        self.assertFalse(self.queue.submit(self.job, 3))
+        self.assertEqual(self.queue.stats()['in_pool'], 2)
+
+        self.release.set()
+        self.queue.shutdown()
+        self.queue = QuizJobQueue(max_workers=1, max_pending=1)
+
+        self.assertTrue(self.queue.submit(self.job, 4))
+        self.queue.shutdown()
+        self.assertEqual(self.ran, [1, 2, 4])
+
+
+    def test_job_raises(self):
+        """
+        A job that raises an exception should still free its place in
+        the pool.
+        """
+
+        def fail():
+            raise ValueError
+
+        self.assertTrue(self.queue.submit(fail))
+        self.queue.shutdown()
+
+        self.assertEqual(self.queue.stats(),
+                {'in_pool': 0, 'accepted': 1, 'rejected': 0})
+
+
+
+class RunQuizJobTests(TestCase):
+    """
+    Tests run_quiz_job(), which generates a job's quiz and records how
+    it went.
+    """
+
+    def setUp(self):
+        """
+        Creates a queued job for a user with an existing quiz, and a
+        saved session.
+        """
+
+        self.session = SessionStore()
+        self.session[spotify.USER_ID] = 'cassius'
+        self.session.save()
+
+        Quiz.objects.create(user_id='cassius')
+        self.job = QuizJob.objects.create(user_id='cassius')
+
+
+    def test_run_quiz_job(self):
+        """
+        run_quiz_job() should replace the user's quiz with a new one,
+        and record the new quiz and the job's timing.
+        """
+
+        def create(session):
+            self.assertEqual(Quiz.objects.count(), 0)
+            self.assertEqual(spotify.get_user_id(session), 'cassius')
+            self.assertEqual(QuizJob.objects.get().state, QuizJob.RUNNING)
+            return Quiz.objects.create(user_id='cassius')
+
+        with mock.patch('spoton.quiz.jobs.create_quiz', side_effect=create):
+            run_quiz_job(self.job.id, self.session.session_key)
+
+        job = QuizJob.objects.get()
+        self.assertEqual(job.state, QuizJob.SUCCEEDED)
+        self.assertEqual(job.quiz_uuid, Quiz.objects.get().uuid)
+        self.assertLessEqual(job.created_at, job.started_at)
+        self.assertLessEqual(job.started_at, job.finished_at)
+        self.assertEqual(job.json()['quiz_uuid'], str(job.quiz_uuid))
+
+
+    def test_run_quiz_job_no_quiz(self):
+        """
+        If no quiz could be created, the job should fail.
+        """
+
+        with mock.patch('spoton.quiz.jobs.create_quiz', return_value=None):
+            run_quiz_job(self.job.id, self.session.session_key)
+
+        job = QuizJob.objects.get()
+        self.assertEqual(job.state, QuizJob.FAILED)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIn('error', job.json())
+
+
+    def test_run_quiz_job_raises(self):
+        """
+        If generating the quiz raises an exception, the job should fail
+        and record the error.
+        """
+
+        with mock.patch('spoton.quiz.jobs.create_quiz',
+                side_effect=ValueError("no data")):
+            run_quiz_job(self.job.id, self.session.session_key)
+
+        job = QuizJob.objects.get()
+        self.assertEqual(job.state, QuizJob.FAILED)
+        self.assertEqual(job.error, "ValueError: no data")
+
+
+
+class StartQuizJobTests(TestCase):
+    """
+    Tests start_quiz_job(), which queues a quiz job for a user.
+    """
+
+    def setUp(self):
+        """
+        Creates a session for a logged in user, and replaces the pool
+        of workers with a mock.
+        """
+
+        self.session = SessionStore()
+        self.session[spotify.USER_ID] = 'cassius'
+
+        self.queue = mock.Mock()
+        self.queue.submit.return_value = True
+        patcher = mock.patch.object(jobs, 'job_queue', self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+    def test_start_quiz_job(self):
+        """
+        start_quiz_job() should save the session, and queue a job that
+        runs with its key.
+        """
+
+        job = start_quiz_job(self.session)
+
+        self.assertEqual(job.state, QuizJob.QUEUED)
+        self.assertEqual(job.user_id, 'cassius')
+        self.assertIsNotNone(self.session.session_key)
+        self.queue.submit.assert_called_once_with(run_quiz_job, job.id,
+                self.session.session_key)
+
+
+    def test_start_quiz_job_not_logged_in(self):
+        """
+        If no one is logged into the session, no job should be queued.
+        """
+
+        self.assertIsNone(start_quiz_job(SessionStore()))
+        self.queue.submit.assert_not_called()
+
+
+    def test_start_quiz_job_already_active(self):
+        """
+        If the user already has a job that's queued or running, it
+        should be returned, instead of queueing another.
+        """
+
+        active = QuizJob.objects.create(user_id='cassius',
+                state=QuizJob.RUNNING)
+        QuizJob.objects.create(user_id='cassius', state=QuizJob.FAILED)
+
+        self.assertEqual(start_quiz_job(self.session), active)
+        self.queue.submit.assert_not_called()
+
+
+    def test_start_quiz_job_timed_out(self):
+        """
+        A job that's been active for too long should be marked as
+        failed, and a new one queued.
+        """
+
+        lost = QuizJob.objects.create(user_id='cassius',
+                state=QuizJob.RUNNING,
+                created_at=timezone.now() - timedelta(hours=1))
+
+        with self.settings(QUIZ_JOB_TIMEOUT=60):
+            job = start_quiz_job(self.session)
+
+        self.assertNotEqual(job, lost)
+        lost.refresh_from_db()
+        self.assertEqual(lost.state, QuizJob.FAILED)
+        self.queue.submit.assert_called_once()
+
+
+    def test_start_quiz_job_rejected(self):
+        """
+        If the pool turns the job away, start_quiz_job() should return
+        None and not leave the job behind.
+        """
+
+        self.queue.submit.return_value = False
+
+        self.assertIsNone(start_quiz_job(self.session))
+        self.assertEqual(QuizJob.objects.count(), 0)
+
+
+
+class StartQuizJobConcurrencyTests(TransactionTestCase):
+    """
+    Tests start_quiz_job() when two requests start a job for the same
+    user at once.
+    """
+
+    def setUp(self):
+        """
+        Replaces the pool of workers with a mock.
+        """
+
+        self.queue = mock.Mock()
+        self.queue.submit.return_value = True
+        patcher = mock.patch.object(jobs, 'job_queue', self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+    def test_start_quiz_job_concurrently(self):
+        """
+        If two threads start a job for the same user at once, after
+        both have found that the user has no active job, only one job
+        should be queued, and both should return it.
+        """
+
+        # Saving the session comes after checking for an active job, so
+        # waiting there lets both threads get past the check first
+        barrier = threading.Barrier(2, timeout=10)
+        results = []
+
+        def start():
+            session = SessionStore()
+            session[spotify.USER_ID] = 'cassius'
+            save = session.save
+            def save_together(*args, **kwargs):
+                barrier.wait()
+                save(*args, **kwargs)
+            session.save = save_together
+
+            try:
+                results.append(start_quiz_job(session))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=start) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        job = QuizJob.objects.get()
+        self.assertEqual(job.state, QuizJob.QUEUED)
+        self.assertEqual(results, [job, job])
+        self.queue.submit.assert_called_once()
+
+
+
+class ClaimQuizJobTests(TestCase):
+    """
+    Tests claim_quiz_job(), which gives the dashboard the job started
+    when the user logged in, and warm_quiz_metrics(), which counts how
+    often it was ready.
+    """
+
+    def setUp(self):
+        """
+        Creates a session for a logged in user, replaces the pool of
+        workers with a mock, and records the metrics before the test.
+        """
+
+        self.session = SessionStore()
+        self.session[spotify.USER_ID] = 'cassius'
+
+        self.queue = mock.Mock()
+        self.queue.submit.return_value = True
+        patcher = mock.patch.object(jobs, 'job_queue', self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.before = warm_quiz_metrics()
+
+
+    def metrics(self):
+        """Returns how much the metrics changed during the test."""
+
+        after = warm_quiz_metrics()
+        return {k: after[k] - self.before[k]
+                for k in ['ready', 'pending', 'cold', 'waits']}
+
+
+    def test_claim_ready(self):
+        """
+        If the job started at login already succeeded, the dashboard
+        should claim it, and count it as ready.
+        """
+
+        warm = QuizJob.objects.create(user_id='cassius',
+                state=QuizJob.SUCCEEDED)
+
+        job = claim_quiz_job(self.session)
+
+        self.assertEqual(job, warm)
+        self.assertIsNotNone(job.claimed_at)
+        self.queue.submit.assert_not_called()
+        self.assertEqual(self.metrics(),
+                {'ready': 1, 'pending': 0, 'cold': 0, 'waits': 0})
+
+
+    def test_claim_pending(self):
+        """
+        If the job started at login is still running, the dashboard
+        should claim it, and count it as pending. Once it finishes, how
+        long it took after it was claimed should be recorded.
+        """
+
+        warm = QuizJob.objects.create(user_id='cassius')
+        self.assertEqual(claim_quiz_job(self.session), warm)
+
+        with mock.patch('spoton.quiz.jobs.create_quiz', return_value=None):
+            run_quiz_job(warm.id, self.session.session_key)
+
+        self.queue.submit.assert_not_called()
+        self.assertEqual(self.metrics(),
+                {'ready': 0, 'pending': 1, 'cold': 0, 'waits': 1})
+        self.assertGreaterEqual(warm_quiz_metrics()['max_wait_seconds'], 0)
+
+
+    def test_claim_cold(self):
+        """
+        If there's no usable job from login, because there isn't one,
+        it failed, it's too old, or it was already claimed, the
+        dashboard should start a new job, claim it, and count it as
+        cold.
+        """
+
+        QuizJob.objects.create(user_id='cassius', state=QuizJob.FAILED)
+        QuizJob.objects.create(user_id='cassius', state=QuizJob.SUCCEEDED,
+                created_at=timezone.now() - timedelta(hours=1))
+        QuizJob.objects.create(user_id='cassius', state=QuizJob.SUCCEEDED,
+                claimed_at=timezone.now())
+        QuizJob.objects.create(user_id='benjmain', state=QuizJob.SUCCEEDED)
+
+        with self.settings(QUIZ_JOB_WARM_MAX_AGE=60):
+            job = claim_quiz_job(self.session)
+
+        self.assertEqual(job.state, QuizJob.QUEUED)
+        self.queue.submit.assert_called_once()
+        job.refresh_from_db()
+        self.assertIsNotNone(job.claimed_at)
+        self.assertEqual(self.metrics(),
+                {'ready': 0, 'pending': 0, 'cold': 1, 'waits': 0})
+
+
+    def test_claim_once(self):
+        """
+        A job should only be claimed once, so loading the dashboard
+        again starts a new quiz.
+        """
+
+        warm = QuizJob.objects.create(user_id='cassius',
+                state=QuizJob.SUCCEEDED)
+
+        self.assertEqual(claim_quiz_job(self.session), warm)
+        self.assertNotEqual(claim_quiz_job(self.session), warm)
+        self.assertEqual(self.metrics(),
+                {'ready': 1, 'pending': 0, 'cold': 1, 'waits': 0})
+
+
+    def test_finished_before_claimed(self):
+        """
+        A job that finished before it was claimed, or was never claimed,
+        shouldn't record a wait.
+        """
+
+        job = QuizJob.objects.create(user_id='cassius')
+
+        with mock.patch('spoton.quiz.jobs.create_quiz', return_value=None):
+            run_quiz_job(job.id, self.session.session_key)
+        claim_quiz_job(self.session)
+
+        self.assertEqual(self.metrics()['waits'], 0)
+
+
+
+class QuizJobStatusViewTests(TestCase):
+    """
+    Tests the quiz_job_status view, which the client polls for the
+    status of its quiz job.
+    """
+
+    def setUp(self):
+        """
+        Creates a client whose session is logged in, and a job.
+        """
+
+        self.client = Client()
+        session = self.client.session
+        session[spotify.USER_ID] = 'cassius'
+        session.save()
+
+        self.job = QuizJob.objects.create(user_id='cassius')
+
+
+    def test_quiz_job_status(self):
+        """
+        The view should return the job's status.
+        """
+
+        response = self.client.get(reverse('quiz_job_status',
+                args=[self.job.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], str(self.job.id))
+        self.assertEqual(response.json()['state'], QuizJob.QUEUED)
+
+
+    def test_quiz_job_status_other_user(self):
+        """
+        The view should return a 404 for a job that belongs to someone
+        else, or if no one is logged in.
+        """
+
+        other = QuizJob.objects.create(user_id='benjmain')
+
+        response = self.client.get(reverse('quiz_job_status', args=[other.id]))
+        self.assertEqual(response.status_code, 404)
+
+        response = Client().get(reverse('quiz_job_status',
+                args=[self.job.id]))
+        self.assertEqual(response.status_code, 404)
+
+
+
+class DashboardViewTests(TestCase):
+    """
+    Tests that the dashboard view passes the user's quiz job to the
+    page, so the client can poll it.
+    """
+
+    def setUp(self):
+        """
+        Creates a client whose session is logged in, and replaces the
+        pool of workers with a mock.
+        """
+
+        self.client = Client()
+        session = self.client.session
+        session[spotify.USER_ID] = 'cassius'
+        session.save()
+
+        patcher = mock.patch.object(spotify, 'is_user_logged_in',
+                return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.queue = mock.Mock()
+        self.queue.submit.return_value = True
+        patcher = mock.patch.object(jobs, 'job_queue', self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+    def test_dashboard(self):
+        """
+        The rendered page should give the client the ID of the job
+        generating the user's quiz.
+        """
+
+        response = self.client.get(reverse('dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        job = QuizJob.objects.get()
+        self.assertIn('quizJob: {"id": "%s"' % job.id,
+                response.content.decode())
+
+
+    def test_dashboard_warm_quiz(self):
+        """
+        If the quiz generated when the user logged in is ready, the
+        rendered page should refer to it, and it should be counted as
+        ready.
+        """
+
+        # Runs the job right away, like a worker that's already done
+        self.queue.submit.side_effect = lambda fn, *args: fn(*args) or True
+        with mock.patch('spoton.quiz.jobs.create_quiz',
+                side_effect=lambda s: Quiz.objects.create(user_id='cassius')):
+            start_quiz_job(self.client.session)
+        quiz = Quiz.objects.get()
+        before = warm_quiz_metrics()
+
+        response = self.client.get(reverse('dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('"quiz_uuid": "%s"' % quiz.uuid,
+                response.content.decode())
+        self.assertEqual(warm_quiz_metrics()['ready'], before['ready'] + 1)
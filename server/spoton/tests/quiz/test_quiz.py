@@ -4,16 +4,22 @@ Tests the file spoton/quiz/quiz.py, as well as some functions in the
 files section_*.py.
 """
 
+from unittest import mock
+
 from django.conf import settings
 from django.contrib.staticfiles.testing import StaticLiveServerTestCase
 from django.test import TransactionTestCase, TestCase
 
+from spoton import spotify
+from spoton.models.creators import create_object, create_genre_choice, create_genre_choices
+from spoton.models.drafts import QuizDraft
 from spoton.models.quiz import Question
 from spoton.quiz.quiz import *
 from spoton.quiz.section_music_taste_features import pick_questions_music_taste
 from spoton.quiz.section_popularity_playlists import pick_questions_popularity_playlists
 from spoton.quiz.section_saved_followed import pick_questions_saved_followed
 from spoton.quiz.section_top_played import pick_questions_top_played
+from spoton.quiz.utils import QuestionPlan, requires
 from spoton.tests.setup_tests import create_authorized_session, create_session_store
 from spoton.tests.data_creation import *
 
@@ -32,22 +38,12 @@ class CreateQuizTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(CreateQuizTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def setUp(self):
         """Setting up an authorized session creates a quiz, so delete
         it before each test."""
 
-        Quiz.objects.delete()
+        Quiz.objects.all().delete()
 
 
     def test_create_quiz(self):
@@ -56,7 +52,7 @@ class CreateQuizTests(StaticLiveServerTestCase):
         to the given session.
         """
 
-        Quiz.objects.delete()
+        Quiz.objects.all().delete()
 
         quiz = create_quiz(self.session)
 
@@ -79,6 +75,103 @@ class CreateQuizTests(StaticLiveServerTestCase):
 
 
 
+class CreateQuizSaveTests(TestCase):
+    """
+    Tests that create_quiz() generates the quiz as a draft, and saves
+    it all at once, with a fixed number of queries, or not at all if it
+    fails.
+    """
+
+    def _create_quiz(self, sections):
+        """
+        Creates a quiz with the given section planning functions, for a
+        user that's logged in.
+        """
+        with mock.patch.object(spotify, 'is_user_logged_in', return_value=True), \
+                mock.patch.object(spotify, 'get_user_id', return_value='cassius'), \
+                mock.patch.multiple('spoton.quiz.quiz', **sections):
+            return create_quiz(None)
+
+
+    def _sections(self, fail=False):
+        """
+        Returns section planning functions that create 10 questions in
+        all, or that fail after creating some, if fail is True.
+        """
+        def checkbox(quiz, user_data):
+            q = create_object(CheckboxQuestion, quiz=quiz, text='Checkbox')
+            create_genre_choice(q, 'pop', answer=True)
+            create_genre_choices(q, ['rock', 'punk', 'ska'])
+            return q
+
+        def slider(quiz, user_data):
+            return create_object(SliderQuestion, quiz=quiz, text='Slider')
+
+        def failing(quiz, user_data):
+            return None
+
+        def plan(functions):
+            return lambda quiz, user_data: QuestionPlan(functions,
+                    [[quiz, user_data]] * len(functions), len(functions))
+
+        return {
+            'plan_questions_top_played': plan([checkbox] * 3),
+            'plan_questions_saved_followed': plan([checkbox] * 2),
+            'plan_questions_music_taste': plan([slider] * 3),
+            'plan_questions_popularity_playlists':
+                plan([checkbox, failing if fail else slider]),
+        }
+
+
+    def test_create_quiz_queries(self):
+        """
+        create_quiz() should save the whole quiz with a small, fixed
+        number of queries.
+        """
+        # A savepoint, the quiz, all of the questions, loading their
+        # IDs, all of the choices, loading the choices' IDs and saving
+        # the quiz's payload, and the release. The generator's quiz is
+        # saved with structural validation, so its ID isn't checked
+        # first.
+        with self.assertNumQueries(1 + 1 + 2 + 1 + 2 + 1):
+            quiz = self._create_quiz(self._sections())
+
+        self.assertEqual(quiz.questions.count(), 10)
+        self.assertEqual(CheckboxQuestion.objects.count(), 6)
+        self.assertEqual(Choice.objects.count(), 24)
+
+
+    def test_create_quiz_fails(self):
+        """
+        If creating the quiz fails, create_quiz() should return None
+        without saving anything, or making any queries.
+        """
+        with self.assertNumQueries(0):
+            quiz = self._create_quiz(self._sections(fail=True))
+
+        self.assertIsNone(quiz)
+        self.assertEqual(Quiz.objects.count(), 0)
+        self.assertEqual(Question.objects.count(), 0)
+        self.assertEqual(Choice.objects.count(), 0)
+
+
+    def test_draft_quiz(self):
+        """
+        draft_quiz() should generate the whole quiz as a draft, without
+        any queries.
+        """
+        with mock.patch.multiple('spoton.quiz.quiz', **self._sections()), \
+                self.assertNumQueries(0):
+            draft = draft_quiz('cassius', UserData(None))
+
+        self.assertIsInstance(draft, QuizDraft)
+        self.assertEqual(len(draft.questions), 10)
+        for q in draft.questions:
+            self.assertIs(q.quiz, draft)
+
+
+
+
 class PickQuestionsTests(TransactionTestCase):
     """
     Tests the functions that randomly pick and create quiz questions.
@@ -283,6 +376,69 @@ class PickQuestionsTests(TransactionTestCase):
         self.assertIsNone(questions)
 
 
+    def test_pick_questions_prefetch(self):
+        """
+        pick_questions() should request the data that every section's
+        picked questions need all at once, before creating any of the
+        questions, and shouldn't request data for questions that
+        weren't picked.
+        """
+
+        created = []
+
+        def question(name, *resources):
+            @requires(*resources)
+            def create(quiz, user_data):
+                created.append(name)
+                return name
+            return create
+
+        def plan(functions):
+            return lambda quiz, user_data: QuestionPlan(functions,
+                    [[quiz, user_data]] * len(functions), len(functions))
+
+        sections = {
+            'plan_questions_top_played': plan([question('a', 'top_tracks')]),
+            'plan_questions_saved_followed': plan([question('b', 'saved_tracks')]),
+            'plan_questions_music_taste': plan([question('c', 'music_taste')]),
+            'plan_questions_popularity_playlists': plan([
+                question('d', 'playlists_detailed'),
+                question('e', 'personal_data', 'music_taste')]),
+        }
+
+        u = UserData(None)
+        quiz = Quiz.objects.create(user_id='cassius')
+
+        def prefetch(resources):
+            self.assertEqual(created, [])
+        u.prefetch = mock.Mock(side_effect=prefetch)
+
+        with mock.patch.multiple('spoton.quiz.quiz', **sections):
+            questions = pick_questions(quiz, u)
+
+        self.assertCountEqual(questions, ['a', 'b', 'c', 'd', 'e'])
+        u.prefetch.assert_called_once_with({'top_tracks', 'saved_tracks',
+                'music_taste', 'playlists_detailed', 'personal_data'})
+
+        # Now only pick one of the last section's questions
+        sections['plan_questions_popularity_playlists'] = lambda quiz, user_data: \
+                QuestionPlan([question('d', 'playlists_detailed'),
+                    question('e', 'personal_data', 'music_taste')],
+                    [[quiz, user_data]] * 2, 1)
+        created.clear()
+        u.prefetch.reset_mock()
+
+        with mock.patch.multiple('spoton.quiz.quiz', **sections):
+            questions = pick_questions(quiz, u)
+
+        requested = u.prefetch.call_args[0][0]
+        self.assertEqual(len(questions), 4)
+        if 'd' in questions:
+            self.assertNotIn('personal_data', requested)
+        else:
+            self.assertNotIn('playlists_detailed', requested)
+
+
 
 
 class PickQuestionsRealRequestsTests(StaticLiveServerTestCase):
@@ -303,16 +459,6 @@ class PickQuestionsRealRequestsTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(PickQuestionsRealRequestsTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_pick_top_played_real_request(self):
         """
@@ -3,7 +3,9 @@
 Tests the file spoton/quiz/response.py.
 """
 
+from django.db import connection
 from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 
 from spoton.models.response import *
 from spoton.models.quiz import *
@@ -20,7 +22,7 @@ class SaveResponseTests(TransactionTestCase):
         """
         Create a quiz that the tests can create responses to.
         """
-        Quiz.objects.delete()
+        Quiz.objects.all().delete()
 
         self.quiz = Quiz.objects.create(user_id='cassius')
         self.q1 = CheckboxQuestion.objects.create(quiz=self.quiz, text="q1")
@@ -521,3 +523,75 @@ class SaveResponseTests(TransactionTestCase):
 
         self.assertEqual(Response.objects.count(), 0)
         self.assertEqual(QuestionResponse.objects.count(), 0)
+
+
+    def test_save_response_choice_of_other_question(self):
+        """
+        save_response() should fail when one of the choices given for a
+        CheckboxQuestion belongs to a different question. This means it
+        should return false and no response object should be saved in
+        the database.
+        """
+
+        data = {
+            'quiz_id': self.quiz.user_id,
+            'name': 'Benjamin',
+            'emoji': '😀',
+            'background_color': '333333',
+            'questions': [
+                {
+                    'question_id': self.q2.id,
+                    'answer': [self.c21.id, self.c33.id]
+                },
+            ]
+        }
+
+        result = save_response(data)
+
+        self.assertFalse(result)
+
+        self.assertEqual(Response.objects.count(), 0)
+        self.assertEqual(QuestionResponse.objects.count(), 0)
+
+
+    def test_save_response_num_queries(self):
+        """
+        save_response() should take the same number of queries no
+        matter how many questions the quiz has.
+        """
+
+        def response_data():
+            questions = []
+            for q in self.quiz.questions.all():
+                if isinstance(q, CheckboxQuestion):
+                    answer = [q.choices.first().id]
+                else:
+                    answer = 10
+                questions.append({'question_id': q.id, 'answer': answer})
+
+            return {
+                'quiz_id': self.quiz.user_id,
+                'name': 'Benjamin',
+                'emoji': '😀',
+                'background_color': '333333',
+                'questions': questions,
+            }
+
+        data = response_data()
+        with CaptureQueriesContext(connection) as small:
+            self.assertTrue(save_response(data))
+
+        for i in range(10):
+            q = CheckboxQuestion.objects.create(quiz=self.quiz)
+            for j in range(4):
+                Choice.objects.create(question=q, answer=(j == 0))
+            SliderQuestion.objects.create(quiz=self.quiz)
+
+        data = response_data()
+        with self.assertNumQueries(len(small)):
+            self.assertTrue(save_response(data))
+
+        response = Response.objects.last()
+        self.assertEqual(response.answers.count(), 24)
+        self.assertEqual(CheckboxResponse.choices.through.objects.filter(
+                questionresponse__response=response).count(), 13)
@@ -29,16 +29,6 @@ class QuestionExplicitnessTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(QuestionExplicitnessTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_question_explicitness(self):
         """
@@ -128,16 +118,6 @@ class QuestionEnergyTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(QuestionEnergyTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_question_energy(self):
         """
@@ -228,16 +208,6 @@ class QuestionAcousticnessTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(QuestionAcousticnessTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_question_acousticness(self):
         """
@@ -332,16 +302,6 @@ class QuestionHappinessTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(QuestionHappinessTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_question_happiness(self):
         """
@@ -434,16 +394,6 @@ class QuestionDanceabilityTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(QuestionDanceabilityTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_question_danceability(self):
         """
@@ -537,16 +487,6 @@ class QuestionDurationTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(QuestionDurationTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_question_duration(self):
         """
@@ -625,16 +565,6 @@ class QuestionAverageReleaseDateTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(QuestionAverageReleaseDateTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_question_average_release_date(self):
         """
@@ -747,16 +677,6 @@ class QuestionMusicPopularityTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(QuestionMusicPopularityTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_question_music_popularity(self):
         """
@@ -27,16 +27,6 @@ class QuestionUserFollowersTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(QuestionUserFollowersTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_question_user_followers(self):
         """
@@ -123,16 +113,6 @@ class QuestionPopularPlaylistTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing 
-        program.
-        """
-        super(QuestionPopularPlaylistTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_question_popular_playlist(self):
         """
@@ -294,16 +274,6 @@ class QuestionPlaylistTracksTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(QuestionPlaylistTracksTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_question_playlist_tracks(self):
         """
@@ -28,16 +28,6 @@ class QuestionSavedAlbumsTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(QuestionSavedAlbumsTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_question_saved_albums(self):
         """
@@ -199,16 +189,6 @@ class QuestionSavedTracksTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(QuestionSavedTracksTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_question_saved_tracks(self):
         """
@@ -374,16 +354,6 @@ class QuestionFollowedArtistsTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(QuestionFollowedArtistsTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_question_followed_artists(self):
         """
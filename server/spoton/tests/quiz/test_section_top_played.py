@@ -30,17 +30,6 @@ class QuestionTopTrackTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(QuestionTopTrackTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
-
 
     def test_question_top_track_long_term(self):
         """
@@ -231,17 +220,6 @@ class QuestionTopArtistTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(QuestionTopArtistTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
-
 
     def test_question_top_artist_long_term(self):
         """
@@ -413,16 +391,6 @@ class QuestionTopGenreTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(QuestionTopGenreTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_question_top_genre_long_term(self):
         """
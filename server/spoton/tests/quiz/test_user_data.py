@@ -3,13 +3,18 @@
 Tests the file spoton/quiz/user_data.py
 """
 
+import threading
+import time
+from unittest import mock
+
 from django.conf import settings
 from django.contrib.staticfiles.testing import StaticLiveServerTestCase
 from django.test import TransactionTestCase, TestCase
 
 from spoton import spotify
 from spoton.tests.setup_tests import create_authorized_session
-from spoton.quiz.user_data import UserData
+from spoton.quiz.user_data import UserData, DEFAULT_PREFETCH_RESOURCES
+from spoton.quiz.utils import index_tracks
 
 
 class UserDataExistsTests(TransactionTestCase):
@@ -245,6 +250,250 @@ class UserDataExistsTests(TransactionTestCase):
 
 
      
+class UserDataIndexTests(TestCase):
+    """
+    Tests find() and ids(), which look up the items of the user's lists
+    through indexes by Spotify ID, and the indexes being rebuilt when
+    the lists change.
+    """
+
+    def test_find(self):
+        """
+        find() should return the first item with the given ID, or None
+        if there isn't one.
+        """
+        u = UserData(None)
+        u._saved_tracks = [{'id': 'a', 'n': 1}, {'id': 'b'}, {'id': 'a', 'n': 2}]
+
+        self.assertEqual(u.find('saved_tracks', 'a'), {'id': 'a', 'n': 1})
+        self.assertEqual(u.find('saved_tracks', 'b'), {'id': 'b'})
+        self.assertIsNone(u.find('saved_tracks', 'c'))
+
+
+    def test_ids(self):
+        """
+        ids() should return the set of every item's ID.
+        """
+        u = UserData(None)
+        u._followed_artists = [{'id': 'a'}, {'id': 'b'}]
+
+        self.assertEqual(u.ids('followed_artists'), frozenset(['a', 'b']))
+        self.assertRaises(ValueError, u.ids, 'top_tracks')
+
+
+    def test_index_reused(self):
+        """
+        The index of a list should only be built once.
+        """
+        u = UserData(None)
+        u._saved_albums = [{'id': 'a'}, {'id': 'b'}]
+
+        with mock.patch('spoton.quiz.user_data.index_tracks',
+                wraps=index_tracks) as index:
+            u.find('saved_albums', 'a')
+            u.find('saved_albums', 'b')
+            u.ids('saved_albums')
+
+        self.assertEqual(index.call_count, 1)
+
+
+    def test_index_replaced_list(self):
+        """
+        If a list is replaced, its index should be rebuilt.
+        """
+        u = UserData(None)
+        u._music_taste = [{'id': 'a'}]
+        self.assertEqual(u.ids('music_taste'), frozenset(['a']))
+
+        u._music_taste = [{'id': 'b'}]
+        self.assertEqual(u.ids('music_taste'), frozenset(['b']))
+        self.assertIsNone(u.find('music_taste', 'a'))
+
+
+    def test_get_playlist_with_tracks_invalidates(self):
+        """
+        get_playlist_with_tracks() should find the playlist through the
+        index, and after it splices the detailed playlist into the list,
+        find() should return the detailed playlist.
+        """
+        u = UserData(None)
+        u._playlists = [
+            {'id': 'p1', 'name': 'one', 'tracks': {'total': 1}},
+            {'id': 'p2', 'name': 'two', 'tracks': {'total': 2}},
+        ]
+        self.assertEqual(u.find('playlists', 'p2')['name'], 'two')
+
+        response = mock.Mock()
+        response.json.return_value = {'tracks': {'items': [{'id': 't1'}]}}
+        with mock.patch.object(spotify, 'make_authorized_request',
+                return_value=response):
+            playlist = u.get_playlist_with_tracks('p2')
+
+        self.assertEqual(playlist['tracks']['items'], [{'id': 't1'}])
+        self.assertIs(u.find('playlists', 'p2'), playlist)
+        self.assertIsNone(u.get_playlist_with_tracks('p3'))
+
+
+
+class FakeSpotifyAPI:
+    """
+    Stands in for spotify.make_authorized_request() in the prefetch
+    tests. Answers every request with a tiny JSON response after a
+    delay, and keeps track of how many requests ran at once.
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.urls = []
+        self.running = 0
+        self.most_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, session, url, query_dict=None, full_url=False):
+        with self.lock:
+            self.urls.append(url)
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+
+        time.sleep(self.delay)
+
+        with self.lock:
+            self.running -= 1
+
+        response = mock.Mock()
+        response.json.return_value = self.json(url, query_dict)
+        return response
+
+    def json(self, url, query_dict):
+        if url == '/v1/me':
+            return {'id': 'test_user'}
+        if url == '/v1/me/following':
+            return {'artists': {'items': [{'id': 'a1'}]}}
+        if url in ('/v1/me/tracks', '/v1/me/albums',
+                '/v1/me/player/recently-played'):
+            return {'items': [{'track': {'id': 't1'}, 'album': {'id': 'l1'}}]}
+        if url == '/v1/me/top/artists':
+            return {'items': [{'id': 'a1', 'genres': ['pop']}]}
+        # Top tracks and playlists, with a different track per range
+        return {'items': [{'id': query_dict.get('time_range', 'p1')}]}
+
+
+
+class UserDataPrefetchTests(TestCase):
+    """
+    Tests UserData.prefetch(), which requests a bunch of data at once
+    so that it's all saved locally. Replaces the Spotify API with a
+    fake, so these don't need a Spotify user.
+    """
+
+    def prefetch(self, delay=0, **kwargs):
+        """
+        Runs prefetch() against a fake Spotify API that takes the given
+        time to answer each request, and returns the fake and the
+        UserData.
+        """
+        api = FakeSpotifyAPI(delay)
+        u = UserData(None)
+        with mock.patch.object(spotify, 'make_authorized_request', api):
+            u.prefetch(**kwargs)
+        return api, u
+
+
+    def test_prefetch_saves_data(self):
+        """
+        prefetch() should save each default resource locally, so that
+        their getters don't make any more requests.
+        """
+        api, u = self.prefetch()
+
+        self.assertEqual(u._personal_data, {'id': 'test_user'})
+        self.assertEqual(len(u._playlists), 1)
+        self.assertEqual(len(u._saved_tracks), 1)
+        self.assertEqual(len(u._saved_albums), 1)
+        self.assertEqual(len(u._followed_artists), 1)
+        self.assertEqual(len(u._recently_played), 1)
+        for r in ['long_term', 'medium_term', 'short_term']:
+            self.assertEqual(u._top_tracks[r], [{'id': r}])
+            self.assertEqual(u._top_genres[r], [['pop']])
+        self.assertCountEqual([t['id'] for t in u._music_taste],
+                ['long_term', 'medium_term', 'short_term'])
+
+        # One request each, no repeats
+        self.assertEqual(len(api.urls), 12)
+
+        with mock.patch.object(spotify, 'make_authorized_request') as m:
+            for resource in DEFAULT_PREFETCH_RESOURCES:
+                if resource.startswith('top_'):
+                    getattr(u, resource)('short_term')
+                else:
+                    getattr(u, resource)()
+            m.assert_not_called()
+
+
+    def test_prefetch_is_concurrent(self):
+        """
+        prefetch() should make its requests at the same time, so that
+        it takes about as long as one request, not all of them put
+        together.
+        """
+        delay = 0.2
+        start = time.perf_counter()
+        api, u = self.prefetch(delay, max_workers=12)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(api.urls), 12)
+        self.assertGreater(api.most_running, 1)
+        self.assertLess(elapsed, delay * len(api.urls) / 2)
+
+
+    def test_prefetch_max_workers(self):
+        """
+        prefetch() should never make more requests at once than
+        max_workers.
+        """
+        api, u = self.prefetch(0.05, max_workers=3)
+        self.assertEqual(len(api.urls), 12)
+        self.assertLessEqual(api.most_running, 3)
+
+
+    def test_prefetch_specific_resources(self):
+        """
+        prefetch() should only request the resources it's given, along
+        with the resources they depend on. A time range resource given
+        as a tuple should only be requested for that time range.
+        """
+        api, u = self.prefetch(resources=[('top_genres', 'short_term'),
+                'personal_data'])
+
+        self.assertEqual(u._top_artists.keys(), {'short_term'})
+        self.assertEqual(u._top_genres, {'short_term': [['pop']]})
+        self.assertEqual(u._personal_data, {'id': 'test_user'})
+        self.assertIsNone(u._playlists)
+        self.assertCountEqual(api.urls, ['/v1/me/top/artists', '/v1/me'])
+
+
+    def test_prefetch_failure(self):
+        """
+        If a request fails, prefetch() should still fetch everything
+        else, and leave the failed resource for its getter.
+        """
+        api = FakeSpotifyAPI(0)
+
+        def failing_api(session, url, query_dict=None, full_url=False):
+            if url == '/v1/me/albums':
+                raise spotify.SpotifyRequestException("test failure", 500)
+            return api(session, url, query_dict, full_url)
+
+        u = UserData(None)
+        with mock.patch.object(spotify, 'make_authorized_request', failing_api):
+            u.prefetch()
+
+        self.assertIsNone(u._saved_albums)
+        self.assertEqual(len(u._saved_tracks), 1)
+        self.assertEqual(len(u._music_taste), 3)
+
+
+
 class UserDataCompilationTests(StaticLiveServerTestCase):
     """
     Tests the methods that request and compile data from the Spotify
@@ -261,16 +510,6 @@ class UserDataCompilationTests(StaticLiveServerTestCase):
         cls.session = create_authorized_session(cls.live_server_url)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(UserDataCompilationTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def test_compile_music_taste(self):
         """
@@ -563,17 +802,6 @@ class UserDataErrorTests(StaticLiveServerTestCase):
          
         cls.session = create_authorized_session(cls.live_server_url)
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, complete any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(UserDataErrorTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
-
 
     def test_bad_session_errors(self):
         """
@@ -3,6 +3,9 @@
 Tests the file spoton/quiz/utils.py.
 """
 
+from collections import Counter
+import random
+
 from django.test import TransactionTestCase, TestCase
 
 from spoton.quiz.utils import *
@@ -223,6 +226,96 @@ class CombineTrackJsonTests(TestCase):
 
     
 
+class MergeTrackJsonTests(TestCase):
+    """
+    Tests index_tracks() and merge_track_json(), which merge lists of
+    track JSON into one through an index of the tracks' ids.
+    """
+
+    def test_index_tracks(self):
+        """
+        index_tracks() should map each id to the position of the first
+        track with that id.
+        """
+        tracks = [{'id': 'a'}, {'id': 'b'}, {'id': 'a'}]
+        self.assertEqual(index_tracks(tracks), {'a': 0, 'b': 1})
+
+
+    def test_merge_with_index(self):
+        """
+        merge_track_json() should merge several lists into one through
+        the same index, keeping the index up to date with the tracks it
+        adds.
+        """
+        tracks1 = [{'id': 1, 'a': 1}, {'id': 2, 'a': 2}]
+        index = index_tracks(tracks1)
+
+        merge_track_json(tracks1, [{'id': 2, 'a': 0, 'b': 2}, {'id': 3, 'b': 3}],
+                index=index)
+        merge_track_json(tracks1, [{'id': 3, 'c': 3}, {'id': 1, 'b': 1}],
+                index=index)
+
+        self.assertEqual(tracks1, [
+            {'id': 1, 'a': 1, 'b': 1},
+            {'id': 2, 'a': 2, 'b': 2},
+            {'id': 3, 'b': 3, 'c': 3},
+        ])
+        self.assertEqual(index, {1: 0, 2: 1, 3: 2})
+
+
+    def test_merge_fields(self):
+        """
+        With fields, merge_track_json() should only merge those fields,
+        into the tracks in tracks1 themselves, still keeping the values
+        already in tracks1. Tracks without a duplicate should be added
+        with only their id and those fields.
+        """
+        track = {'id': 1, 'type': 'track', 'energy': 0.1}
+        tracks1 = [track]
+        tracks2 = [
+            {'id': 1, 'type': 'audio_features', 'energy': 0.9, 'valence': 0.5},
+            {'id': 2, 'type': 'audio_features', 'valence': 0.2},
+        ]
+
+        merge_track_json(tracks1, tracks2, fields=['energy', 'valence'])
+
+        self.assertIs(tracks1[0], track)
+        self.assertEqual(tracks1, [
+            {'id': 1, 'type': 'track', 'energy': 0.1, 'valence': 0.5},
+            {'id': 2, 'valence': 0.2},
+        ])
+
+
+    def test_merge_matches_combine(self):
+        """
+        merge_track_json() should merge tracks exactly the way the
+        original, unindexed combine_track_json() did, duplicates and
+        all.
+        """
+        def combine_unindexed(tracks1, tracks2):
+            for t2 in tracks2:
+                for i, t1 in enumerate(tracks1):
+                    if t1['id'] == t2['id']:
+                        t2.update(t1)
+                        tracks1[i] = t2
+                        break
+                else:
+                    tracks1.append(t2)
+            return tracks1
+
+        def tracks(n, start, field):
+            return [{'id': random.randrange(start, start + 20), field: i}
+                    for i in range(n)]
+
+        for i in range(20):
+            t1 = tracks(15, 0, 'a')
+            t2 = tracks(15, 10, 'b')
+            expected = combine_unindexed([dict(t) for t in t1],
+                    [dict(t) for t in t2])
+            self.assertEqual(merge_track_json(t1, t2), expected)
+
+
+
 class ChooseItemsNotInListTests(TestCase):
     """
     Tests random_from_list_blacklist(), which chooses a given number of
@@ -281,6 +374,85 @@ class ChooseItemsNotInListTests(TestCase):
         self.assertIsNone(results)
 
 
+    def test_random_from_list_blacklist_key(self):
+        """
+        With a key, random_from_list_blacklist() should compare items
+        with the blacklist by their keys, and take a blacklist of
+        either items or a set of keys.
+        """
+        item_list = [{'id': i, 'n': i} for i in range(10)]
+        excluded_items = [{'id': i} for i in range(0, 10, 2)]
+
+        for blacklist in [excluded_items, {i for i in range(0, 10, 2)}]:
+            results = random_from_list_blacklist(item_list, blacklist, 5,
+                    key=lambda item: item['id'])
+            self.assertCountEqual([r['n'] for r in results], [1, 3, 5, 7, 9])
+
+        self.assertIsNone(random_from_list_blacklist(item_list,
+                excluded_items, 6, key=lambda item: item['id']))
+
+
+    def test_random_from_list_blacklist_no_choices(self):
+        """
+        Picking no items should always work, even from an empty list.
+        """
+        self.assertEqual(random_from_list_blacklist([], [], 0), [])
+        self.assertEqual(random_from_list_blacklist([1, 2], [1], 0), [])
+
+
+    def _assert_uniform(self, counts, expected, critical):
+        """
+        Asserts that the counts fit the expected counts, with Pearson's
+        chi-squared test. critical is the statistic's critical value for
+        the number of outcomes minus one degrees of freedom, at a
+        significance level of 0.001.
+        """
+        self.assertCountEqual(counts.keys(), expected.keys())
+        statistic = sum((counts[k] - expected[k])**2 / expected[k]
+                for k in expected)
+        self.assertLess(statistic, critical)
+
+
+    def test_random_from_list_blacklist_distribution(self):
+        """
+        Every ordered choice of items that aren't blacklisted should be
+        equally likely, like with the original implementation.
+        """
+        random.seed(1234)
+        item_list = [1, 2, 3, 4, 5, 6]
+        excluded_items = [2, 5]
+        trials = 24000
+
+        counts = Counter(tuple(random_from_list_blacklist(item_list,
+                excluded_items, 2)) for i in range(trials))
+
+        # 4 allowed items, so 4*3 = 12 ordered pairs, 11 degrees of
+        # freedom
+        outcomes = [(a, b) for a in [1, 3, 4, 6] for b in [1, 3, 4, 6] if a != b]
+        self._assert_uniform(counts,
+                {o: trials / len(outcomes) for o in outcomes}, 31.26)
+
+
+    def test_random_from_list_blacklist_distribution_duplicates(self):
+        """
+        An item that's in the list more than once should be picked as
+        often as its copies together would be, like with the original
+        implementation.
+        """
+        random.seed(4321)
+        item_list = ['a', 'a', 'b', 'c', 'd']
+        excluded_items = ['d']
+        trials = 20000
+
+        counts = Counter(random_from_list_blacklist(item_list,
+                excluded_items, 1)[0] for i in range(trials))
+
+        # 2 degrees of freedom
+        self._assert_uniform(counts, {'a': trials / 2, 'b': trials / 4,
+                'c': trials / 4}, 13.82)
+
+
+
 def func0(i):
     return i
 
@@ -515,3 +687,141 @@ class CallRandFunctionsArgSetsTests(TestCase):
 
         self.assertCountEqual(results, [4, 4, 4])
 
+
+
+
+@requires('saved_tracks', ('top_artists', 'long_term'))
+def question_func(quiz, user_data):
+    return quiz
+
+@requires('top_tracks', 'music_taste', ('top_artists', 'long_term'))
+def question_time_range_func(quiz, user_data, time_range):
+    return time_range
+
+
+class QuestionRequirementsTests(TestCase):
+    """
+    Tests requires(), which declares the UserData resources a question
+    function uses, and function_requirements(), which returns the
+    resources one call to a question function needs.
+    """
+
+    def test_requires(self):
+        """
+        requires() should save the resources on the function, without
+        changing what the function does.
+        """
+        self.assertEqual(question_func.requirements,
+                ['saved_tracks', ('top_artists', 'long_term')])
+        self.assertEqual(question_func(3, None), 3)
+
+
+    def test_function_requirements(self):
+        """
+        function_requirements() should return the function's resources
+        as they are if it doesn't take a time range.
+        """
+        self.assertEqual(function_requirements(question_func, [1, None]),
+                ['saved_tracks', ('top_artists', 'long_term')])
+
+
+    def test_function_requirements_time_range(self):
+        """
+        function_requirements() should fill in the time range a
+        function is called with, for every resource that doesn't
+        already have one.
+        """
+        requirements = function_requirements(question_time_range_func,
+                [1, None, 'short_term'])
+        self.assertEqual(requirements, [('top_tracks', 'short_term'),
+                ('music_taste', 'short_term'), ('top_artists', 'long_term')])
+
+
+    def test_function_requirements_none(self):
+        """
+        function_requirements() should return an empty list for a
+        function that doesn't declare any requirements.
+        """
+        self.assertEqual(function_requirements(func0, [3]), [])
+
+
+
+
+class QuestionPlanTests(TestCase):
+    """
+    Tests QuestionPlan, which randomly orders a list of functions ahead
+    of time, knows what the functions that will be picked require, and
+    then calls them in order until enough of them succeed.
+    """
+
+    def test_question_plan_call(self):
+        """
+        call() should successfully call the specified number of
+        functions, each with their own argument list, and return a
+        list of their return values.
+        """
+        plan = QuestionPlan([func0, func1, func2, func3],
+                [[3], [3], [3], [3]], 3)
+
+        results = plan.call()
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(len(set(results)), 3)
+        for i in results:
+            self.assertIn(i, range(3, 3+4))
+
+
+    def test_question_plan_order(self):
+        """
+        call() should call the functions in the order the plan picked
+        when it was created.
+        """
+        plan = QuestionPlan([func0, func1, func2, func3],
+                [[3], [3], [3], [3]], 2)
+        expected = [f(*args) for f, args in plan.calls[:2]]
+
+        self.assertEqual(plan.call(), expected)
+
+
+    def test_question_plan_fallback(self):
+        """
+        If a picked function fails, call() should call the next
+        function in the plan in its place.
+        """
+        plan = QuestionPlan([func6, func6, func1, func2],
+                [[3], [3], [3], [3]], 2)
+
+        self.assertCountEqual(plan.call(), [4, 5])
+
+
+    def test_question_plan_not_enough(self):
+        """
+        call() should return None if too few functions succeed, or if
+        there are more or less argument lists than functions.
+        """
+        plan = QuestionPlan([func6, func6, func1], [[3], [3], [3]], 2)
+        self.assertIsNone(plan.call())
+
+        plan = QuestionPlan([func0, func1, func2], [[3], [3]], 2)
+        self.assertIsNone(plan.call())
+
+
+    def test_question_plan_requirements(self):
+        """
+        requirements() should return the union of the requirements of
+        only the functions that will be called if none of them fail.
+        """
+        @requires('playlists')
+        def other_func(quiz, user_data):
+            return quiz
+
+        plan = QuestionPlan([question_func, question_time_range_func, other_func],
+                [[1, None], [1, None, 'medium_term'], [1, None]], 2)
+
+        expected = set()
+        for function, args in plan.calls[:2]:
+            expected.update(function_requirements(function, args))
+        self.assertEqual(plan.requirements(), expected)
+        self.assertNotIn(
+                function_requirements(*plan.calls[2])[0], plan.requirements())
+
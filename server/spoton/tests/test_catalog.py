@@ -0,0 +1,174 @@
+"""Tests the cache of Spotify catalog objects shared by every user.
+
+Tests the file spoton/catalog.py.
+"""
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from spoton import catalog, spotify
+from spoton.quiz.user_data import UserData
+
+
+class FakeCatalogEndpoint:
+    """
+    Stands in for make_authorized_request() in the catalog tests.
+    Answers requests for several audio features by ID, with null for
+    IDs starting with 'unknown', and keeps the IDs of every request.
+    """
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, session, url, query_dict={}):
+        ids = query_dict['ids'].split(',')
+        self.requests.append(ids)
+
+        response = mock.Mock()
+        response.json.return_value = {'audio_features': [
+            None if i.startswith('unknown') else {'id': i, 'energy': 0.5}
+            for i in ids]}
+        return response
+
+
+
+class CatalogTests(TestCase):
+    """
+    Tests get_catalog_objects(), which looks catalog objects up in a
+    cache shared by every user, and only requests the missing ones.
+    """
+
+    def setUp(self):
+        catalog.reset_catalog_cache()
+        cache.clear()
+        self.endpoint = FakeCatalogEndpoint()
+        patcher = mock.patch.object(spotify, 'make_authorized_request',
+                self.endpoint)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+    def tearDown(self):
+        catalog.reset_catalog_cache()
+        cache.clear()
+
+
+    def _ids(self, objects):
+        return [o['id'] for o in objects]
+
+
+    def test_cached_for_every_user(self):
+        """
+        Once objects were requested for one user, they shouldn't be
+        requested again for another.
+        """
+        ids = ['a', 'b', 'c']
+
+        objects = catalog.get_catalog_objects(None, 'audio_features', ids)
+        self.assertEqual(self._ids(objects), ids)
+        self.assertEqual(self.endpoint.requests, [ids])
+
+        objects = catalog.get_catalog_objects('other', 'audio_features', ids)
+        self.assertEqual(self._ids(objects), ids)
+        self.assertEqual(len(self.endpoint.requests), 1)
+        self.assertEqual(catalog.get_catalog_cache().stats()['hits'], 3)
+
+
+    def test_only_missing_requested(self):
+        """
+        Only the IDs that aren't cached should be requested, each once,
+        and the objects should be returned in the order of the IDs.
+        """
+        catalog.get_catalog_objects(None, 'audio_features', ['b', 'd'])
+
+        objects = catalog.get_catalog_objects(None, 'audio_features',
+                ['a', 'b', 'c', 'a', 'd'])
+
+        self.assertEqual(self._ids(objects), ['a', 'b', 'c', 'a', 'd'])
+        self.assertEqual(self.endpoint.requests[1], ['a', 'c'])
+
+
+    def test_sections(self):
+        """
+        The missing IDs should be requested as many at a time as the
+        endpoint allows.
+        """
+        ids = [str(i) for i in range(250)]
+
+        objects = catalog.get_catalog_objects(None, 'audio_features', ids)
+
+        self.assertEqual(self._ids(objects), ids)
+        self.assertEqual([len(r) for r in self.endpoint.requests],
+                [100, 100, 50])
+
+
+    def test_unknown_ids(self):
+        """
+        Objects Spotify doesn't have should be left out, and not cached.
+        """
+        objects = catalog.get_catalog_objects(None, 'audio_features',
+                ['a', 'unknown1'])
+        self.assertEqual(self._ids(objects), ['a'])
+
+        catalog.get_catalog_objects(None, 'audio_features', ['a', 'unknown1'])
+        self.assertEqual(self.endpoint.requests[1], ['unknown1'])
+
+
+    def test_shared_tier(self):
+        """
+        Objects missing in this process should be found in the Django
+        cache, like when another process requested them.
+        """
+        catalog.get_catalog_objects(None, 'audio_features', ['a', 'b'])
+        catalog.reset_catalog_cache()
+
+        objects = catalog.get_catalog_objects(None, 'audio_features', ['a', 'b'])
+
+        self.assertEqual(self._ids(objects), ['a', 'b'])
+        self.assertEqual(len(self.endpoint.requests), 1)
+        self.assertEqual(catalog.get_catalog_cache().stats()['shared_hits'], 2)
+
+
+    @override_settings(SPOTIFY_CATALOG_CACHE=None)
+    def test_no_shared_tier(self):
+        """
+        Without a shared tier, objects should only be cached in this
+        process.
+        """
+        catalog.get_catalog_objects(None, 'audio_features', ['a'])
+        catalog.reset_catalog_cache()
+
+        catalog.get_catalog_objects(None, 'audio_features', ['a'])
+        self.assertEqual(len(self.endpoint.requests), 2)
+
+
+    def test_copies(self):
+        """
+        Changing an object that was returned shouldn't change the one
+        that's cached.
+        """
+        objects = catalog.get_catalog_objects(None, 'audio_features', ['a'])
+        objects[0]['energy'] = 1
+
+        objects = catalog.get_catalog_objects(None, 'audio_features', ['a'])
+        self.assertEqual(objects[0]['energy'], 0.5)
+
+
+    def test_user_data_audio_features(self):
+        """
+        UserData should get audio features through the catalog, so a
+        second user with the same tracks doesn't request them again.
+        """
+        tracks = [{'id': 'a', 'name': 'A'}, {'id': 'b', 'name': 'B'}]
+
+        for i in range(2):
+            u = UserData(None)
+            u._music_taste = [dict(t) for t in tracks]
+            data = u.music_taste_with_audio_features()
+
+            self.assertEqual([t['name'] for t in data], ['A', 'B'])
+            self.assertEqual([t['energy'] for t in data], [0.5, 0.5])
+
+        self.assertEqual(self.endpoint.requests, [['a', 'b']])
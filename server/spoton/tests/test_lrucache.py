@@ -0,0 +1,121 @@
+"""Tests the in-process least-recently-used cache.
+
+Tests the file spoton/lrucache.py.
+"""
+
+import threading
+import time
+
+from django.test import TestCase
+
+from spoton.lrucache import LRUCache
+
+
+
+class LRUCacheTests(TestCase):
+    """
+    Tests LRUCache, which keeps values until they expire or are the
+    least recently used when it runs out of room.
+    """
+
+    def test_get_set(self):
+        """
+        get() should return what was set, or the default if nothing was.
+        """
+        c = LRUCache(max_size=10)
+        c.set('a', 1)
+
+        self.assertEqual(c.get('a'), 1)
+        self.assertIsNone(c.get('b'))
+        self.assertEqual(c.get('b', 5), 5)
+        self.assertEqual(c.get_many(['a', 'b']), {'a': 1})
+
+
+    def test_evicts_least_recently_used(self):
+        """
+        When the cache is full, the value that was used the longest ago
+        should be evicted.
+        """
+        c = LRUCache(max_size=2)
+        c.set('a', 1)
+        c.set('b', 2)
+        c.get('a')
+        c.set('c', 3)
+
+        self.assertEqual(c.get('a'), 1)
+        self.assertIsNone(c.get('b'))
+        self.assertEqual(c.get('c'), 3)
+        self.assertEqual(c.stats()['evictions'], 1)
+
+
+    def test_size_function(self):
+        """
+        With a size function, the sizes of the values should add up to
+        no more than max_size, and values too big to fit at all
+        shouldn't be saved.
+        """
+        c = LRUCache(max_size=10, size=len)
+        c.set('a', 'xxxx')
+        c.set('b', 'xxxx')
+        c.set('c', 'xxxx')
+
+        self.assertEqual(len(c), 2)
+        self.assertEqual(c.stats()['size'], 8)
+        self.assertIsNone(c.get('a'))
+
+        c.set('d', 'x' * 11)
+        self.assertIsNone(c.get('d'))
+        self.assertEqual(c.stats()['size'], 8)
+
+
+    def test_ttl(self):
+        """
+        Values should expire ttl seconds after they were set.
+        """
+        c = LRUCache(max_size=10, ttl=0.05)
+        c.set('a', 1)
+        self.assertEqual(c.get('a'), 1)
+
+        time.sleep(0.06)
+        self.assertIsNone(c.get('a'))
+        self.assertEqual(len(c), 0)
+
+
+    def test_stats(self):
+        """
+        stats() should count the hits and misses, and the ratio of them.
+        """
+        c = LRUCache(max_size=10)
+        self.assertEqual(c.stats()['hit_ratio'], 0)
+
+        c.set('a', 1)
+        for key in ['a', 'a', 'a', 'b']:
+            c.get(key)
+
+        stats = c.stats()
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_ratio'], 0.75)
+        self.assertEqual(stats['entries'], 1)
+
+
+    def test_threads(self):
+        """
+        Many threads using the cache at once should never make it grow
+        past max_size.
+        """
+        c = LRUCache(max_size=50)
+
+        def use(n):
+            for i in range(500):
+                c.set((n, i % 80), i)
+                c.get((n, (i * 7) % 80))
+
+        threads = [threading.Thread(target=use, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(c), 50)
+        self.assertEqual(c.stats()['size'], 50)
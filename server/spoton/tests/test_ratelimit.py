@@ -0,0 +1,218 @@
+"""Tests the rate limiter that requests to Spotify wait in line for.
+
+Tests the file spoton/ratelimit.py.
+"""
+
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from spoton.ratelimit import RequestScheduler, RateLimitTimeout
+
+
+def response(status_code, retry_after=None):
+    """Returns a fake requests.Response with the given status code."""
+    r = mock.Mock()
+    r.status_code = status_code
+    r.headers = {}
+    if retry_after is not None:
+        r.headers['Retry-After'] = str(retry_after)
+    return r
+
+
+
+class RequestSchedulerTests(TestCase):
+    """
+    Tests RequestScheduler, which makes requests wait in line for a
+    token bucket budget, and holds requests back and retries them when
+    the API answers with a 429.
+    """
+
+    def test_burst(self):
+        """
+        The scheduler should let `burst` requests through right away,
+        and make the next one wait for the bucket to refill.
+        """
+        s = RequestScheduler(rate=20, burst=5)
+
+        start = time.monotonic()
+        for i in range(5):
+            s.acquire()
+        self.assertLess(time.monotonic() - start, 0.04)
+
+        s.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+        metrics = s.metrics()
+        self.assertEqual(metrics['requests'], 6)
+        self.assertEqual(metrics['throttled'], 1)
+        self.assertGreater(metrics['throttle_seconds'], 0)
+
+
+    def test_retry_after(self):
+        """
+        If a request is answered with a 429, the scheduler should wait
+        for as long as Retry-After says, and then send it again.
+        """
+        s = RequestScheduler(rate=100, burst=100)
+        send = mock.Mock(side_effect=[response(429, 0.2), response(200)])
+
+        start = time.monotonic()
+        r = s.request(send)
+
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(send.call_count, 2)
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+        self.assertEqual(s.metrics()['rate_limited'], 1)
+
+
+    def test_max_retries(self):
+        """
+        If a request is still answered with a 429 after max_retries
+        retries, the scheduler should return that response.
+        """
+        s = RequestScheduler(rate=100, burst=100, max_retries=2)
+        send = mock.Mock(return_value=response(429, 0))
+
+        r = s.request(send)
+
+        self.assertEqual(r.status_code, 429)
+        self.assertEqual(send.call_count, 3)
+        self.assertEqual(s.metrics()['rate_limited'], 3)
+
+
+    def test_hold_blocks_every_request(self):
+        """
+        A 429 should hold back every request, not just the one that
+        was answered with it.
+        """
+        s = RequestScheduler(rate=100, burst=100)
+        s.hold(0.2)
+
+        start = time.monotonic()
+        s.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+
+    def test_concurrent_requests_queue(self):
+        """
+        Requests from many threads at once should wait in line instead
+        of failing, and should all get through at the scheduler's rate.
+        """
+        s = RequestScheduler(rate=50, burst=5)
+        send = mock.Mock(return_value=response(200))
+        results = []
+
+        def make_request():
+            results.append(s.request(send).status_code)
+
+        threads = [threading.Thread(target=make_request) for i in range(20)]
+        start = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - start
+
+        # 5 right away, then 15 more at 50 per second
+        self.assertEqual(results, [200] * 20)
+        self.assertGreaterEqual(elapsed, 15 / 50 - 0.02)
+
+        metrics = s.metrics()
+        self.assertEqual(metrics['queue_depth'], 0)
+        self.assertGreater(metrics['max_queue_depth'], 1)
+        self.assertEqual(metrics['requests'], 20)
+        self.assertGreaterEqual(metrics['throttled'], 15)
+
+
+    def test_max_wait(self):
+        """
+        A request that waits in line for longer than max_wait should
+        raise RateLimitTimeout, and leave the line for the others.
+        """
+        s = RequestScheduler(rate=100, burst=1, max_wait=0.1)
+        s.hold(1)
+
+        self.assertRaises(RateLimitTimeout, s.acquire)
+        self.assertEqual(s.metrics()['queue_depth'], 0)
+
+
+    def test_shared_hold(self):
+        """
+        With a cache, a 429 seen by one scheduler should hold back the
+        requests of every scheduler sharing that cache, like the other
+        server processes.
+        """
+        cache.clear()
+        s1 = RequestScheduler(rate=100, burst=100, cache_alias='default',
+                cache_key='test_ratelimit')
+        s2 = RequestScheduler(rate=100, burst=100, cache_alias='default',
+                cache_key='test_ratelimit')
+
+        s1.hold(0.2)
+
+        start = time.monotonic()
+        s2.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+        cache.clear()
+
+
+    def test_shared_budget(self):
+        """
+        With a cache, schedulers sharing it should together make no more
+        than `rate` requests in one second.
+        """
+        cache.clear()
+        s1 = RequestScheduler(rate=4, burst=4, cache_alias='default',
+                cache_key='test_ratelimit')
+        s2 = RequestScheduler(rate=4, burst=4, cache_alias='default',
+                cache_key='test_ratelimit')
+
+        # Start at the beginning of a one-second window
+        time.sleep(1 - time.time() % 1)
+
+        start = time.monotonic()
+        for i in range(2):
+            s1.acquire()
+            s2.acquire()
+        self.assertLess(time.monotonic() - start, 0.5)
+
+        # Both buckets have tokens left, but the window is used up
+        s1.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.5)
+        cache.clear()
+
+
+    def test_shared_budget_counts_requests_made(self):
+        """
+        The count of each one-second window in the cache should only
+        include the requests that went ahead in it, not the attempts
+        that found it full and waited for the next one.
+        """
+        cache.clear()
+        s1 = RequestScheduler(rate=4, burst=4, cache_alias='default',
+                cache_key='test_ratelimit')
+        s2 = RequestScheduler(rate=4, burst=4, cache_alias='default',
+                cache_key='test_ratelimit')
+
+        # Start at the beginning of a one-second window
+        time.sleep(1 - time.time() % 1)
+        window = int(time.time())
+
+        for i in range(2):
+            s1.acquire()
+            s2.acquire()
+
+        # Both of these find the window full, and go in the next one
+        s1.acquire()
+        s2.acquire()
+
+        key = 'test_ratelimit:window:'
+        self.assertEqual(cache.get(key + str(window)), 4)
+        self.assertEqual(cache.get(key + str(window + 1)), 2)
+        self.assertEqual(s1.metrics()['requests']
+                + s2.metrics()['requests'], 6)
+        cache.clear()
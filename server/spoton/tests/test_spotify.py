@@ -3,18 +3,27 @@
 Tests the file spoton/spotify.py.
 """
 
+from collections import Counter
 import credentials
 from cryptography.fernet import Fernet
+import gc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from importlib import import_module
+import json
 import os
+import random
 import requests
+import threading
 import time
+import tracemalloc
 from unittest import mock
 import urllib
 from urllib.parse import parse_qs, urlencode
 
 from django.conf import settings
+from django.core.cache import cache
 from django.contrib.staticfiles.testing import StaticLiveServerTestCase
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.test.client import RequestFactory,Client
 from django.urls import reverse
 
@@ -76,16 +85,6 @@ class AuthAccessTokenTests(StaticLiveServerTestCase):
         cls.user_id = session.get(spotify.USER_ID)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, cancel any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(AuthAccessTokenTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def setUp(self):
         """
@@ -142,13 +141,68 @@ class AuthAccessTokenTests(StaticLiveServerTestCase):
     def test_set_auth_access_token_timeout(self):
         """
         _set_auth_access_token() should save the given token in the
-        given session under AUTH_ACCESS_TOKEN, and should delete it
-        after the given timeout (in seconds).
+        given session under AUTH_ACCESS_TOKEN, and once the given
+        timeout (in seconds) has passed, the token shouldn't be used
+        anymore.
         """
         session = self.client.session
         spotify._set_auth_access_token(session, 'token123', 1)
         time.sleep(1)
-        self.assertIsNone(session.get(spotify.AUTH_ACCESS_TOKEN))
+
+        # Pretend requesting a new token failed
+        with mock.patch.object(spotify, '_request_authorized_token') as request:
+            self.assertIsNone(spotify._get_auth_access_token(session))
+        request.assert_called_once_with(session)
+
+
+    @override_settings(SPOTIFY_TOKEN_REFRESH_SKEW=0.5)
+    def test_get_auth_access_token_refresh_skew(self):
+        """
+        _get_auth_access_token() should request a new token once the
+        saved one is within SPOTIFY_TOKEN_REFRESH_SKEW seconds of
+        expiring, and until then, shouldn't request anything.
+        """
+        session = self.client.session
+        spotify._set_auth_access_token(session, 'token123', 2)
+
+        def refresh(session):
+            spotify._set_auth_access_token(session, 'token456', 2)
+
+        with mock.patch.object(spotify, '_request_authorized_token',
+                side_effect=refresh) as request:
+            self.assertEqual(spotify._get_auth_access_token(session), 'token123')
+            request.assert_not_called()
+
+            time.sleep(1.6)
+            self.assertEqual(spotify._get_auth_access_token(session), 'token456')
+            request.assert_called_once_with(session)
+
+
+    @override_settings(SPOTIFY_TOKEN_REFRESH_SKEW=0.5)
+    def test_get_auth_access_token_refresh_fails(self):
+        """
+        If requesting a new token fails before the old one has expired,
+        _get_auth_access_token() should keep returning the old one.
+        """
+        session = self.client.session
+        spotify._set_auth_access_token(session, 'token123', 2)
+        time.sleep(1.6)
+
+        with mock.patch.object(spotify, '_request_authorized_token'):
+            self.assertEqual(spotify._get_auth_access_token(session), 'token123')
+
+
+    def test_set_auth_access_token_skew_limit(self):
+        """
+        A token should never be refreshed earlier than halfway through
+        its lifetime, no matter what SPOTIFY_TOKEN_REFRESH_SKEW is.
+        """
+        session = self.client.session
+        spotify._set_auth_access_token(session, 'token123', 100)
+
+        expires = session[spotify.AUTH_ACCESS_TOKEN_EXPIRES]
+        refresh_at = session[spotify.AUTH_ACCESS_TOKEN_REFRESH_AT]
+        self.assertAlmostEqual(expires - refresh_at, 50, places=3)
 
 
     def test_get_auth_access_token_exists(self):
@@ -184,6 +238,472 @@ class AuthAccessTokenTests(StaticLiveServerTestCase):
 
 
 
+class TokenStoreStressTests(TestCase):
+    """
+    Saving a token shouldn't start a thread or keep anything alive, so
+    the number of threads and the memory the module holds on to should
+    stay flat no matter how many users have logged in.
+    """
+
+    def _log_in_sessions(self, num):
+        """Saves tokens for the given number of sessions, then drops
+        them, and returns how many bytes are still allocated after."""
+
+        engine = import_module(settings.SESSION_ENGINE)
+
+        sessions = []
+        for i in range(num):
+            session = engine.SessionStore()
+            spotify._set_refresh_token(session, 'refresh' + str(i))
+            spotify._set_auth_access_token(session, 'token' + str(i), 3600)
+            sessions.append(session)
+
+        self.assertEqual(threading.active_count(), self.threads)
+
+        del sessions
+        session = None
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0]
+
+
+    def test_token_store_flat(self):
+        """
+        Logging in thousands of sessions shouldn't start any threads,
+        and once the sessions are gone, nothing they held should still
+        be allocated.
+        """
+        gc.collect()
+        self.threads = threading.active_count()
+
+        tracemalloc.start()
+        try:
+            baseline = self._log_in_sessions(10)
+            after_1000 = self._log_in_sessions(1000)
+            after_5000 = self._log_in_sessions(5000)
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(threading.active_count(), self.threads)
+        self.assertLess(after_1000 - baseline, 64 * 1024)
+        self.assertLess(after_5000 - baseline, 64 * 1024)
+
+
+
+class NoauthTokenSharingTests(TestCase):
+    """
+    The Non-Authorized Access Token is shared by every thread and every
+    server process through the cache. Only one caller at a time should
+    request a new one, while the others reuse the old one or wait.
+    """
+
+    def setUp(self):
+        spotify._clear_noauth_access_token()
+        cache.delete(spotify.NOAUTH_ACCESS_TOKEN_LEASE)
+
+
+    def tearDown(self):
+        spotify._clear_noauth_access_token()
+        cache.delete(spotify.NOAUTH_ACCESS_TOKEN_LEASE)
+
+
+    def fake_request(self, delay=0.2):
+        """
+        Returns a mock of _request_noauth_access_token() that takes a
+        while to get a new token, like a real request would.
+        """
+        def request():
+            time.sleep(delay)
+            spotify._set_noauth_access_token(
+                    'token' + str(request_mock.call_count), 3600)
+        request_mock = mock.Mock(side_effect=request)
+        return request_mock
+
+
+    def test_single_flight(self):
+        """
+        When there's no token, many threads asking for one at once
+        should cause only one request, and all get the same token.
+        """
+        request = self.fake_request()
+        tokens = []
+
+        def get_token():
+            tokens.append(spotify._get_noauth_access_token())
+
+        before = spotify.noauth_token_metrics()
+        with mock.patch.object(spotify, '_request_noauth_access_token', request):
+            threads = [threading.Thread(target=get_token) for i in range(20)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(tokens, ['token1'] * 20)
+
+        after = spotify.noauth_token_metrics()
+        self.assertEqual(after['refreshes'] - before['refreshes'], 1)
+        self.assertEqual(after['misses'] - before['misses'], 20)
+
+
+    def test_reuse_old_token_while_refreshing(self):
+        """
+        While another process holds the lease on refreshing the token,
+        a caller should keep using the old token if it hasn't expired,
+        instead of requesting its own.
+        """
+        spotify._set_noauth_access_token('old_token', 1)
+        time.sleep(0.6)
+
+        # Another process is refreshing
+        cache.add(spotify.NOAUTH_ACCESS_TOKEN_LEASE, True)
+
+        request = self.fake_request()
+        with mock.patch.object(spotify, '_request_noauth_access_token', request):
+            self.assertEqual(spotify._get_noauth_access_token(), 'old_token')
+        request.assert_not_called()
+
+
+    def test_wait_for_other_process(self):
+        """
+        While another process holds the lease on refreshing the token,
+        and there's no valid token, a caller should wait for the other
+        process's token instead of requesting its own.
+        """
+        cache.add(spotify.NOAUTH_ACCESS_TOKEN_LEASE, True)
+
+        def other_process():
+            time.sleep(0.2)
+            spotify._set_noauth_access_token('their_token', 3600)
+            cache.delete(spotify.NOAUTH_ACCESS_TOKEN_LEASE)
+        threading.Thread(target=other_process).start()
+
+        request = self.fake_request()
+        with mock.patch.object(spotify, '_request_noauth_access_token', request):
+            self.assertEqual(spotify._get_noauth_access_token(), 'their_token')
+        request.assert_not_called()
+
+
+    def test_other_process_holds_lease_too_long(self):
+        """
+        If another process holds the lease on refreshing the token for
+        longer than the lease timeout, and there's no valid token, a
+        noauth request should raise a SpotifyRequestException without
+        being made.
+        """
+        cache.add(spotify.NOAUTH_ACCESS_TOKEN_LEASE, True)
+
+        request = self.fake_request()
+        with self.settings(SPOTIFY_TOKEN_LEASE_TIMEOUT=0.2), \
+                mock.patch.object(spotify, '_request_noauth_access_token',
+                        request), \
+                mock.patch.object(spotify, '_http_request') as http_request:
+            with self.assertRaises(spotify.SpotifyRequestException):
+                spotify.make_noauth_request('/v1/browse/categories')
+        request.assert_not_called()
+        http_request.assert_not_called()
+
+
+    def test_metrics_hits(self):
+        """
+        Reading a token that isn't about to expire should count as a
+        hit, without any refresh.
+        """
+        spotify._set_noauth_access_token('token123', 3600)
+
+        before = spotify.noauth_token_metrics()
+        for i in range(3):
+            self.assertEqual(spotify._get_noauth_access_token(), 'token123')
+        after = spotify.noauth_token_metrics()
+
+        self.assertEqual(after['hits'] - before['hits'], 3)
+        self.assertEqual(after['misses'], before['misses'])
+        self.assertEqual(after['refreshes'], before['refreshes'])
+
+
+
+class FakeTokenHandler(BaseHTTPRequestHandler):
+    """
+    Stands in for Spotify's token endpoint. Takes a while to answer,
+    like the real one, and hands out a new access token and Refresh
+    Token for every request, counting the requests by Refresh Token.
+    """
+
+    posts = Counter()
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        refresh_token = parse_qs(body.decode())['refresh_token'][0]
+
+        with self.lock:
+            self.posts[refresh_token] += 1
+            n = self.posts[refresh_token]
+
+        time.sleep(0.3)
+
+        response = json.dumps({
+            'access_token': refresh_token + '_access' + str(n),
+            'refresh_token': refresh_token + '_new' + str(n),
+            'expires_in': 3600,
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+
+class AuthTokenRefreshCoalescingTests(TestCase):
+    """
+    When many threads need a new Authorized Access Token for the same
+    user at once, only one request should be made, and every one of
+    them should get the same token. Runs against a local fake of
+    Spotify's token endpoint.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeTokenHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.token_url = 'http://127.0.0.1:%d/api/token' % cls.server.server_port
+
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+
+    def setUp(self):
+        FakeTokenHandler.posts.clear()
+        spotify.reset_request_scheduler()
+        self.patcher = mock.patch.object(spotify, 'SPOTIFY_TOKEN_URL',
+                self.token_url)
+        self.patcher.start()
+
+
+    def tearDown(self):
+        self.patcher.stop()
+
+
+    def _sessions(self, user_id, num):
+        """Returns sessions that the given user is logged into, each
+        without an access token."""
+
+        engine = import_module(settings.SESSION_ENGINE)
+        sessions = []
+        for i in range(num):
+            session = engine.SessionStore()
+            spotify._set_user_id(session, user_id)
+            spotify._set_refresh_token(session, user_id + '_refresh')
+            sessions.append(session)
+        return sessions
+
+
+    def _get_tokens(self, sessions):
+        """Gets an access token for every session at once, each on its
+        own thread, and returns them."""
+
+        tokens = [None] * len(sessions)
+        barrier = threading.Barrier(len(sessions))
+
+        def get_token(i):
+            barrier.wait()
+            tokens[i] = spotify._get_auth_access_token(sessions[i])
+
+        threads = [threading.Thread(target=get_token, args=[i])
+                for i in range(len(sessions))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return tokens
+
+
+    def test_concurrent_refresh_one_user(self):
+        """
+        50 callers needing a token for the same user at once should
+        cause one request, and all get the same access token and the
+        same new Refresh Token.
+        """
+        sessions = self._sessions('cassius', 50)
+
+        tokens = self._get_tokens(sessions)
+
+        self.assertEqual(FakeTokenHandler.posts['cassius_refresh'], 1)
+        self.assertEqual(tokens, ['cassius_refresh_access1'] * 50)
+        for session in sessions:
+            self.assertEqual(spotify._get_refresh_token(session),
+                    'cassius_refresh_new1')
+            self.assertEqual(session.get(spotify.AUTH_ACCESS_TOKEN),
+                    'cassius_refresh_access1')
+
+
+    def test_concurrent_refresh_many_users(self):
+        """
+        Callers needing tokens for different users at once should make
+        one request for each user, and each get their own user's token.
+        """
+        sessions = self._sessions('cassius', 25) + self._sessions('ben', 25)
+
+        tokens = self._get_tokens(sessions)
+
+        self.assertEqual(FakeTokenHandler.posts['cassius_refresh'], 1)
+        self.assertEqual(FakeTokenHandler.posts['ben_refresh'], 1)
+        self.assertEqual(tokens, ['cassius_refresh_access1'] * 25
+                + ['ben_refresh_access1'] * 25)
+
+
+    def test_refresh_after_finished(self):
+        """
+        Once a refresh has finished, the next one for the same user
+        should make a new request rather than reuse the old result.
+        """
+        session = self._sessions('cassius', 1)[0]
+
+        spotify._get_auth_access_token(session)
+        spotify._clear_auth_access_token(session)
+        token = spotify._get_auth_access_token(session)
+
+        self.assertEqual(sum(FakeTokenHandler.posts.values()), 2)
+        self.assertEqual(token, 'cassius_refresh_new1_access1')
+
+
+
+class FakePagedEndpoint:
+    """
+    Stands in for make_authorized_request() in the paged request tests.
+    Serves numbered items from an offset-based or cursor-based paged
+    endpoint, answering pages in a random order, and keeps track of how
+    many requests ran at once.
+    """
+
+    def __init__(self, total, cursors=False, container=None):
+        self.total = total
+        self.cursors = cursors
+        self.container = container
+        self.requests = []
+        self.running = 0
+        self.most_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, session, url, full_url=False, query_dict={}):
+        with self.lock:
+            self.requests.append((url, dict(query_dict)))
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+
+        time.sleep(random.uniform(0.01, 0.05))
+
+        if full_url:
+            query = parse_qs(urllib.parse.urlparse(url).query)
+            offset = int(query['offset'][0])
+            limit = int(query['limit'][0])
+        else:
+            offset = query_dict.get('offset', 0)
+            limit = query_dict['limit']
+
+        page = {
+            'items': list(range(offset, min(offset+limit, self.total))),
+            'limit': limit,
+            'next': None,
+        }
+        if offset + limit < self.total:
+            page['next'] = 'https://api.spotify.com/v1/test?' + \
+                    urlencode({'offset': offset+limit, 'limit': limit})
+        if self.cursors:
+            page['cursors'] = {'after': offset+limit}
+        else:
+            page['offset'] = offset
+            page['total'] = self.total
+
+        with self.lock:
+            self.running -= 1
+
+        response = mock.Mock()
+        response.json.return_value = {self.container: page} \
+                if self.container else page
+        return response
+
+
+
+class MakePagedRequestTests(TestCase):
+    """
+    Tests make_paged_request(), which requests every page of a paged
+    Spotify endpoint and returns all of their items in order.
+    """
+
+    def _request(self, endpoint, **kwargs):
+        with mock.patch.object(spotify, 'make_authorized_request', endpoint):
+            return spotify.make_paged_request(None, '/v1/test',
+                    query_dict={'limit': 50}, **kwargs)
+
+
+    def test_offset_pages(self):
+        """
+        For an offset-based endpoint, make_paged_request() should
+        request every page after the first by offset, and return every
+        item in order.
+        """
+        endpoint = FakePagedEndpoint(total=230)
+
+        items = self._request(endpoint, max_workers=4)
+
+        self.assertEqual(items, list(range(230)))
+        self.assertEqual(len(endpoint.requests), 5)
+        self.assertCountEqual([q.get('offset', 0) for u, q in endpoint.requests],
+                [0, 50, 100, 150, 200])
+        self.assertGreater(endpoint.most_running, 1)
+
+
+    def test_offset_pages_max_workers(self):
+        """
+        make_paged_request() should never request more than max_workers
+        pages at once.
+        """
+        endpoint = FakePagedEndpoint(total=1000)
+
+        items = self._request(endpoint, max_workers=3)
+
+        self.assertEqual(items, list(range(1000)))
+        self.assertLessEqual(endpoint.most_running, 3)
+
+
+    def test_one_page(self):
+        """
+        If everything fits on the first page, make_paged_request()
+        should only make one request.
+        """
+        endpoint = FakePagedEndpoint(total=20)
+
+        self.assertEqual(self._request(endpoint), list(range(20)))
+        self.assertEqual(len(endpoint.requests), 1)
+
+
+    def test_cursor_pages(self):
+        """
+        For a cursor-based endpoint with its pages in a container, like
+        /v1/me/following, make_paged_request() should follow each page
+        to the next, one at a time.
+        """
+        endpoint = FakePagedEndpoint(total=120, cursors=True,
+                container='artists')
+
+        items = self._request(endpoint, container='artists')
+
+        self.assertEqual(items, list(range(120)))
+        self.assertEqual(len(endpoint.requests), 3)
+        self.assertEqual(endpoint.most_running, 1)
+
+
+
 class UserIdTests(TestCase):
     """
     When a user logs into the Spotify, the Spotify module stores the
@@ -232,20 +752,20 @@ class UserIdTests(TestCase):
 
 class NoauthAccessTokenTests(TestCase):
     """
-    The 'noauth_access_token' global variable stores the Non-Authorized
-    Access Token that can be used to request public data from Spotify.
+    The NOAUTH_ACCESS_TOKEN cache key stores the Non-Authorized Access
+    Token that can be used to request public data from Spotify.
     """
 
     def test_set_noauth_access_token(self):
         """
         set_noauth_access_token() should save the given token as a
-        Non-Authorized Access Token in the global variable.
+        Non-Authorized Access Token in the cache.
         """
         # Erase in case other tests left over values
         spotify._clear_noauth_access_token()
         
         spotify._set_noauth_access_token('token123', 1)
-        self.assertEqual(spotify.noauth_access_token, 'token123')
+        self.assertEqual(spotify._load_noauth_access_token()['token'], 'token123')
 
 
     def test_clear_noauth_access_token(self):
@@ -258,20 +778,26 @@ class NoauthAccessTokenTests(TestCase):
         
         spotify._set_noauth_access_token('token123', 1)
         spotify._clear_noauth_access_token()
-        self.assertIsNone(spotify.noauth_access_token)
+        self.assertIsNone(spotify._load_noauth_access_token())
 
 
     def test_set_noauth_access_token_timeout(self):
         """
-        set_noauth_access_token() should save the given token and
-        should delete it after the given timeout (in seconds).
+        set_noauth_access_token() should save the given token, and once
+        the given timeout (in seconds) has passed, the token shouldn't
+        be used anymore.
         """
         # Erase in case other tests left over values
         spotify._clear_noauth_access_token()
         
         spotify._set_noauth_access_token('token123', 1)
         time.sleep(1)
-        self.assertIsNone(spotify.noauth_access_token)
+
+        # Pretend requesting a new token failed
+        with mock.patch.object(spotify, '_request_noauth_access_token') as request:
+            with self.assertRaises(spotify.SpotifyRequestException):
+                spotify._get_noauth_access_token()
+        request.assert_called_once()
 
 
     def test_get_noauth_access_token_exists(self):
@@ -320,16 +846,6 @@ class IsUserLoggedInTests(StaticLiveServerTestCase):
         cls.user_id = session.get(spotify.USER_ID)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, cancel any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(IsUserLoggedInTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def setUp(self):
         """
@@ -496,16 +1012,6 @@ class MakeAuthorizedRequestTests(StaticLiveServerTestCase):
         cls.user_id = session.get(spotify.USER_ID)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, cancel any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(MakeAuthorizedRequestTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def setUp(self):
         """
@@ -662,16 +1168,6 @@ class RequestAuthorizedTokenTests(StaticLiveServerTestCase):
         cls.user_id = session.get(spotify.USER_ID)
 
 
-    @classmethod
-    def tearDownClass(cls):
-        """
-        At the end of this class, cancel any timers that would delete
-        auth_access_tokens, so that they don't hang up the testing
-        program.
-        """
-        super(RequestAuthorizedTokenTests, cls).tearDownClass()
-        spotify.cleanup_timers()
-
 
     def setUp(self):
         """
@@ -737,10 +1233,11 @@ class RequestNoauthAccessTokenTests(TestCase):
         that can be used to request public data from Spotify.
         """
         spotify._request_noauth_access_token()
-        self.assertIsNotNone(spotify.noauth_access_token)
+        token = spotify._load_noauth_access_token()['token']
+        self.assertIsNotNone(token)
 
         headers = {
-            'Authorization': 'Bearer ' + spotify.noauth_access_token
+            'Authorization': 'Bearer ' + token
         }
         url = 'https://api.spotify.com/v1/browse/new-releases'
         response = requests.get(url, headers=headers)
@@ -749,6 +1246,225 @@ class RequestNoauthAccessTokenTests(TestCase):
 
 
 
+class HttpSessionTests(TestCase):
+    """
+    Every request to Spotify goes through one pooled HTTP session per
+    process, so that connections to Spotify are kept alive and reused.
+    This tests get_http_session() and the requests that use it.
+    """
+
+    def setUp(self):
+        """
+        Close any session left over from other tests, so each test
+        creates one with its own settings.
+        """
+        spotify.close_http_session()
+
+
+    def tearDown(self):
+        spotify.close_http_session()
+
+
+    def test_get_http_session_reused(self):
+        """
+        get_http_session() should return the same session every time
+        it's called.
+        """
+        session = spotify.get_http_session()
+        self.assertIsInstance(session, requests.Session)
+        self.assertIs(spotify.get_http_session(), session)
+
+
+    def test_close_http_session(self):
+        """
+        After close_http_session(), get_http_session() should create a
+        new session.
+        """
+        session = spotify.get_http_session()
+        spotify.close_http_session()
+        self.assertIsNot(spotify.get_http_session(), session)
+
+
+    @override_settings(SPOTIFY_HTTP_POOL_MAXSIZE=7,
+            SPOTIFY_HTTP_POOL_BLOCK=True,
+            SPOTIFY_HTTP_HOST_POOL_MAXSIZE={'accounts.spotify.com': 2})
+    def test_http_session_pool_settings(self):
+        """
+        The session's connection pools should be sized by the
+        SPOTIFY_HTTP_* settings, with per-host limits overriding the
+        default pool size.
+        """
+        session = spotify.get_http_session()
+
+        api_adapter = session.get_adapter(spotify.SPOTIFY_API_URL + '/v1/me')
+        self.assertEqual(api_adapter._pool_maxsize, 7)
+        self.assertTrue(api_adapter._pool_block)
+
+        token_adapter = session.get_adapter(spotify.SPOTIFY_TOKEN_URL)
+        self.assertEqual(token_adapter._pool_maxsize, 2)
+        self.assertTrue(token_adapter._pool_block)
+
+
+    @override_settings(SPOTIFY_HTTP_CONNECT_TIMEOUT=1,
+            SPOTIFY_HTTP_READ_TIMEOUT=2)
+    def test_make_noauth_request_uses_pooled_session(self):
+        """
+        make_noauth_request() should make its request through the
+        pooled session, with the configured timeouts.
+        """
+        with mock.patch.object(spotify, '_get_noauth_access_token',
+                return_value='token123'), \
+                mock.patch.object(requests.Session, 'request') as request:
+            spotify.make_noauth_request('/v1/browse/new-releases')
+
+        request.assert_called_once()
+        args, kwargs = request.call_args
+        self.assertEqual(args[0], 'GET')
+        self.assertEqual(args[1],
+                spotify.SPOTIFY_API_URL + '/v1/browse/new-releases')
+        self.assertEqual(kwargs['timeout'], (1, 2))
+        self.assertEqual(kwargs['headers']['Authorization'], 'Bearer token123')
+
+
+    @override_settings(SPOTIFY_RATE_LIMIT_MAX_RETRIES=3)
+    def test_rate_limited_request_retried(self):
+        """
+        A request Spotify answers with a 429 should be retried after
+        the Retry-After time, instead of failing.
+        """
+        spotify.reset_request_scheduler()
+
+        limited = mock.Mock(status_code=429, headers={'Retry-After': '0'})
+        ok = mock.Mock(status_code=200, headers={})
+
+        with mock.patch.object(spotify, '_get_auth_access_token',
+                return_value='token123'), \
+                mock.patch.object(requests.Session, 'request',
+                side_effect=[limited, ok]) as request:
+            results = spotify.make_authorized_request({}, '/v1/me')
+
+        self.assertIs(results, ok)
+        self.assertEqual(request.call_count, 2)
+        self.assertEqual(spotify.get_request_scheduler().metrics()['rate_limited'], 1)
+        spotify.reset_request_scheduler()
+
+
+
+class ResponseCacheTests(TestCase):
+    """
+    make_authorized_request() caches the bodies of responses with an
+    ETag, by user and URL, and asks Spotify to only send them again if
+    they changed, with If-None-Match. On a 304, the cached body should
+    be returned like a normal 200 response.
+    """
+
+    def setUp(self):
+        spotify.reset_response_cache()
+
+
+    def tearDown(self):
+        spotify.reset_response_cache()
+
+
+    def _response(self, status_code, body=b'', etag=None):
+        response = requests.models.Response()
+        response.status_code = status_code
+        response._content = body
+        response.encoding = 'utf-8'
+        if etag:
+            response.headers['ETag'] = etag
+        return response
+
+
+    def _request(self, session, responses):
+        with mock.patch.object(spotify, '_get_auth_access_token',
+                return_value='token123'), \
+                mock.patch.object(spotify, '_http_request',
+                side_effect=responses) as request:
+            results = spotify.make_authorized_request(session, '/v1/me/top/tracks')
+        return results, request.call_args[1]['headers']
+
+
+    def test_not_modified(self):
+        """
+        The second request for a URL should send the ETag of the first,
+        and a 304 should be answered with the first response's body.
+        """
+        session = {spotify.USER_ID: 'user1'}
+
+        results, headers = self._request(session,
+                [self._response(200, b'{"items": [1, 2]}', '"abc"')])
+        self.assertNotIn('If-None-Match', headers)
+        self.assertEqual(results.json(), {'items': [1, 2]})
+
+        results, headers = self._request(session, [self._response(304)])
+        self.assertEqual(headers['If-None-Match'], '"abc"')
+        self.assertEqual(results.status_code, 200)
+        self.assertEqual(results.json(), {'items': [1, 2]})
+        self.assertEqual(results.headers['ETag'], '"abc"')
+
+        metrics = spotify.response_cache_metrics()
+        self.assertEqual(metrics['hits'], 1)
+        self.assertEqual(metrics['misses'], 1)
+        self.assertEqual(metrics['not_modified'], 1)
+        self.assertEqual(metrics['not_modified_ratio'], 0.5)
+
+
+    def test_modified(self):
+        """
+        If the data changed, Spotify's new body and ETag should be
+        returned and cached.
+        """
+        session = {spotify.USER_ID: 'user1'}
+
+        self._request(session, [self._response(200, b'[1]', '"v1"')])
+        results, headers = self._request(session,
+                [self._response(200, b'[2]', '"v2"')])
+        self.assertEqual(results.json(), [2])
+
+        results, headers = self._request(session, [self._response(304)])
+        self.assertEqual(headers['If-None-Match'], '"v2"')
+        self.assertEqual(results.json(), [2])
+
+
+    def test_per_user(self):
+        """
+        One user's cached responses should never be sent for another.
+        """
+        self._request({spotify.USER_ID: 'user1'},
+                [self._response(200, b'[1]', '"v1"')])
+
+        results, headers = self._request({spotify.USER_ID: 'user2'},
+                [self._response(200, b'[2]', '"v2"')])
+        self.assertNotIn('If-None-Match', headers)
+        self.assertEqual(results.json(), [2])
+
+
+    def test_no_etag(self):
+        """
+        A response without an ETag shouldn't be cached.
+        """
+        session = {spotify.USER_ID: 'user1'}
+
+        self._request(session, [self._response(200, b'[1]')])
+        results, headers = self._request(session, [self._response(200, b'[1]')])
+        self.assertNotIn('If-None-Match', headers)
+        self.assertEqual(spotify.response_cache_metrics()['entries'], 0)
+
+
+    @override_settings(SPOTIFY_RESPONSE_CACHE_MAX_BYTES=0)
+    def test_disabled(self):
+        """
+        With a maximum size of 0, responses shouldn't be cached.
+        """
+        session = {spotify.USER_ID: 'user1'}
+
+        self._request(session, [self._response(200, b'[1]', '"v1"')])
+        results, headers = self._request(session, [self._response(200, b'[1]', '"v1"')])
+        self.assertNotIn('If-None-Match', headers)
+
+
+
 class SpotifyUtilsTests(TestCase):
     """
     Tests the misc. utility functions in the Spotify module.
@@ -14,10 +14,12 @@ from selenium.webdriver.common.by import By
 
 from django.conf import settings
 from django.contrib.staticfiles.testing import StaticLiveServerTestCase
+from django.test import TestCase
 from django.test.client import Client
 from django.urls import reverse
 
-from spoton import spotify
+from spoton import pagecache, spotify
+from spoton.models.quiz import *
 from spoton.tests.setup_tests import *
 
 
@@ -49,13 +51,10 @@ class LoginTests(StaticLiveServerTestCase):
 
     def tearDown(self):
         """
-        For each test, quit the browser instance and cancel any created
-        timers.
+        For each test, quit the browser instance.
         """
         teardown_browser(self.browser)
 
-        spotify.cleanup_timers()
-
 
 
     def test_login(self):
@@ -130,3 +129,91 @@ class LoginTests(StaticLiveServerTestCase):
         self.tearDownSelenium(selenium)
         
         """
+
+
+
+
+class QuizViewTests(TestCase):
+    """
+    Tests the "quiz" view, which returns a quiz's page, with HTTP
+    caching headers.
+    """
+
+    def setUp(self):
+        """
+        Creates a quiz with a stored payload, and empties the page
+        cache.
+        """
+
+        pagecache.get_page_cache().clear()
+
+        self.quiz = Quiz.objects.create(user_id='cassius')
+        q = CheckboxQuestion.objects.create(quiz=self.quiz)
+        Choice.objects.create(question=q, answer=True, primary_text='pop')
+        self.quiz.save_payload()
+
+        self.url = reverse('quiz', args=[self.quiz.uuid])
+        self.etag = '"' + self.quiz.payload_hash + '-' + \
+                str(getattr(settings, 'QUIZ_PAGE_VERSION', 1)) + '"'
+
+
+    def test_quiz(self):
+        """
+        The view should return the quiz's page, with a strong ETag made
+        from the quiz's payload hash, and a Cache-Control header that
+        lets shared caches keep it.
+        """
+
+        response = Client().get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertIn('pop', response.content.decode())
+
+
+    def test_quiz_not_modified(self):
+        """
+        If the client already has the page, the view should answer with
+        a 304, after only one query.
+        """
+
+        with self.assertNumQueries(1):
+            response = Client().get(self.url, HTTP_IF_NONE_MATCH=self.etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertEqual(response.content, b'')
+
+
+    def test_quiz_page_cached(self):
+        """
+        Once a quiz's page is rendered, it should be cached, so later
+        requests only look up its hash.
+        """
+
+        first = Client().get(self.url)
+
+        with self.assertNumQueries(1):
+            second = Client().get(self.url)
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+
+
+    def test_quiz_deleted(self):
+        """
+        Deleting a quiz should remove its page from the page cache.
+        """
+
+        Client().get(self.url)
+        self.assertIsNotNone(pagecache.get_quiz_page(self.quiz.uuid,
+                self.etag))
+
+        Quiz.objects.filter(user_id='cassius').delete()
+
+        self.assertIsNone(pagecache.get_quiz_page(self.quiz.uuid, self.etag))
+        response = Client().get(self.url)
+        self.assertNotIn('ETag', response)
@@ -10,6 +10,7 @@ urlpatterns = [
     path('quiz/<uuid:uuid>', views.quiz, name='quiz'),
     path('quiz/', views.index, name='quiz_test'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('quiz_job/<uuid:job_id>', views.quiz_job_status, name='quiz_job_status'),
     path('response/', views.handle_response, name='handle_response')
 ]
 
@@ -4,15 +4,19 @@ import logging
 import requests
 import urllib
 
+from django.conf import settings
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect
-from django.views.decorators.http import require_POST
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_GET, require_POST
 
+from spoton.models.jobs import QuizJob
 from spoton.models.quiz import Quiz
-from spoton.quiz import create_quiz, SCOPES
+from spoton.quiz import claim_quiz_job, start_quiz_job, SCOPES
 from spoton.quiz import save_response
 
-from . import spotify
+from . import pagecache, spotify
 
 
 
@@ -39,6 +43,14 @@ def index(request):
 def quiz(request, uuid):
     """A Django view function that returns the specified quiz's page.
 
+    A quiz's page never changes, so it's sent with a strong ETag, made
+    from the hash of the quiz's stored JSON (see Quiz.save_payload() )
+    and the QUIZ_PAGE_VERSION setting, and with a Cache-Control header
+    that lets shared caches keep it for QUIZ_PAGE_MAX_AGE seconds. A
+    request with a matching If-None-Match header is answered with a
+    304, after only looking up the hash. Otherwise, the page comes from
+    the page cache (see spoton.pagecache), or is rendered and cached.
+
     Parameters
     ----------
     request : django.http.HttpRequest
@@ -47,12 +59,25 @@ def quiz(request, uuid):
         The uuid of the quiz to display
     """
 
-    results = Quiz.objects.filter(uuid=uuid)
+    payload_hash = Quiz.get_payload_hash(uuid)
 
     # If a quiz was found, redirect to its page
-    if results:
-        quiz = results[0].json()
-        return render(request, react_mainpage, context={"quiz": json.dumps(quiz)})
+    if payload_hash:
+        etag = '"' + payload_hash + '-' + \
+                str(getattr(settings, 'QUIZ_PAGE_VERSION', 1)) + '"'
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content = _render_quiz_page(uuid, etag)
+            if content is None:
+                # The quiz was deleted in the meantime
+                return quiz(request, uuid)
+            response = HttpResponse(content)
+
+        response['ETag'] = etag
+        patch_cache_control(response, public=True,
+                max_age=getattr(settings, 'QUIZ_PAGE_MAX_AGE', 300))
+        return response
 
     # If no quiz with that uuid was found,
     #TODO Add error page
@@ -64,6 +89,40 @@ def quiz(request, uuid):
 
 
 
+def _render_quiz_page(uuid, etag):
+    """Returns a quiz's page, from the page cache or newly rendered.
+
+    The page is rendered without the request, so it's the same for
+    everyone, and can be cached for everyone.
+
+    Parameters
+    ----------
+    uuid : uuid.UUID
+        The uuid of the quiz
+    etag : str
+        The page's ETag
+
+    Returns
+    -------
+    str
+        The page, or None if the quiz doesn't exist.
+    """
+
+    content = pagecache.get_quiz_page(uuid, etag)
+    if content is not None:
+        return content
+
+    result = Quiz.get_payload(uuid)
+    if result is None:
+        return None
+
+    content = render_to_string(react_mainpage, context={"quiz": result[0]})
+    pagecache.set_quiz_page(uuid, etag, content)
+    return content
+
+
+
+
 @require_POST
 def handle_response(request):
     data = json.loads(request.body)
@@ -82,23 +141,64 @@ def dashboard(request):
     logged in to Spotify, or redirects them to a login page, if they
     are not. Upon logging in, the user will be redirected to their
     dashboard.
+
+    The user's new quiz is generated in the background, by a QuizJob
+    whose ID is passed to the page, so the client can poll its status
+    (see quiz_job_status() ). Usually that's the job started when the
+    user logged in, so the quiz is already ready or close to it; if
+    it's ready, the page gets the quiz's UUID with the job. If there
+    are too many jobs already, the page is returned with a 503 status
+    and a Retry-After header.
     """
 
     # Prompt the user to log in if they are not
     if not spotify.is_user_logged_in(request.session):
         return redirect('login')
 
+    # TEMP Replace the user's quiz with a new one
+    job = claim_quiz_job(request.session)
+
+    if job is None:
+        response = render(request, react_mainpage,
+                context={"quiz_job": json.dumps(None)}, status=503)
+        response['Retry-After'] = str(getattr(settings,
+                'QUIZ_JOB_RETRY_AFTER', 5))
+        return response
+
+    return render(request, react_mainpage,
+            context={"quiz_job": json.dumps(job.json())})
+
+
+
+
+@require_GET
+def quiz_job_status(request, job_id):
+    """A Django view function that returns the status of a quiz job.
+
+    Returns the JSON status of one of the logged in user's QuizJobs
+    (see QuizJob.json() ), which the client polls until the job has
+    succeeded or failed. Returns a 404 if the job doesn't exist, or
+    belongs to someone else.
+
+    Parameters
+    ----------
+    request : django.http.HttpRequest
+        The client's Http request that triggered this view function
+    job_id : uuid.UUID
+        The ID of the job
+    """
+
+    # Polled often, so only check the session, not Spotify
     user_id = spotify.get_user_id(request.session)
 
-    # TEMP Delete existing quizzes and create a new one
-    quizzes = Quiz.objects.filter(user_id=user_id)
-    if quizzes:
-        for q in quizzes:
-            q.delete()
-        logger.debug("Deleted existing quiz")
-    quiz = create_quiz(request.session)
+    job = None
+    if user_id:
+        job = QuizJob.objects.filter(id=job_id, user_id=user_id).first()
+
+    if job is None:
+        return JsonResponse({'status': 'error'}, status=404)
 
-    return render(request, react_mainpage, context={})
+    return JsonResponse(job.json())
 
 
 
@@ -199,4 +299,8 @@ def logged_in(request):
         logger.error("Logging into session failed")
         return redirect('index')
 
+    # Start generating the user's quiz now, so it's ready sooner
+    if not start_quiz_job(request.session):
+        logger.warning("Couldn't start generating quiz at login")
+
     return redirect(redirect_uri)